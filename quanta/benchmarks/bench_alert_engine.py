@@ -0,0 +1,97 @@
+# quanta/benchmarks/bench_alert_engine.py
+#
+# Load generator for quanta.mesh.alert_engine.
+#
+# In-process (default): feeds pre-serialized beacons straight into
+# AlertEngine.observe_message and checks deadlines after every drain batch,
+# measuring sustained beacons/s on one core, then measures how late timeouts
+# fire with a simulated clock.
+#
+# --redis URL: publishes beacons to the real channel with pipelined PUBLISH
+# while run() consumes them in a thread, measuring end-to-end beacons/s.
+#
+#   python -m quanta.benchmarks.bench_alert_engine --agents 1000 --beacons 500000
+#   python -m quanta.benchmarks.bench_alert_engine --redis redis://localhost:6379
+
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime
+
+from quanta.mesh import alert_engine
+from quanta.mesh.alert_engine import AlertEngine, DRAIN_BATCH
+
+def make_beacons(n_agents, n_beacons):
+    now = datetime.utcnow().isoformat()
+    return [json.dumps({"agent": f"agent_{i % n_agents}", "timestamp": now, "uptime": 1,
+                        "memory_usage": 10.0, "error_rate": 0.0, "queue_length": 0}).encode()
+            for i in range(n_beacons)]
+
+def bench_in_process(n_agents, n_beacons):
+    beacons = make_beacons(n_agents, n_beacons)
+    engine = AlertEngine(on_alert=lambda agent, silent: None)
+    started = time.perf_counter()
+    for i, data in enumerate(beacons):
+        engine.observe_message(data)
+        if i % DRAIN_BATCH == 0:
+            engine.expire()
+    elapsed = time.perf_counter() - started
+    print(f"in-process        {n_beacons / elapsed:12.0f} beacons/s  ({n_agents} agents)")
+
+def bench_timeout_accuracy(n_agents, timeout=30.0):
+    clock = [0.0]
+    fired = {}
+    engine = AlertEngine(timeout=timeout, clock=lambda: clock[0],
+                         on_alert=lambda agent, silent: fired.setdefault(agent, clock[0]))
+    last_beacon = {}
+    for agent in range(n_agents):
+        # Every agent beacons a few times, then goes silent at a random point
+        for _ in range(3):
+            clock[0] += random.random() * 0.01
+            engine.observe(f"agent_{agent}")
+            last_beacon[f"agent_{agent}"] = clock[0]
+    # Event loop: jump straight to the next deadline, as run() does
+    while engine.next_timeout() is not None:
+        clock[0] += engine.next_timeout()
+        engine.expire()
+    lateness = [fired[a] - (last_beacon[a] + timeout) for a in last_beacon]
+    print(f"timeouts          {len(fired)}/{n_agents} fired, max lateness {max(lateness) * 1000:.3f} ms")
+
+def bench_redis(url, n_agents, n_beacons):
+    import redis
+    r = redis.Redis.from_url(url)
+    engine = AlertEngine(on_alert=lambda agent, silent: None)
+    pubsub = r.pubsub()
+    pubsub.subscribe(alert_engine.BEACON_CHANNEL)
+    pubsub.get_message(timeout=1.0)  # subscribe confirmation
+    threading.Thread(target=alert_engine.run, args=(engine, pubsub), daemon=True).start()
+
+    beacons = make_beacons(n_agents, n_beacons)
+    started = time.perf_counter()
+    for i in range(0, n_beacons, 1000):
+        pipe = r.pipeline(transaction=False)
+        for data in beacons[i:i + 1000]:
+            pipe.publish(alert_engine.BEACON_CHANNEL, data)
+        pipe.execute()
+    while engine.counters["beacons"] < n_beacons and time.perf_counter() - started < 120:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    print(f"redis pub/sub     {engine.counters['beacons'] / elapsed:12.0f} beacons/s  "
+          f"({engine.counters['beacons']}/{n_beacons} received)")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agents", type=int, default=1000)
+    parser.add_argument("--beacons", type=int, default=500000)
+    parser.add_argument("--redis", help="publish through a real Redis at this URL")
+    args = parser.parse_args()
+    if args.redis:
+        bench_redis(args.redis, args.agents, args.beacons)
+    else:
+        bench_in_process(args.agents, args.beacons)
+        bench_timeout_accuracy(args.agents)
+
+if __name__ == "__main__":
+    main()
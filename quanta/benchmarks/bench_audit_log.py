@@ -0,0 +1,56 @@
+# quanta/benchmarks/bench_audit_log.py
+#
+# Per-event audit logging cost on a local S3 stand-in as the log ages: the old
+# download-append-upload of one mesh_audit.log object vs. buffered immutable
+# segments from quanta.mesh.audit_segments.
+#
+#   python -m quanta.benchmarks.bench_audit_log --existing 0 100000 1000000
+
+import time
+import argparse
+import datetime
+
+from quanta.mesh.audit_segments import SegmentedAuditLog
+from quanta.benchmarks.stand_ins import LocalS3
+
+BUCKET = "quanta-audit"
+
+def line(i, now):
+    return f"{now.isoformat()} | HEARTBEAT | agent_{i % 20} | \n"
+
+def old_log_event(s3, entry):
+    try:
+        old_logs = s3.get_object(Bucket=BUCKET, Key="mesh_audit.log")["Body"].read().decode("utf-8")
+    except s3.exceptions.NoSuchKey:
+        old_logs = ""
+    s3.put_object(Bucket=BUCKET, Key="mesh_audit.log", Body=(old_logs + entry).encode("utf-8"))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--existing", type=int, nargs="+", default=[0, 100000, 1000000],
+                        help="lines already in the log")
+    parser.add_argument("--events", type=int, default=200)
+    args = parser.parse_args()
+
+    now = datetime.datetime.utcnow()
+    for existing in args.existing:
+        s3 = LocalS3()
+        s3.load(BUCKET, [("mesh_audit.log", "".join(line(i, now) for i in range(existing)))])
+        started = time.perf_counter()
+        for i in range(args.events):
+            old_log_event(s3, line(i, datetime.datetime.utcnow()))
+        old = (time.perf_counter() - started) / args.events * 1e6
+
+        s3 = LocalS3()
+        log = SegmentedAuditLog(s3, BUCKET, flush_thread=False)
+        started = time.perf_counter()
+        for i in range(args.events):
+            ts = datetime.datetime.utcnow()
+            log.append(line(i, ts), ts=ts)
+        log.flush()
+        new = (time.perf_counter() - started) / args.events * 1e6
+        print(f"{existing:9d} existing lines   download-append-upload {old:10.1f} us/event   "
+              f"segments {new:7.1f} us/event   ({s3.calls.get('put_object', 0)} PUTs)")
+
+if __name__ == "__main__":
+    main()
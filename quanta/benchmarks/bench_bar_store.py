@@ -0,0 +1,86 @@
+# quanta/benchmarks/bench_bar_store.py
+#
+# Load time and memory for one synthetic ticker-year of minute bars:
+# per-day JSON objects vs. columnar month objects from quanta.ingest.bar_store.
+#
+#   python -m quanta.benchmarks.bench_bar_store --days 252 --bars 390
+
+import json
+import time
+import argparse
+import tracemalloc
+from collections import defaultdict
+from datetime import date, timedelta
+
+import numpy as np
+
+from quanta.ingest import bar_store
+
+def synthetic_year(n_days, n_bars, seed=0):
+    rng = np.random.default_rng(seed)
+    day = date(2023, 1, 2)
+    days = {}
+    while len(days) < n_days:
+        if day.weekday() < 5:
+            start = int(time.mktime(day.timetuple())) * 1000 + 14 * 3600 * 1000
+            closes = 100 + np.cumsum(rng.normal(0, 0.1, n_bars))
+            days[day.isoformat()] = [
+                {
+                    "open": float(c), "high": float(c) + 0.05, "low": float(c) - 0.05,
+                    "close": float(c), "volume": float(rng.integers(100, 10000)),
+                    "vwap": float(c), "timestamp": start + i * 60000,
+                    "transactions": int(rng.integers(1, 200)), "otc": None,
+                }
+                for i, c in enumerate(closes)
+            ]
+        day += timedelta(days=1)
+    return days
+
+def measure(load):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - started
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, retained, peak
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=252)
+    parser.add_argument("--bars", type=int, default=390)
+    args = parser.parse_args()
+
+    days = synthetic_year(args.days, args.bars)
+    json_objects = {d: json.dumps(bars).encode() for d, bars in days.items()}
+    months = defaultdict(dict)
+    for d, bars in days.items():
+        months[d[:7]][d] = bar_store.bars_to_array(bars)
+    month_objects = [bar_store.encode_month(arrays) for arrays in months.values()]
+    del days, months
+
+    def load_json():
+        return {d: json.loads(data) for d, data in json_objects.items()}
+
+    def load_columnar():
+        loaded = {}
+        for data in month_objects:
+            loaded.update(bar_store.split_days(*bar_store.decode_month(data)))
+        return loaded
+
+    def load_columnar_close():
+        loaded = {}
+        for data in month_objects:
+            loaded.update(bar_store.split_days(*bar_store.decode_month(data, columns=["close"])))
+        return loaded
+
+    mb = 1024 * 1024
+    print(f"ticker-year: {args.days} days x {args.bars} bars")
+    print(f"stored bytes: json {sum(map(len, json_objects.values())) / mb:8.2f} MB | "
+          f"columnar {sum(map(len, month_objects)) / mb:8.2f} MB")
+    for label, load in (("json", load_json), ("columnar", load_columnar), ("columnar[close]", load_columnar_close)):
+        _, elapsed, retained, peak = measure(load)
+        print(f"{label:16s} load {elapsed * 1000:9.1f} ms | retained {retained / mb:8.2f} MB | peak {peak / mb:8.2f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# quanta/benchmarks/bench_health_dashboard.py
+#
+# Dashboard request latency with many concurrent viewers against a Redis
+# stand-in with a fixed round-trip latency: one HGETALL + decode per request
+# (the old /dashboard) vs. the shared DashboardSnapshot, with and without
+# If-None-Match revalidation.
+#
+#   python -m quanta.benchmarks.bench_health_dashboard --viewers 100 --agents 500 --latency-ms 1
+
+import json
+import time
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from quanta.mesh.health_registry import HEALTH_KEY
+from quanta.mesh.health_dashboard import DashboardSnapshot
+from quanta.benchmarks.stand_ins import LocalRedis
+
+def load_agents(r, n_agents):
+    now = datetime.utcnow().isoformat()
+    r.hset(HEALTH_KEY, mapping={
+        f"agent_{i}": json.dumps({"timestamp": now, "uptime": i, "memory_usage": 40.0,
+                                  "error_rate": 0.0, "queue_length": 0})
+        for i in range(n_agents)})
+
+def per_request(r):
+    raw_data = r.hgetall(HEALTH_KEY)
+    parsed = {agent.decode(): json.loads(payload.decode()) for agent, payload in raw_data.items()}
+    return json.dumps({"timestamp": datetime.utcnow().isoformat(), "agents": parsed}).encode()
+
+def from_snapshot(snapshot, etag=None):
+    body, current, _ = snapshot.get()
+    return b"" if etag == current else body
+
+def run(label, handler, viewers, requests):
+    def viewer(_):
+        latencies = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            handler()
+            latencies.append(time.perf_counter() - started)
+        return latencies
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=viewers) as pool:
+        latencies = sorted(l for batch in pool.map(viewer, range(viewers)) for l in batch)
+    elapsed = time.perf_counter() - started
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+    print(f"{label:22s} {len(latencies) / elapsed:9.0f} req/s  "
+          f"p50 {pct(0.50):7.3f} ms  p99 {pct(0.99):7.3f} ms")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--viewers", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=50, help="requests per viewer")
+    parser.add_argument("--agents", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    r = LocalRedis(latency=args.latency_ms / 1000)
+    load_agents(r, args.agents)
+
+    r.round_trips = 0
+    run("HGETALL per request", lambda: per_request(r), args.viewers, args.requests)
+    print(f"{'':22s} {r.round_trips} round trips")
+
+    snapshot = DashboardSnapshot(r)
+    # Built once by hand; the watch thread would need a real pub/sub connection
+    snapshot.started = True
+    r.round_trips = 0
+    snapshot.refresh()
+    run("shared snapshot", lambda: from_snapshot(snapshot), args.viewers, args.requests)
+    etag = snapshot.etag
+    run("snapshot, 304", lambda: from_snapshot(snapshot, etag), args.viewers, args.requests)
+    print(f"{'':22s} {r.round_trips} round trips")
+
+if __name__ == "__main__":
+    main()
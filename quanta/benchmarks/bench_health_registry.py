@@ -0,0 +1,56 @@
+# quanta/benchmarks/bench_health_registry.py
+#
+# Sustained beacons/s through health_registry against a Redis stand-in with a
+# fixed round-trip latency: one HSET per beacon (the old store_beacon) vs. the
+# coalescing BeaconCoalescer, with and without metric time series.
+#
+#   python -m quanta.benchmarks.bench_health_registry --agents 500 --beacons 100000 --latency-ms 0.2
+
+import json
+import time
+import argparse
+from datetime import datetime
+
+from quanta.mesh import health_registry
+from quanta.mesh.health_registry import BeaconCoalescer, health_record
+from quanta.benchmarks.stand_ins import LocalRedis
+
+def make_beacons(n_agents, n_beacons):
+    return [{"agent": f"agent_{i % n_agents}", "timestamp": datetime.utcnow().isoformat(), "uptime": i,
+             "memory_usage": 40.0 + i % 7, "error_rate": 0.0, "queue_length": i % 3}
+            for i in range(n_beacons)]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agents", type=int, default=500)
+    parser.add_argument("--beacons", type=int, default=100000)
+    parser.add_argument("--latency-ms", type=float, default=0.2)
+    parser.add_argument("--window-ms", type=int, default=250)
+    args = parser.parse_args()
+    beacons = make_beacons(args.agents, args.beacons)
+
+    r = LocalRedis(latency=args.latency_ms / 1000)
+    n = min(args.beacons, 5000)  # per-beacon writes are slow; sample them
+    started = time.perf_counter()
+    for beacon in beacons[:n]:
+        r.hset(health_registry.HEALTH_KEY, beacon["agent"], json.dumps(health_record(beacon)))
+    rate = n / (time.perf_counter() - started)
+    print(f"HSET per beacon            {rate:10.0f} beacons/s  ({r.round_trips} round trips for {n})")
+
+    for retention in (0, 3600):
+        r = LocalRedis(latency=args.latency_ms / 1000)
+        coalescer = BeaconCoalescer(r, window_ms=args.window_ms, retention_sec=retention, flush_thread=False)
+        started = last_flush = time.perf_counter()
+        for beacon in beacons:
+            coalescer.add(beacon)
+            now = time.perf_counter()
+            if now - last_flush >= coalescer.window:
+                coalescer.flush()
+                last_flush = now
+        coalescer.flush()
+        rate = args.beacons / (time.perf_counter() - started)
+        label = "coalesced + time series" if retention else "coalesced"
+        print(f"{label:26s} {rate:10.0f} beacons/s  ({r.round_trips} round trips for {args.beacons})")
+
+if __name__ == "__main__":
+    main()
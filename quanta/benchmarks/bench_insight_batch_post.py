@@ -0,0 +1,92 @@
+# quanta/benchmarks/bench_insight_batch_post.py
+#
+# Connections and requests needed to deliver one loader cycle of insights to a
+# local keep-alive HTTP server: the old requests.post per insight vs. the
+# pooled session posting batches to /insight/batch.
+#
+#   python -m quanta.benchmarks.bench_insight_batch_post --insights 2000 --batch-size 200
+
+import os
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379")
+
+from quanta.brain import insight_loader
+
+class CountingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the deployed API
+    counters = {"connections": 0, "requests": 0, "insights": 0}
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with self.lock:
+            self.counters["connections"] += 1
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        items = body if isinstance(body, list) else [body]
+        with self.lock:
+            self.counters["requests"] += 1
+            self.counters["insights"] += len(items)
+        if isinstance(body, list):
+            payload = {"status": "success", "results": [{"id": i["id"], "status": "success"} for i in items]}
+        else:
+            payload = {"status": "success", "id": body["id"]}
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+def reset():
+    for name in CountingHandler.counters:
+        CountingHandler.counters[name] = 0
+
+def report(label, elapsed, n):
+    c = CountingHandler.counters
+    print(f"{label:24s} {c['connections']:6d} connections {c['requests']:6d} requests "
+          f"{n / elapsed:10.1f} insights/s")
+    return c["connections"], c["requests"]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--insights", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CountingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}/ingest/insight"
+    insights = [(f"insights/T{i % 40:02d}_d{i:05d}.json", {"id": str(i), "prediction": i % 2})
+                for i in range(args.insights)]
+
+    reset()
+    started = time.perf_counter()
+    for _, insight in insights:
+        requests.post(base, json=insight).raise_for_status()
+    old = report("requests.post each", time.perf_counter() - started, args.insights)
+
+    insight_loader.BRAIN_BATCH_URL = base + "/batch"
+    reset()
+    started = time.perf_counter()
+    for i in range(0, len(insights), args.batch_size):
+        results = insight_loader.post_batch_to_brain(insights[i:i + args.batch_size])
+        assert all(error is None for error in results.values())
+    new = report(f"session batch ({args.batch_size})", time.perf_counter() - started, args.insights)
+
+    print(f"connections {old[0] / max(new[0], 1):.0f}x fewer, requests {old[1] / max(new[1], 1):.0f}x fewer")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# quanta/benchmarks/bench_job_enqueue.py
+#
+# Enqueue rate of job_producer against a real Redis (REDIS_URL, default local):
+# three round trips per job (old behaviour) vs. the bulk enqueue API in
+# pipeline and lua modes. Uses throwaway bench:* keys.
+#
+#   python -m quanta.benchmarks.bench_job_enqueue --jobs 20000 --batch-size 500
+
+import os
+import json
+import time
+import argparse
+
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379")
+
+from quanta.brain import job_producer
+
+def per_job_enqueue(parsed_jobs):
+    r = job_producer.r
+    for job_id, ticker, date in parsed_jobs:
+        if r.sismember(job_producer.REDIS_SET_KEY, job_id):
+            continue
+        r.lpush(job_producer.REDIS_JOBS_KEY, json.dumps(job_producer.build_job(ticker, date)))
+        r.sadd(job_producer.REDIS_SET_KEY, job_id)
+    return len(parsed_jobs)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    job_producer.REDIS_JOBS_KEY = "bench:quanta_jobs"
+    job_producer.REDIS_SET_KEY = "bench:quanta_jobs_submitted"
+    r = job_producer.r
+    parsed_jobs = [(f"T{i % 40}_{i}", f"T{i % 40}", f"d{i}") for i in range(args.jobs)]
+
+    runs = [
+        ("per-job (3 round trips)", per_job_enqueue, None),
+        ("bulk pipeline", lambda jobs: job_producer.enqueue_jobs(jobs, args.batch_size), "pipeline"),
+        ("bulk lua", lambda jobs: job_producer.enqueue_jobs(jobs, args.batch_size), "lua"),
+    ]
+    try:
+        for label, enqueue, mode in runs:
+            r.delete(job_producer.REDIS_JOBS_KEY, job_producer.REDIS_SET_KEY)
+            if mode:
+                job_producer.ENQUEUE_MODE = mode
+            started = time.perf_counter()
+            enqueue(parsed_jobs)
+            elapsed = time.perf_counter() - started
+            assert r.llen(job_producer.REDIS_JOBS_KEY) == args.jobs
+            if mode:
+                # A second pass must be a no-op: everything is already submitted
+                assert job_producer.enqueue_jobs(parsed_jobs, args.batch_size) == 0
+            assert r.llen(job_producer.REDIS_JOBS_KEY) == args.jobs
+            print(f"{label:26s} {args.jobs / elapsed:12.0f} jobs/s  ({elapsed:.2f}s)")
+    finally:
+        r.delete(job_producer.REDIS_JOBS_KEY, job_producer.REDIS_SET_KEY)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# quanta/benchmarks/bench_job_producer.py
+#
+# Cost of one job_producer scan cycle against a local S3 stand-in holding a
+# large polygon/TICKER/DATE.json tree: full listing with per-key Redis round
+# trips (old behaviour) vs. incremental StartAfter discovery with pipelined
+# checks. Projected times add the given S3 request and Redis round-trip
+# latencies to the measured in-process time.
+#
+#   python -m quanta.benchmarks.bench_job_producer --tickers 40 --days 2520
+
+import os
+import json
+import time
+import uuid
+import argparse
+from datetime import date, timedelta
+
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379")
+
+from quanta.brain import job_producer
+from quanta.benchmarks.stand_ins import LocalS3, LocalRedis
+
+def legacy_cycle():
+    # The pre-incremental main loop body: list everything, three round trips per new key
+    for key in job_producer.get_all_s3_keys():
+        parsed = job_producer.parse_job_key(key)
+        if not parsed:
+            continue
+        job_id, ticker, date_str = parsed
+        if job_producer.already_queued(job_id):
+            continue
+        job = {"id": str(uuid.uuid4()), "ticker": ticker, "date": date_str, "task": "analyze_data"}
+        job_producer.r.lpush(job_producer.REDIS_JOBS_KEY, json.dumps(job))
+        job_producer.mark_queued(job_id)
+
+def trading_days(n):
+    day, days = date(2014, 1, 2), []
+    while len(days) < n:
+        if day.weekday() < 5:
+            days.append(day.isoformat())
+        day += timedelta(days=1)
+    return days
+
+def fresh_env(tickers, days):
+    s3 = LocalS3()
+    s3.load(job_producer.S3_BUCKET, [
+        (f"{job_producer.S3_PREFIX}{t}/{d}.json", "[]") for t in tickers for d in days
+    ])
+    job_producer.s3 = s3
+    job_producer.r = LocalRedis()
+    job_producer.ENQUEUE_MODE = "pipeline"  # the stand-in has no Lua scripting
+    return s3, job_producer.r
+
+def measure(label, cycle, s3, r, s3_ms, redis_ms):
+    calls_before, trips_before = sum(s3.calls.values()), r.round_trips
+    started = time.perf_counter()
+    cycle()
+    elapsed = time.perf_counter() - started
+    s3_calls = sum(s3.calls.values()) - calls_before
+    trips = r.round_trips - trips_before
+    projected = elapsed + s3_calls * s3_ms / 1000 + trips * redis_ms / 1000
+    print(f"{label:34s} s3 requests {s3_calls:7d} | redis round trips {trips:7d} | "
+          f"local {elapsed:7.2f}s | projected {projected:8.2f}s")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, default=40)
+    parser.add_argument("--days", type=int, default=2520)
+    parser.add_argument("--s3-ms", type=float, default=30.0)
+    parser.add_argument("--redis-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    tickers = [f"T{i:03d}" for i in range(args.tickers)]
+    days = trading_days(args.days + 1)
+    history, new_day = days[:-1], days[-1]
+    print(f"{args.tickers * args.days} keys, {args.s3_ms}ms per S3 request, {args.redis_ms}ms per Redis round trip")
+
+    def add_new_day(s3):
+        for t in tickers:
+            s3.put_object(Bucket=job_producer.S3_BUCKET, Key=f"{job_producer.S3_PREFIX}{t}/{new_day}.json", Body="[]")
+
+    s3, r = fresh_env(tickers, history)
+    legacy_cycle()
+    add_new_day(s3)
+    measure("legacy: steady-state cycle", legacy_cycle, s3, r, args.s3_ms, args.redis_ms)
+
+    s3, r = fresh_env(tickers, history)
+    measure("incremental: first (full) cycle", lambda: job_producer.run_cycle(full_scan=True), s3, r, args.s3_ms, args.redis_ms)
+    add_new_day(s3)
+    measure("incremental: steady-state cycle", job_producer.run_cycle, s3, r, args.s3_ms, args.redis_ms)
+    print(f"jobs queued: {r.llen(job_producer.REDIS_JOBS_KEY)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# quanta/benchmarks/bench_model_registry.py
+#
+# Jobs/sec of the ML agent prediction step: refitting three models per job
+# (old behaviour) vs. serving pre-fitted models from the ModelRegistry.
+#
+#   python -m quanta.benchmarks.bench_model_registry --jobs 200
+
+import os
+import time
+import queue
+import argparse
+import tempfile
+
+os.environ.setdefault("QUANTA_MODEL_DIR", tempfile.mkdtemp(prefix="quanta_models_"))
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.datasets import make_classification
+
+from quanta.brain import ml_agent_worker
+
+def refit_predict(features):
+    # Baseline: the pre-registry multi_model_predict, fitting every model per job
+    X, y = make_classification(n_samples=100, n_features=4, n_classes=2, random_state=42)
+    results = {}
+    for name, factory in (
+        ("RandomForest", RandomForestClassifier),
+        ("LogisticRegression", LogisticRegression),
+        ("GradientBoosting", GradientBoostingClassifier),
+    ):
+        model = factory()
+        model.fit(X, y)
+        results[name] = {
+            "prediction": int(model.predict([features])[0]),
+            "probabilities": model.predict_proba([features])[0].tolist(),
+        }
+    return results
+
+def synthetic_queue(n_jobs, seed=0):
+    rng = np.random.default_rng(seed)
+    jobs = queue.Queue()
+    for row in rng.normal(100, 5, size=(n_jobs, 4)):
+        jobs.put(row.tolist())
+    return jobs
+
+def drain(jobs, predict):
+    count = 0
+    start = time.perf_counter()
+    while True:
+        try:
+            features = jobs.get_nowait()
+        except queue.Empty:
+            break
+        predict(features)
+        count += 1
+    return count / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=200)
+    args = parser.parse_args()
+
+    baseline = drain(synthetic_queue(args.jobs), refit_predict)
+
+    ml_agent_worker.load_models()
+    registry = drain(synthetic_queue(args.jobs), ml_agent_worker.multi_model_predict)
+
+    print(f"jobs={args.jobs}")
+    print(f"refit per job : {baseline:10.1f} jobs/sec")
+    print(f"model registry: {registry:10.1f} jobs/sec  ({registry / baseline:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# quanta/benchmarks/bench_s3_day_split.py
+#
+# Throughput of polygon_s3_ingest on a synthetic minute_aggs day file:
+#   - parse: the old per-ticker pass (decompress + parse + filter once per
+#     ticker) vs. the single streamed pass that splits rows by ticker
+#   - serialize: rows/s of the per-row apply/join vs. column-wise format_records
+#   - embed: rows/s through split + serialize + embedding, with embedding done
+#     inline vs. on the EmbeddingPipeline; the embedding model is simulated
+#     with a fixed latency per batch
+#
+#   python -m quanta.benchmarks.bench_s3_day_split --symbols 10000 --tickers 4 --embed-ms 50
+
+import io
+import gzip
+import time
+import random
+import argparse
+
+import pandas as pd
+
+from quanta.ingest.polygon_s3_ingest import (
+    split_day_file, format_records, EmbeddingPipeline, VectorStoreSink, EMBED_BATCH_SIZE,
+)
+
+class CountingSink:
+    def __init__(self):
+        self.rows = 0
+
+    def write(self, day, df):
+        self.rows += len(df)
+
+class SimulatedEmbeddings:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def embed_documents(self, texts):
+        time.sleep(self.latency)
+        return [[0.0] for _ in texts]
+
+class ListStore:
+    def __init__(self):
+        self.items = []
+
+    def add_embeddings(self, text_embeddings):
+        self.items.extend(text_embeddings)
+
+class InlineEmbedding:
+    """
+    Stands in for EmbeddingPipeline with the old behaviour: embed on put().
+    """
+    def __init__(self, embeddings, vectorstore):
+        self.embeddings = embeddings
+        self.vectorstore = vectorstore
+
+    def put(self, texts):
+        if texts:
+            self.vectorstore.add_embeddings(list(zip(texts, self.embeddings.embed_documents(texts))))
+
+def make_day_file(n_symbols, minutes=390):
+    lines = ["ticker,volume,open,close,high,low,window_start,transactions"]
+    for m in range(minutes):
+        ts = 1700000000000000000 + m * 60_000_000_000
+        for s in range(n_symbols):
+            price = 100 + random.random()
+            lines.append(f"T{s},{random.randint(1, 9999)},{price:.2f},{price:.2f},{price:.2f},{price:.2f},{ts},7")
+    return gzip.compress("\n".join(lines).encode())
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=10000)
+    parser.add_argument("--minutes", type=int, default=60)
+    parser.add_argument("--tickers", type=int, default=4)
+    parser.add_argument("--embed-ms", type=float, default=50.0, help="simulated latency per embedding batch")
+    args = parser.parse_args()
+    data = make_day_file(args.symbols, args.minutes)
+    tickers = [f"T{i}" for i in range(args.tickers)]
+    print(f"day file: {len(data) / 1e6:.1f} MB gzipped, {args.symbols * args.minutes} rows")
+
+    started = time.perf_counter()
+    for ticker in tickers:
+        with gzip.open(io.BytesIO(data), 'rt') as f:
+            df = pd.read_csv(f)
+        df = df[df['ticker'] == ticker]
+    print(f"per-ticker pass   {time.perf_counter() - started:8.2f} s")
+
+    sinks = {ticker: CountingSink() for ticker in tickers}
+    started = time.perf_counter()
+    split_day_file(io.BytesIO(data), sinks, "bench")
+    print(f"single pass       {time.perf_counter() - started:8.2f} s  "
+          f"({sum(s.rows for s in sinks.values())} rows routed)")
+
+    df = pd.read_csv(io.BytesIO(data), compression="gzip")
+    started = time.perf_counter()
+    df.astype(str).apply(lambda row: ','.join(row), axis=1).tolist()
+    print(f"apply/join        {len(df) / (time.perf_counter() - started):12.0f} rows/s")
+    started = time.perf_counter()
+    format_records(df)
+    print(f"format_records    {len(df) / (time.perf_counter() - started):12.0f} rows/s")
+
+    embeddings = SimulatedEmbeddings(args.embed_ms / 1000)
+    for label in ("inline embed", "pipelined embed"):
+        store = ListStore()
+        pipeline = (InlineEmbedding(embeddings, store) if label == "inline embed"
+                    else EmbeddingPipeline(embeddings, store))
+        sinks = {ticker: VectorStoreSink(ticker, pipeline) for ticker in tickers}
+        started = time.perf_counter()
+        split_day_file(io.BytesIO(data), sinks, "bench")
+        for sink in sinks.values():
+            sink.flush()
+        if label != "inline embed":
+            pipeline.close()
+        elapsed = time.perf_counter() - started
+        print(f"{label:17s} {len(store.items) / elapsed:12.0f} rows/s  "
+              f"(batches of {EMBED_BATCH_SIZE}, {args.embed_ms:.0f} ms each)")
+
+if __name__ == "__main__":
+    main()
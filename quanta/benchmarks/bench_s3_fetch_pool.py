@@ -0,0 +1,58 @@
+# quanta/benchmarks/bench_s3_fetch_pool.py
+#
+# Insight fetch/decode/process throughput against a local S3 stand-in with a
+# fixed per-request latency: the old sequential get_object loop vs. the shared
+# bounded-concurrency pool in quanta.brain.s3_fetch_pool.
+#
+#   python -m quanta.benchmarks.bench_s3_fetch_pool --keys 1000 --latency-ms 20
+
+import json
+import time
+import argparse
+
+from quanta.brain.s3_fetch_pool import fetch_json, process_keys
+from quanta.benchmarks.stand_ins import LocalS3
+
+BUCKET = "quanta-insights"
+
+def seed(s3, n_keys, n_tickers):
+    items = []
+    for i in range(n_keys):
+        ticker = f"T{i % n_tickers:02d}"
+        insight = {"id": str(i), "raw_job": {"ticker": ticker, "date": f"d{i:05d}"},
+                   "models": {"RandomForest": {"prediction": i % 2}}}
+        items.append((f"insights/{ticker}_d{i:05d}_merged.json", json.dumps(insight)))
+    s3.load(BUCKET, items)
+    return [key for key, _ in items]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=1000)
+    parser.add_argument("--tickers", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[4, 16, 32])
+    args = parser.parse_args()
+
+    s3 = LocalS3(latency=args.latency_ms / 1000)
+    keys = seed(s3, args.keys, args.tickers)
+    processed = []
+
+    started = time.perf_counter()
+    for key in keys:
+        processed.append(fetch_json(s3, BUCKET, key)["id"])
+    sequential = args.keys / (time.perf_counter() - started)
+    print(f"sequential            {sequential:10.1f} keys/s")
+
+    for workers in args.workers:
+        processed.clear()
+        started = time.perf_counter()
+        done, failed = process_keys(
+            s3, BUCKET, keys, lambda key, data: processed.append(data["id"]),
+            group_by=lambda key: key.split("/")[1].split("_")[0], max_workers=workers,
+        )
+        rate = args.keys / (time.perf_counter() - started)
+        assert len(done) == args.keys and not failed
+        print(f"pool ({workers:3d} workers)   {rate:10.1f} keys/s  ({rate / sequential:.1f}x)")
+
+if __name__ == "__main__":
+    main()
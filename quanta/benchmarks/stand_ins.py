@@ -0,0 +1,293 @@
+# quanta/benchmarks/stand_ins.py
+#
+# In-process stand-ins for S3, Redis and the embedding model used by the
+# benchmarks and tests. They implement
+# only the calls our workers make, count requests/round trips, and can add a
+# fixed per-call latency to approximate a remote service.
+
+import io
+import time
+import bisect
+import hashlib
+import threading
+from collections import deque
+from datetime import datetime
+
+class _NoSuchKey(Exception):
+    pass
+
+class _Exceptions:
+    NoSuchKey = _NoSuchKey
+
+class _Paginator:
+    def __init__(self, s3):
+        self.s3 = s3
+
+    def paginate(self, **kwargs):
+        token = None
+        while True:
+            if token:
+                kwargs["ContinuationToken"] = token
+            page = self.s3.list_objects_v2(**kwargs)
+            yield page
+            if not page.get("IsTruncated"):
+                break
+            token = page["NextContinuationToken"]
+
+class LocalS3:
+    """
+    Sorted in-memory bucket store with list_objects_v2 semantics
+    (Prefix, StartAfter, Delimiter, 1000-key pages).
+    """
+    exceptions = _Exceptions
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.buckets = {}  # bucket -> (sorted keys, {key: (bytes, etag, modified)})
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def _count(self, name):
+        with self.lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _bucket(self, bucket):
+        return self.buckets.setdefault(bucket, ([], {}))
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self._count("put_object")
+        data = Body.encode() if isinstance(Body, str) else bytes(Body)
+        keys, objects = self._bucket(Bucket)
+        with self.lock:
+            if Key not in objects:
+                bisect.insort(keys, Key)
+            etag = '"%s"' % hashlib.md5(data).hexdigest()
+            objects[Key] = (data, etag, datetime.utcnow())
+        return {"ETag": etag}
+
+    def load(self, bucket, items):
+        # Bulk seed without counting requests
+        keys, objects = self._bucket(bucket)
+        now = datetime.utcnow()
+        for key, data in items:
+            data = data.encode() if isinstance(data, str) else data
+            objects[key] = (data, '"%s"' % hashlib.md5(data).hexdigest(), now)
+        keys[:] = sorted(objects)
+
+    def get_object(self, Bucket, Key, Range=None, **kwargs):
+        self._count("get_object")
+        _, objects = self._bucket(Bucket)
+        if Key not in objects:
+            raise _NoSuchKey(Key)
+        data, etag, modified = objects[Key]
+        if Range:
+            # "bytes=start-end", end inclusive
+            start, end = Range.split("=", 1)[1].split("-")
+            data = data[int(start):int(end) + 1]
+        return {"Body": io.BytesIO(data), "ETag": etag, "LastModified": modified}
+
+    def delete_object(self, Bucket, Key, **kwargs):
+        self._count("delete_object")
+        keys, objects = self._bucket(Bucket)
+        with self.lock:
+            if objects.pop(Key, None) is not None:
+                keys.remove(Key)
+
+    def get_paginator(self, name):
+        assert name == "list_objects_v2"
+        return _Paginator(self)
+
+    def list_objects_v2(self, Bucket, Prefix="", StartAfter=None, Delimiter=None,
+                        ContinuationToken=None, MaxKeys=1000, **kwargs):
+        self._count("list_objects_v2")
+        keys, objects = self._bucket(Bucket)
+        after = ContinuationToken or StartAfter or ""
+        i = bisect.bisect_right(keys, after) if after else bisect.bisect_left(keys, Prefix)
+        i = max(i, bisect.bisect_left(keys, Prefix))
+        contents, prefixes, last = [], [], None
+        while i < len(keys) and len(contents) + len(prefixes) < MaxKeys:
+            key = keys[i]
+            if not key.startswith(Prefix):
+                break
+            if Delimiter and Delimiter in key[len(Prefix):]:
+                common = key[:key.index(Delimiter, len(Prefix)) + 1]
+                prefixes.append({"Prefix": common})
+                last = common + "\uffff"  # skip past everything under this prefix
+                i = bisect.bisect_right(keys, last)
+                continue
+            data, etag, modified = objects[key]
+            contents.append({"Key": key, "ETag": etag, "Size": len(data), "LastModified": modified})
+            last = key
+            i += 1
+        truncated = i < len(keys) and keys[i].startswith(Prefix)
+        page = {"Contents": contents, "KeyCount": len(contents) + len(prefixes), "IsTruncated": truncated}
+        if prefixes:
+            page["CommonPrefixes"] = prefixes
+        if truncated:
+            page["NextContinuationToken"] = last
+        return page
+
+class _Pipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        self.redis._round_trip()
+        results = [getattr(self.redis, "_" + name)(*args, **kwargs) for name, args, kwargs in self.commands]
+        self.commands = []
+        return results
+
+class LocalRedis:
+    """
+    Minimal in-memory Redis (sets, lists, hashes, strings) that counts round trips.
+    """
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.round_trips = 0
+        self.data = {}
+
+    def _round_trip(self):
+        self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def pipeline(self, transaction=True):
+        return _Pipeline(self)
+
+    def __getattr__(self, name):
+        impl = getattr(type(self), "_" + name, None)
+        if impl is None:
+            raise AttributeError(name)
+        def call(*args, **kwargs):
+            self._round_trip()
+            return impl(self, *args, **kwargs)
+        return call
+
+    @staticmethod
+    def _b(value):
+        return value if isinstance(value, bytes) else str(value).encode()
+
+    def _set(self, key, value, **kwargs):
+        self.data[key] = self._b(value)
+        return True
+
+    def _get(self, key):
+        return self.data.get(key)
+
+    def _sismember(self, key, member):
+        return self._b(member) in self.data.get(key, set())
+
+    def _smismember(self, key, *members):
+        members = members[0] if len(members) == 1 and isinstance(members[0], list) else members
+        current = self.data.get(key, set())
+        return [int(self._b(m) in current) for m in members]
+
+    def _sadd(self, key, *members):
+        current = self.data.setdefault(key, set())
+        before = len(current)
+        current.update(self._b(m) for m in members)
+        return len(current) - before
+
+    def _lpush(self, key, *values):
+        current = self.data.setdefault(key, deque())
+        for value in values:
+            current.appendleft(self._b(value))
+        return len(current)
+
+    def _llen(self, key):
+        return len(self.data.get(key, []))
+
+    def _hset(self, key, field=None, value=None, mapping=None):
+        current = self.data.setdefault(key, {})
+        items = dict(mapping or {})
+        if field is not None:
+            items[field] = value
+        for f, v in items.items():
+            current[self._b(f)] = self._b(v)
+        return len(items)
+
+    def _hget(self, key, field):
+        return self.data.get(key, {}).get(self._b(field))
+
+    def _hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    def _hmget(self, key, *fields):
+        fields = fields[0] if len(fields) == 1 and isinstance(fields[0], list) else fields
+        current = self.data.get(key, {})
+        return [current.get(self._b(f)) for f in fields]
+
+    def _hdel(self, key, *fields):
+        current = self.data.get(key, {})
+        return sum(current.pop(self._b(f), None) is not None for f in fields)
+
+    def _hlen(self, key):
+        return len(self.data.get(key, {}))
+
+    def _zadd(self, key, mapping):
+        current = self.data.setdefault(key, {})
+        added = sum(self._b(m) not in current for m in mapping)
+        current.update({self._b(m): float(score) for m, score in mapping.items()})
+        return added
+
+    @staticmethod
+    def _in_range(score, low, high):
+        # Redis score bounds: "-inf"/"+inf", and "(" for an exclusive bound
+        def bound(value):
+            value = str(value)
+            return float(value.lstrip("(")), value.startswith("(")
+        (lo, lo_open), (hi, hi_open) = bound(low), bound(high)
+        return (score > lo if lo_open else score >= lo) and (score < hi if hi_open else score <= hi)
+
+    def _zremrangebyscore(self, key, low, high):
+        current = self.data.get(key, {})
+        doomed = [m for m, score in current.items() if self._in_range(score, low, high)]
+        for m in doomed:
+            del current[m]
+        return len(doomed)
+
+    def _zrangebyscore(self, key, low, high, withscores=False):
+        items = sorted((score, m) for m, score in self.data.get(key, {}).items()
+                       if self._in_range(score, low, high))
+        return [(m, score) for score, m in items] if withscores else [m for _, m in items]
+
+    def _zmscore(self, key, members):
+        current = self.data.get(key, {})
+        return [current.get(self._b(m)) for m in members]
+
+    def _publish(self, channel, message):
+        return 0
+
+class LocalEmbeddings:
+    """
+    Deterministic embedder: vectors derived from sha256 of the text. Counts
+    embedded texts and calls.
+    """
+    def __init__(self, size=8, latency=0.0):
+        self.size = size
+        self.latency = latency
+        self.calls = 0
+        self.texts = 0
+
+    def _vector(self, text):
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return [digest[i % len(digest)] / 255.0 for i in range(self.size)]
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        self.texts += len(texts)
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
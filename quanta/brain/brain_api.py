@@ -4,6 +4,7 @@ from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.responses import JSONResponse
 import json
 import logging
+from quanta.brain.supervisor_alerts import firing_alerts
 
 app = FastAPI(title="Quanta Brain API", version="1.0")
 
@@ -48,6 +49,15 @@ async def receive_insight(request: Request):
         logging.error(f"[INSIGHT] Error receiving insight: {e}")
         return JSONResponse(content={"status": "error", "message": str(e)}, status_code=status.HTTP_400_BAD_REQUEST)
 
+@app.get("/alerts/firing")
+def get_firing_alerts():
+    try:
+        alerts = firing_alerts()
+    except Exception as e:
+        logging.error(f"Error reading firing alerts: {str(e)}")
+        raise HTTPException(status_code=503, detail=f"Error reading firing alerts: {str(e)}")
+    return {"count": len(alerts), "alerts": list(alerts.values())}
+
 @app.get("/")
 def root():
     return {"status": "Quanta Brain API is live"}
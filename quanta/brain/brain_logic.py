@@ -1,9 +1,13 @@
 import os
-import boto3
 import json
 import time
+import socket
 import logging
+import threading
 import redis
+from botocore.exceptions import ClientError
+from quanta.brain.s3_fetch_pool import make_s3_client, fetch_json, process_keys
+from quanta.utils.heartbeat import get_redis, send_heartbeat
 
 logging.basicConfig(
     level=logging.INFO,
@@ -12,34 +16,42 @@ logging.basicConfig(
 
 REDIS_URL = os.getenv("REDIS_URL")
 
-def send_heartbeat(worker_name):
-    try:
-        r = redis.from_url(REDIS_URL)
-        r.set(f"health_{worker_name}", time.time())
-    except Exception as e:
-        logging.error(f"Heartbeat error for {worker_name}: {e}")
-
 INSIGHTS_BUCKET = os.getenv("S3_INSIGHTS_BUCKET", "quanta-insights")
 SIGNALS_BUCKET = os.getenv("S3_SIGNALS_BUCKET", "quanta-signals")
 AWS_REGION = os.getenv("AWS_DEFAULT_REGION", "us-east-2")
 INSIGHTS_PREFIX = "insights/"
 SIGNALS_PREFIX = "signals/"
 
-s3 = boto3.client(
-    "s3",
-    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-    region_name=AWS_REGION,
-)
+# "stream": consume new-insight events from ml_agent_worker via a Redis consumer
+# group, with a slower polling pass as a safety net; "poll": polling only.
+BRAIN_LOGIC_MODE = os.getenv("BRAIN_LOGIC_MODE", "stream")
+INSIGHT_STREAM = os.getenv("INSIGHT_STREAM_KEY", "quanta:insight_events")
+CONSUMER_GROUP = os.getenv("BRAIN_LOGIC_GROUP", "brain_logic")
+CONSUMER_NAME = os.getenv("BRAIN_LOGIC_CONSUMER", socket.gethostname())
+# Failed entries stay pending and are re-claimed after INSIGHT_CLAIM_IDLE_MS;
+# after INSIGHT_MAX_DELIVERIES attempts they move to the dead-letter stream
+INSIGHT_CLAIM_IDLE_MS = int(os.getenv("INSIGHT_CLAIM_IDLE_MS", "60000"))
+INSIGHT_MAX_DELIVERIES = int(os.getenv("INSIGHT_MAX_DELIVERIES", "5"))
+INSIGHT_DEAD_LETTER_STREAM = os.getenv("INSIGHT_DEAD_LETTER_STREAM", "quanta:insight_events:dead")
+CHECKPOINT_KEY = os.getenv("BRAIN_LOGIC_CHECKPOINT_KEY", "brain_logic_checkpoint")
+POLL_INTERVAL_SEC = int(os.getenv("BRAIN_LOGIC_POLL_SEC", "600" if BRAIN_LOGIC_MODE == "stream" else "120"))
+HEARTBEAT_SEC = 60
+
+s3 = make_s3_client()
+
+r = get_redis(REDIS_URL) if REDIS_URL else None
 
 def list_insight_keys():
-    keys = []
+    return [key for key, _ in list_insight_objects()]
+
+def list_insight_objects():
+    objects = []
     paginator = s3.get_paginator('list_objects_v2')
     for page in paginator.paginate(Bucket=INSIGHTS_BUCKET, Prefix=INSIGHTS_PREFIX):
         for obj in page.get('Contents', []):
             if obj['Key'].endswith('_merged.json'):  # only merged insights for now
-                keys.append(obj['Key'])
-    return keys
+                objects.append((obj['Key'], obj['LastModified'].timestamp()))
+    return objects
 
 def analyze_insight(insight):
     rf_pred = None
@@ -75,24 +87,163 @@ def save_signal(signal):
     )
     logging.info(f"Saved signal to {SIGNALS_BUCKET}/{key}")
 
+def signal_key_for(insight_key):
+    # insights/TICKER_DATE_merged.json -> signals/TICKER_DATE_signal.json
+    name = insight_key[len(INSIGHTS_PREFIX):-len("_merged.json")]
+    return f"{SIGNALS_PREFIX}{name}_signal.json"
+
+def signal_is_current(insight_key, insight_modified):
+    # True if the signal for this insight was written after the insight itself
+    try:
+        head = s3.head_object(Bucket=SIGNALS_BUCKET, Key=signal_key_for(insight_key))
+        return head["LastModified"].timestamp() >= insight_modified
+    except ClientError:
+        return False
+
+def process_insight(insight):
+    signal = analyze_insight(insight)
+    save_signal(signal)
+
+def process_insight_key(key):
+    process_insight(fetch_json(s3, INSIGHTS_BUCKET, key))
+
+def insight_ticker(key):
+    # insights/TICKER_DATE_merged.json -> TICKER; keeps a ticker's insights in order
+    return key[len(INSIGHTS_PREFIX):].split("_")[0]
+
+# --- Event-driven path ---
+
+def ensure_consumer_group():
+    try:
+        r.xgroup_create(INSIGHT_STREAM, CONSUMER_GROUP, id="0", mkstream=True)
+    except redis.exceptions.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+def handle_failed_entry(entry_id, key, error):
+    """
+    Leave a failed entry pending for retry, or move it to the dead-letter
+    stream once it has been delivered INSIGHT_MAX_DELIVERIES times.
+    """
+    pending = r.xpending_range(INSIGHT_STREAM, CONSUMER_GROUP, min=entry_id, max=entry_id, count=1)
+    deliveries = pending[0]["times_delivered"] if pending else 1
+    if deliveries < INSIGHT_MAX_DELIVERIES:
+        logging.error(f"Failed to process {key} from stream (delivery {deliveries}): {error}")
+        return
+    logging.error(f"Dead-lettering {key} after {deliveries} deliveries: {error}")
+    pipe = r.pipeline(transaction=True)
+    pipe.xadd(INSIGHT_DEAD_LETTER_STREAM, {"key": key, "entry_id": entry_id, "error": str(error)[:500]},
+              maxlen=10000, approximate=True)
+    pipe.xack(INSIGHT_STREAM, CONSUMER_GROUP, entry_id)
+    pipe.execute()
+
+def claim_idle_entries(cursor):
+    """
+    XAUTOCLAIM entries pending longer than INSIGHT_CLAIM_IDLE_MS (ours that
+    failed, or a dead consumer's). Returns (next cursor, entries).
+    """
+    try:
+        resp = r.xautoclaim(INSIGHT_STREAM, CONSUMER_GROUP, CONSUMER_NAME, INSIGHT_CLAIM_IDLE_MS,
+                            start_id=cursor, count=100)
+    except redis.exceptions.ResponseError:
+        return "0-0", []  # XAUTOCLAIM needs Redis 6.2+
+    return resp[0], [entry for entry in resp[1] if entry and entry[1]]
+
+def consume_insight_stream():
+    ensure_consumer_group()
+    logging.info(f"[BRAIN LOGIC] Consuming {INSIGHT_STREAM} as {CONSUMER_GROUP}/{CONSUMER_NAME}")
+    # Replay entries delivered to us before a restart but never acked. The
+    # cursor moves past each batch, so entries that fail again are left to
+    # the idle claim instead of being re-read in a loop.
+    replaying, pending_cursor = True, "0"
+    claim_cursor, last_claim = "0-0", time.time()
+    while True:
+        try:
+            entries = []
+            if replaying:
+                resp = r.xreadgroup(CONSUMER_GROUP, CONSUMER_NAME, {INSIGHT_STREAM: pending_cursor}, count=100)
+                entries = resp[0][1] if resp else []
+                if entries:
+                    pending_cursor = entries[-1][0]
+                else:
+                    replaying = False
+            if not entries and time.time() - last_claim >= INSIGHT_CLAIM_IDLE_MS / 1000:
+                claim_cursor, entries = claim_idle_entries(claim_cursor)
+                last_claim = time.time()
+            if not entries and not replaying:
+                resp = r.xreadgroup(CONSUMER_GROUP, CONSUMER_NAME, {INSIGHT_STREAM: ">"}, count=100, block=5000)
+                entries = resp[0][1] if resp else []
+            for entry_id, fields in entries:
+                key = fields.get(b"key", b"").decode()
+                try:
+                    process_insight_key(key)
+                    r.xack(INSIGHT_STREAM, CONSUMER_GROUP, entry_id)
+                except Exception as e:
+                    handle_failed_entry(entry_id, key, e)
+        except Exception as e:
+            logging.error(f"[BRAIN LOGIC] Stream consumer error: {e}")
+            time.sleep(2)
+
+# --- Polling fallback with a persistent checkpoint ---
+
+def load_checkpoint():
+    value = r.get(CHECKPOINT_KEY) if r else None
+    return float(value) if value else 0.0
+
+def save_checkpoint(value):
+    if r:
+        r.set(CHECKPOINT_KEY, value)
+
+def poll_insights():
+    """
+    Process merged insights modified at or after the stored checkpoint, then
+    advance it. The checkpoint never moves past a key that failed, so failures
+    are retried next pass; keys whose signal is already newer are skipped.
+    """
+    checkpoint = load_checkpoint()
+    candidates = sorted(
+        ((modified, key) for key, modified in list_insight_objects() if modified >= checkpoint)
+    )
+    modified_at = {key: modified for modified, key in candidates}
+
+    def fetch_if_stale(key):
+        if signal_is_current(key, modified_at[key]):
+            return None
+        return fetch_json(s3, INSIGHTS_BUCKET, key)
+
+    processed = []
+    def process(key, insight):
+        if insight is not None:
+            process_insight(insight)
+            processed.append(key)
+
+    done, failed = process_keys(
+        s3, INSIGHTS_BUCKET, [key for _, key in candidates], process,
+        group_by=insight_ticker, fetch=fetch_if_stale,
+    )
+    for key, error in failed.items():
+        logging.error(f"Failed to process {key}: {error}")
+    if failed:
+        new_checkpoint = min(modified_at[key] for key in failed)
+    else:
+        new_checkpoint = max([checkpoint] + [modified_at[key] for key in done])
+    save_checkpoint(new_checkpoint)
+    logging.info(f"[BRAIN LOGIC] Polling pass: {len(candidates)} candidates, {len(processed)} processed, {len(failed)} failed")
+
 def main():
-    logging.info("[BRAIN LOGIC] Starting brain logic worker.")
-    seen = set()
+    logging.info(f"[BRAIN LOGIC] Starting brain logic worker ({BRAIN_LOGIC_MODE} mode).")
+    if BRAIN_LOGIC_MODE == "stream" and r is not None:
+        threading.Thread(target=consume_insight_stream, daemon=True).start()
+    last_poll = 0.0
     while True:
         send_heartbeat("brain_logic_worker")
-        keys = list_insight_keys()
-        for key in keys:
-            if key in seen:
-                continue
+        if time.time() - last_poll >= POLL_INTERVAL_SEC:
             try:
-                obj = s3.get_object(Bucket=INSIGHTS_BUCKET, Key=key)
-                insight = json.loads(obj["Body"].read().decode())
-                signal = analyze_insight(insight)
-                save_signal(signal)
-                seen.add(key)
+                poll_insights()
             except Exception as e:
-                logging.error(f"Failed to process {key}: {e}")
-        time.sleep(120)  # Check every 2 min
+                logging.error(f"[BRAIN LOGIC] Polling pass failed: {e}")
+            last_poll = time.time()
+        time.sleep(min(HEARTBEAT_SEC, POLL_INTERVAL_SEC))
 
 if __name__ == "__main__":
     main()
@@ -1,10 +1,10 @@
 # health_supervisor.py
 
 import os
-import redis
 import time
 import boto3
-import json
+from quanta.utils.heartbeat import get_redis, check_workers
+from quanta.brain.supervisor_alerts import AlertStateMachine, AlertBatchWriter
 
 # --- Config ---
 REDIS_URL = os.getenv("REDIS_URL")
@@ -27,49 +27,28 @@ s3 = boto3.client(
     region_name=AWS_REGION,
 )
 
-def log_alert_to_s3(worker, last_heartbeat, now_ts):
-    alert = {
-        "worker": worker,
-        "last_heartbeat": last_heartbeat,
-        "detected_at": now_ts,
-        "alert_type": "heartbeat_missed",
-        "message": f"Worker '{worker}' missed heartbeat. Last was at {last_heartbeat}, now {now_ts}."
-    }
-    filename = f"alerts/{worker}_{now_ts}.json"
-    s3.put_object(
-        Bucket=S3_BUCKET,
-        Key=filename,
-        Body=json.dumps(alert)
-    )
-    print(f"[SUPERVISOR] Alert written to {S3_BUCKET}/{filename}")
-
 def main():
-    r = redis.from_url(REDIS_URL)
-    while True:
-        now_ts = int(time.time())
-        for worker in WORKERS:
-            key = f"health_{worker}"
-            last = r.get(key)
-            if last is None:
-                print(f"[SUPERVISOR] No heartbeat for {worker}.")
-                log_alert_to_s3(worker, None, now_ts)
-                continue
-            # Redis returns bytes; decode if needed
-            if isinstance(last, bytes):
-                last = last.decode()
-            try:
-                last = float(last)
-            except Exception as e:
-                print(f"[SUPERVISOR] Bad heartbeat value for {worker}: {last}. Error: {e}")
-                log_alert_to_s3(worker, last, now_ts)
-                continue
-            diff = now_ts - last
-            if diff > ALERT_THRESHOLD_SEC:
-                print(f"[SUPERVISOR] {worker} missed heartbeat by {diff} sec.")
-                log_alert_to_s3(worker, last, now_ts)
-            else:
-                print(f"[SUPERVISOR] {worker} is healthy. Last: {last}, Now: {now_ts}, Diff: {diff}")
-        time.sleep(60)  # Check every minute
+    r = get_redis(REDIS_URL)
+    alerts = AlertStateMachine(r=r)
+    writer = AlertBatchWriter(s3, S3_BUCKET)
+    try:
+        while True:
+            now_ts = int(time.time())
+            # One round trip: stale workers by score range, plus expected workers never seen
+            stale, missing = check_workers(WORKERS, ALERT_THRESHOLD_SEC, now=now_ts, r=r)
+            unhealthy = dict(stale, **{worker: None for worker in missing})
+            healthy = [worker for worker in WORKERS if worker not in unhealthy]
+            transitions = alerts.evaluate(unhealthy, now_ts)
+            for alert in transitions:
+                print(f"[SUPERVISOR] {alert['state'].upper()}: {alert['message']}")
+            writer.add(transitions)
+            key = writer.maybe_flush(now_ts)
+            if key:
+                print(f"[SUPERVISOR] Alerts written to {S3_BUCKET}/{key}")
+            print(f"[SUPERVISOR] {len(healthy)}/{len(WORKERS)} workers healthy at {now_ts}.")
+            time.sleep(60)  # Check every minute
+    finally:
+        writer.flush()
 
 if __name__ == "__main__":
     main()
@@ -1,10 +1,11 @@
 import os
-import boto3
 import json
 import time
 import logging
 import requests
-import redis
+from requests.adapters import HTTPAdapter
+from quanta.brain.s3_fetch_pool import S3_FETCH_WINDOW, make_s3_client, process_keys
+from quanta.utils.heartbeat import get_redis, send_heartbeat
 
 logging.basicConfig(
     level=logging.INFO,
@@ -13,58 +14,218 @@ logging.basicConfig(
 
 REDIS_URL = os.getenv("REDIS_URL")
 
-def send_heartbeat(worker_name):
-    try:
-        r = redis.from_url(REDIS_URL)
-        r.set(f"health_{worker_name}", time.time())
-    except Exception as e:
-        print(f"Heartbeat error for {worker_name}: {e}")
-
 S3_BUCKET = os.getenv("S3_INSIGHTS_BUCKET", "quanta-insights")
 INSIGHTS_PREFIX = "insights/"
 AWS_REGION = os.getenv("AWS_DEFAULT_REGION", "us-east-2")
 BRAIN_API_URL = os.getenv("BRAIN_API_URL", "https://quanta-realtime.onrender.com/ingest/insight")
+BRAIN_BATCH_URL = os.getenv("BRAIN_BATCH_URL", BRAIN_API_URL.rstrip("/") + "/batch")
+# Insights per POST to the batch endpoint; 1 posts each insight to BRAIN_API_URL
+INSIGHT_BATCH_SIZE = int(os.getenv("INSIGHT_BATCH_SIZE", "200"))
+BRAIN_HTTP_TIMEOUT_SEC = float(os.getenv("BRAIN_HTTP_TIMEOUT_SEC", "30"))
 
-s3 = boto3.client(
-    "s3",
-    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-    region_name=AWS_REGION,
-)
+# Delivery cursor: key -> ETag of the version the brain API accepted, plus a
+# retry book for failures. Only new or changed insights are posted each cycle.
+DELIVERED_KEY = os.getenv("INSIGHT_LOADER_DELIVERED_KEY", "insight_loader:delivered")
+FAILED_KEY = os.getenv("INSIGHT_LOADER_FAILED_KEY", "insight_loader:failed")
+RETRY_BASE_SEC = int(os.getenv("INSIGHT_LOADER_RETRY_BASE_SEC", "30"))
+RETRY_MAX_SEC = int(os.getenv("INSIGHT_LOADER_RETRY_MAX_SEC", "3600"))
+LOOKUP_BATCH_SIZE = 1000
+
+s3 = make_s3_client()
+r = get_redis(REDIS_URL)
+
+def make_http_session(pool_size=4):
+    """
+    Keep-alive session so every POST in a cycle reuses the same connection(s).
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+http = make_http_session()
+
+loader_stats = {"pending": 0, "delivered": 0, "failed": 0, "posted_last_cycle": 0, "requests_last_cycle": 0}
 
 def list_all_insight_keys():
-    keys = []
+    return [key for key, _ in list_all_insight_objects()]
+
+def list_all_insight_objects():
+    objects = []
     paginator = s3.get_paginator('list_objects_v2')
     for page in paginator.paginate(Bucket=S3_BUCKET, Prefix=INSIGHTS_PREFIX):
         for obj in page.get('Contents', []):
             if obj['Key'].endswith('.json'):
-                keys.append(obj['Key'])
-    return keys
+                objects.append((obj['Key'], obj['ETag']))
+    return objects
 
 def post_to_brain(insight):
     try:
-        resp = requests.post(BRAIN_API_URL, json=insight)
+        resp = http.post(BRAIN_API_URL, json=insight, timeout=BRAIN_HTTP_TIMEOUT_SEC)
         if resp.status_code == 200:
             logging.info(f"[BRAIN LOADER] Posted insight {insight.get('id')} to brain.")
-        else:
-            logging.warning(f"[BRAIN LOADER] Failed to POST insight {insight.get('id')} | Status {resp.status_code} | {resp.text}")
+            return True
+        logging.warning(f"[BRAIN LOADER] Failed to POST insight {insight.get('id')} | Status {resp.status_code} | {resp.text}")
     except Exception as e:
         logging.error(f"[BRAIN LOADER] Error posting to brain: {e}")
+    return False
+
+def post_batch_to_brain(items):
+    """
+    POST [(key, insight), ...] to the batch endpoint in one request.
+    Returns {key: None on success, else the error}.
+    """
+    keys = [key for key, _ in items]
+    try:
+        resp = http.post(BRAIN_BATCH_URL, json=[insight for _, insight in items], timeout=BRAIN_HTTP_TIMEOUT_SEC)
+        if resp.status_code != 200:
+            error = f"batch POST status {resp.status_code}: {resp.text[:200]}"
+            logging.warning(f"[BRAIN LOADER] Failed to POST batch of {len(items)} | {error}")
+            return {key: error for key in keys}
+        results = resp.json().get("results", [])
+    except Exception as e:
+        logging.error(f"[BRAIN LOADER] Error posting batch to brain: {e}")
+        return {key: e for key in keys}
+    if len(results) != len(keys):
+        error = f"batch response has {len(results)} results for {len(keys)} insights"
+        return {key: error for key in keys}
+    logging.info(f"[BRAIN LOADER] Posted batch of {len(items)} insights to brain.")
+    return {
+        key: None if result.get("status") == "success" else result.get("error", "rejected")
+        for key, result in zip(keys, results)
+    }
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+def lookup_cursor(keys):
+    """
+    Return ({key: delivered etag}, {key: failure record}) for keys, via
+    pipelined HMGETs in batches.
+    """
+    delivered, failures = {}, {}
+    for i in range(0, len(keys), LOOKUP_BATCH_SIZE):
+        batch = keys[i:i + LOOKUP_BATCH_SIZE]
+        pipe = r.pipeline(transaction=False)
+        pipe.hmget(DELIVERED_KEY, batch)
+        pipe.hmget(FAILED_KEY, batch)
+        delivered_etags, failure_records = pipe.execute()
+        for key, etag, record in zip(batch, delivered_etags, failure_records):
+            if etag is not None:
+                delivered[key] = _decode(etag)
+            if record is not None:
+                failures[key] = json.loads(record)
+    return delivered, failures
+
+def select_pending(objects, delivered, failures, now):
+    """
+    Split listed (key, etag) pairs into insights to post now and the number
+    still waiting out a retry backoff.
+    """
+    due, waiting = [], 0
+    for key, etag in objects:
+        if delivered.get(key) == etag:
+            continue
+        failure = failures.get(key)
+        if failure and failure.get("etag") == etag and failure["next_attempt_at"] > now:
+            waiting += 1
+            continue
+        due.append((key, etag))
+    return due, waiting
+
+def record_deliveries(done, failed, etags, failures, now):
+    pipe = r.pipeline(transaction=False)
+    if done:
+        pipe.hset(DELIVERED_KEY, mapping={key: etags[key] for key in done})
+        pipe.hdel(FAILED_KEY, *done)
+    for key, error in failed.items():
+        previous = failures.get(key)
+        attempts = previous["attempts"] + 1 if previous and previous.get("etag") == etags[key] else 1
+        delay = min(RETRY_MAX_SEC, RETRY_BASE_SEC * 2 ** (attempts - 1))
+        pipe.hset(FAILED_KEY, key, json.dumps({
+            "etag": etags[key],
+            "attempts": attempts,
+            "next_attempt_at": now + delay,
+            "error": str(error)[:500],
+        }))
+    pipe.hlen(DELIVERED_KEY)
+    pipe.hlen(FAILED_KEY)
+    results = pipe.execute()
+    return results[-2], results[-1]
+
+def deliver(keys):
+    """
+    Fetch keys and post them to the brain API in INSIGHT_BATCH_SIZE batches,
+    keeping key order (and so each ticker's order) across batches.
+    Returns (delivered keys, {failed key: error}, requests sent).
+    """
+    fetched = {}
+    _, failed = process_keys(
+        s3, S3_BUCKET, keys, lambda key, data: fetched.__setitem__(key, data), group_by=insight_ticker
+    )
+    ready = [(key, fetched[key]) for key in keys if key in fetched]
+    done, requests_sent = [], 0
+    if INSIGHT_BATCH_SIZE <= 1:
+        for key, insight in ready:
+            requests_sent += 1
+            if post_to_brain(insight):
+                done.append(key)
+            else:
+                failed[key] = RuntimeError(f"brain API rejected {key}")
+        return done, failed, requests_sent
+    for i in range(0, len(ready), INSIGHT_BATCH_SIZE):
+        requests_sent += 1
+        for key, error in post_batch_to_brain(ready[i:i + INSIGHT_BATCH_SIZE]).items():
+            if error is None:
+                done.append(key)
+            else:
+                failed[key] = error
+    return done, failed, requests_sent
+
+def insight_ticker(key):
+    # insights/TICKER_DATE_....json -> TICKER; a ticker's insights are posted in key order
+    return key[len(INSIGHTS_PREFIX):].split("_")[0]
 
 def load_and_post_all_insights():
-    keys = list_all_insight_keys()
-    logging.info(f"[BRAIN LOADER] Found {len(keys)} insight files in S3.")
-    for key in keys:
-        try:
-            obj = s3.get_object(Bucket=S3_BUCKET, Key=key)
-            data = json.loads(obj['Body'].read().decode())
-            post_to_brain(data)
-        except Exception as e:
-            logging.error(f"[BRAIN LOADER][ERROR] Failed to load/post {key}: {e}")
+    """
+    Post only insights that are new or changed since their last successful
+    delivery, retrying failures with exponential backoff.
+    """
+    objects = list_all_insight_objects()
+    now = time.time()
+    delivered, failures = lookup_cursor([key for key, _ in objects])
+    due, waiting = select_pending(objects, delivered, failures, now)
+    logging.info(f"[BRAIN LOADER] Found {len(objects)} insight files in S3; {len(due)} to post, {waiting} waiting to retry.")
+    etags = dict(due)
+    posted, failed_total, requests_sent = 0, 0, 0
+    delivered_count, failed_count = len(delivered), len(failures)
+    # Record progress per window so a crash mid-cycle does not repost delivered keys
+    for start in range(0, len(due), S3_FETCH_WINDOW):
+        window = [key for key, _ in due[start:start + S3_FETCH_WINDOW]]
+        done, failed, sent = deliver(window)
+        for key, error in failed.items():
+            logging.error(f"[BRAIN LOADER][ERROR] Failed to load/post {key}: {error}")
+        delivered_count, failed_count = record_deliveries(done, failed, etags, failures, now)
+        posted += len(done)
+        failed_total += len(failed)
+        requests_sent += sent
+    loader_stats.update({
+        "pending": failed_total + waiting,
+        "delivered": delivered_count,
+        "failed": failed_count,
+        "posted_last_cycle": posted,
+        "requests_last_cycle": requests_sent,
+    })
+    logging.info(f"[BRAIN LOADER] Cycle done: {loader_stats}")
+    return loader_stats
 
 if __name__ == "__main__":
     logging.info("[BRAIN LOADER] Starting loader loop.")
     while True:
-        send_heartbeat("insight_loader")
-        load_and_post_all_insights()
+        send_heartbeat("insight_loader", stats=loader_stats)
+        try:
+            load_and_post_all_insights()
+        except Exception as e:
+            logging.error(f"[BRAIN LOADER][ERROR] Load cycle failed: {e}")
         time.sleep(300)
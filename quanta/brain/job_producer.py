@@ -1,27 +1,32 @@
 import os 
-import redis
 import time
 import uuid
 import logging
 import json
 import boto3
+from quanta.utils.heartbeat import get_redis, send_heartbeat
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
 
 REDIS_URL = os.environ.get("REDIS_URL")
 
-def send_heartbeat(worker_name):
-    try:
-        r = redis.from_url(REDIS_URL)
-        r.set(f"health_{worker_name}", time.time())
-    except Exception as e:
-        print(f"Heartbeat error for {worker_name}: {e}")
-
 S3_BUCKET = os.getenv("S3_HIST_BUCKET", "quanta-historical-marketdata")
 S3_PREFIX = os.getenv("S3_POLYGON_PREFIX", "polygon/")
 AWS_REGION = os.getenv("AWS_DEFAULT_REGION", "us-east-2")
 REDIS_JOBS_KEY = os.getenv("REDIS_JOBS_KEY", "quanta_jobs")
 REDIS_SET_KEY = os.getenv("REDIS_SET_KEY", "quanta_jobs_submitted")
+REDIS_HWM_KEY = os.getenv("REDIS_HWM_KEY", "quanta_jobs_hwm")
+# "incremental" only lists keys past each ticker's persisted high-water mark;
+# "full" lists the whole prefix every cycle (the original behaviour).
+DISCOVERY_MODE = os.getenv("PRODUCER_DISCOVERY_MODE", "incremental")
+# Incremental mode still does a periodic full pass to pick up backfilled dates
+# that sort before a ticker's high-water mark.
+FULL_RESCAN_SEC = int(os.getenv("PRODUCER_FULL_RESCAN_SEC", "86400"))
+ENQUEUE_BATCH_SIZE = int(os.getenv("PRODUCER_ENQUEUE_BATCH_SIZE", "500"))
+# "lua": one EVALSHA per batch that dedupes and pushes atomically server-side;
+# "pipeline": one pipelined membership check plus one MULTI/EXEC push per batch.
+ENQUEUE_MODE = os.getenv("PRODUCER_ENQUEUE_MODE", "lua")
+SCAN_INTERVAL_SEC = int(os.getenv("PRODUCER_SCAN_INTERVAL_SEC", "60"))
 
 if not REDIS_URL:
     raise Exception("REDIS_URL not found in environment variables.")
@@ -32,7 +37,28 @@ s3 = boto3.client(
     aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
     region_name=AWS_REGION,
 )
-r = redis.from_url(REDIS_URL)
+r = get_redis(REDIS_URL)
+
+# KEYS[1] = submitted-job set, KEYS[2] = job list; ARGV = job_id, payload, job_id, payload, ...
+ENQUEUE_SCRIPT = """
+local pushed = 0
+for i = 1, #ARGV, 2 do
+    if redis.call('SADD', KEYS[1], ARGV[i]) == 1 then
+        redis.call('LPUSH', KEYS[2], ARGV[i + 1])
+        pushed = pushed + 1
+    end
+end
+return pushed
+"""
+enqueue_script = r.register_script(ENQUEUE_SCRIPT)
+
+# Running totals reported in the producer's log lines and heartbeat
+enqueue_stats = {
+    "enqueued_total": 0,
+    "last_cycle_enqueued": 0,
+    "last_cycle_seconds": 0.0,
+    "last_cycle_rate": 0.0,
+}
 
 def get_all_s3_keys(prefix=None):
     if prefix is None:
@@ -44,43 +70,150 @@ def get_all_s3_keys(prefix=None):
             keys.append(obj['Key'])
     return keys
 
+def list_ticker_prefixes():
+    prefixes = []
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=S3_BUCKET, Prefix=S3_PREFIX, Delimiter='/'):
+        for common in page.get('CommonPrefixes', []):
+            prefixes.append(common['Prefix'])
+    return prefixes
+
+def list_keys_after(prefix, start_after=None):
+    # S3 returns keys in lexicographic order, so DATE.json keys after the
+    # high-water mark are exactly the days added since the last scan
+    kwargs = {'Bucket': S3_BUCKET, 'Prefix': prefix}
+    if start_after:
+        kwargs['StartAfter'] = start_after
+    keys = []
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(**kwargs):
+        for obj in page.get('Contents', []):
+            keys.append(obj['Key'])
+    return keys
+
+def load_high_water_marks():
+    return {
+        (k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+        for k, v in r.hgetall(REDIS_HWM_KEY).items()
+    }
+
+def save_high_water_marks(marks):
+    if marks:
+        r.hset(REDIS_HWM_KEY, mapping=marks)
+
+def discover_new_keys(high_water_marks):
+    """
+    List only keys past each ticker prefix's high-water mark.
+    Returns (keys, updated marks for the prefixes that advanced).
+    """
+    keys, advanced = [], {}
+    for prefix in list_ticker_prefixes():
+        new_keys = list_keys_after(prefix, high_water_marks.get(prefix))
+        if new_keys:
+            keys.extend(new_keys)
+            advanced[prefix] = new_keys[-1]
+    return keys, advanced
+
+def parse_job_key(key):
+    parts = key.split("/")
+    if len(parts) != 3:  # polygon/TICKER/DATE.json
+        return None
+    _, ticker, file = parts
+    if not file.endswith('.json'):
+        return None
+    date = file.replace('.json', '')
+    return f"{ticker}_{date}", ticker, date
+
 def already_queued(job_id):
     return r.sismember(REDIS_SET_KEY, job_id)
 
 def mark_queued(job_id):
     r.sadd(REDIS_SET_KEY, job_id)
 
-def main():
-    logging.info("Job Producer is running and connected to Redis...")
-    while True:
-        send_heartbeat("job_producer")
+def already_queued_many(job_ids):
+    pipe = r.pipeline(transaction=False)
+    for job_id in job_ids:
+        pipe.sismember(REDIS_SET_KEY, job_id)
+    return pipe.execute()
+
+def build_job(ticker, date):
+    return {
+        "id": str(uuid.uuid4()),
+        "ticker": ticker,
+        "date": date,
+        "task": "analyze_data"
+    }
+
+def _enqueue_batch_lua(batch):
+    args = []
+    for job_id, ticker, date in batch:
+        args.extend([job_id, json.dumps(build_job(ticker, date))])
+    return int(enqueue_script(keys=[REDIS_SET_KEY, REDIS_JOBS_KEY], args=args, client=r))
+
+def _enqueue_batch_pipeline(batch):
+    queued = already_queued_many([job_id for job_id, _, _ in batch])
+    new_jobs = [job for job, is_queued in zip(batch, queued) if not is_queued]
+    if not new_jobs:
+        return 0
+    pipe = r.pipeline(transaction=True)
+    for job_id, ticker, date in new_jobs:
+        pipe.lpush(REDIS_JOBS_KEY, json.dumps(build_job(ticker, date)))
+    pipe.sadd(REDIS_SET_KEY, *[job_id for job_id, _, _ in new_jobs])
+    pipe.execute()
+    return len(new_jobs)
+
+def enqueue_jobs(parsed_jobs, batch_size=None):
+    """
+    Bulk enqueue (job_id, ticker, date) tuples, skipping ids already submitted.
+    Each batch costs one Redis round trip in lua mode, two in pipeline mode.
+    Returns the number of jobs pushed.
+    """
+    batch_size = batch_size or ENQUEUE_BATCH_SIZE
+    enqueue_batch = _enqueue_batch_lua if ENQUEUE_MODE == "lua" else _enqueue_batch_pipeline
+    started = time.time()
+    enqueued = 0
+    for i in range(0, len(parsed_jobs), batch_size):
+        enqueued += enqueue_batch(parsed_jobs[i:i + batch_size])
+    elapsed = time.time() - started
+    enqueue_stats["enqueued_total"] += enqueued
+    enqueue_stats["last_cycle_enqueued"] = enqueued
+    enqueue_stats["last_cycle_seconds"] = round(elapsed, 3)
+    enqueue_stats["last_cycle_rate"] = round(enqueued / elapsed, 1) if enqueued and elapsed > 0 else 0.0
+    return enqueued
+
+def run_cycle(full_scan=False):
+    if full_scan:
         keys = get_all_s3_keys()
-        logging.info(f"Found {len(keys)} files in S3 under {S3_PREFIX}")
+        advanced = {}
         for key in keys:
-            try:
-                parts = key.split("/")
-                if len(parts) != 3:  # polygon/TICKER/DATE.json
-                    continue
-                _, ticker, file = parts
-                if not file.endswith('.json'):
-                    continue
-                date = file.replace('.json','')
-                job_id = f"{ticker}_{date}"
-                if already_queued(job_id):
-                    logging.debug(f"[PRODUCER] Skipped already-queued job: {job_id}")
-                    continue  # skip jobs already pushed
-                job = {
-                    "id": str(uuid.uuid4()),
-                    "ticker": ticker,
-                    "date": date,
-                    "task": "analyze_data"
-                }
-                r.lpush(REDIS_JOBS_KEY, json.dumps(job))
-                mark_queued(job_id)
-                logging.info(f"[PRODUCER] Enqueued job for {ticker} {date} | id={job['id']}")
-            except Exception as e:
-                logging.error(f"[PRODUCER] Error enqueuing job for {key}: {e}")
-        time.sleep(60)  # Scan S3 every 1 minute for new files
+            prefix = key.rsplit("/", 1)[0] + "/"
+            advanced[prefix] = max(advanced.get(prefix, ""), key)
+    else:
+        keys, advanced = discover_new_keys(load_high_water_marks())
+    parsed_jobs = [job for job in map(parse_job_key, keys) if job]
+    enqueued = enqueue_jobs(parsed_jobs)
+    # Only advance marks once every job up to them has been enqueued
+    save_high_water_marks(advanced)
+    logging.info(
+        f"[PRODUCER] {'Full' if full_scan else 'Incremental'} scan: {len(keys)} keys examined, "
+        f"{enqueued} jobs enqueued in {enqueue_stats['last_cycle_seconds']}s "
+        f"({enqueue_stats['last_cycle_rate']} jobs/s, {enqueue_stats['enqueued_total']} total)"
+    )
+    return enqueued
+
+def main():
+    logging.info(f"Job Producer is running and connected to Redis ({DISCOVERY_MODE} discovery)...")
+    last_full_scan = 0.0
+    while True:
+        send_heartbeat("job_producer", stats=enqueue_stats)
+        full_scan = DISCOVERY_MODE == "full" or time.time() - last_full_scan >= FULL_RESCAN_SEC
+        try:
+            run_cycle(full_scan=full_scan)
+            if full_scan:
+                last_full_scan = time.time()
+        except Exception as e:
+            logging.error(f"[PRODUCER] Scan failed: {e}")
+        time.sleep(SCAN_INTERVAL_SEC)  # Scan S3 every minute for new files
 
 if __name__ == "__main__":
     main()
@@ -1,10 +1,11 @@
 import os
+import math
 import time
-import redis
 import json
 import boto3
 import logging
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.datasets import make_classification
@@ -16,27 +17,37 @@ logging.basicConfig(
 
 REDIS_URL = os.getenv("REDIS_URL")
 
-def send_heartbeat(worker_name):
-    try:
-        r = redis.from_url(REDIS_URL)
-        r.set(f"health_{worker_name}", time.time())
-    except Exception as e:
-        print(f"Heartbeat error for {worker_name}: {e}")
-
 S3_BUCKET = os.getenv("S3_INSIGHTS_BUCKET", "quanta-insights")
 AWS_REGION = os.getenv("AWS_DEFAULT_REGION", "us-east-2")
 HIST_BUCKET = os.getenv("S3_HIST_BUCKET", "quanta-historical-marketdata")
+REDIS_JOBS_KEY = os.getenv("REDIS_JOBS_KEY", "quanta_jobs")
+
+# Micro-batching: drain up to ML_BATCH_SIZE jobs, waiting at most ML_BATCH_WAIT_MS
+# after the first one arrives. A batch size of 1 processes jobs one at a time.
+ML_BATCH_SIZE = int(os.getenv("ML_BATCH_SIZE", "1"))
+ML_BATCH_WAIT_MS = int(os.getenv("ML_BATCH_WAIT_MS", "200"))
+ML_IO_WORKERS = int(os.getenv("ML_IO_WORKERS", "8"))
+CACHE_STATS_SEC = int(os.getenv("ML_CACHE_STATS_SEC", "300"))
+INSIGHT_STREAM = os.getenv("INSIGHT_STREAM_KEY", "quanta:insight_events")
+INSIGHT_STREAM_MAXLEN = int(os.getenv("INSIGHT_STREAM_MAXLEN", "100000"))
 
-from quanta.ingest.polygon_data_loader import load_bars
+s3 = boto3.client(
+    "s3",
+    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+    region_name=AWS_REGION,
+)
+io_pool = ThreadPoolExecutor(max_workers=ML_IO_WORKERS)
+
+from quanta.ingest import bar_store
+from quanta.ingest.polygon_data_loader import load_bars, load_bar_array
+from quanta.ingest.bar_cache import log_cache_stats
+from quanta.brain.model_store import store_model_version, latest_model_version
+from quanta.brain.model_registry import ModelRegistry
+from quanta.utils.heartbeat import get_redis, send_heartbeat
 
 def upload_insight_to_s3(result_dict, ticker, date):
     try:
-        s3 = boto3.client(
-            "s3",
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            region_name=AWS_REGION,
-        )
         s3_key = f"insights/{ticker}_{date}_merged.json"
         s3.put_object(Bucket=S3_BUCKET, Key=s3_key, Body=json.dumps(result_dict))
         for model_name, model_data in result_dict['models'].items():
@@ -51,82 +62,220 @@ def upload_insight_to_s3(result_dict, ticker, date):
             }
             s3.put_object(Bucket=S3_BUCKET, Key=indiv_key, Body=json.dumps(model_record))
         logging.info(f"[ML AGENT] Uploaded merged and per-model insights to S3 for {ticker} {date}")
+        return s3_key
     except Exception as e:
         logging.error(f"[ML AGENT][ERROR] Failed to upload insight(s) to S3: {e}")
+        return None
 
-def multi_model_predict(features):
+def publish_insight_events(r, events):
+    # Notify brain_logic of new merged insights; one pipelined XADD per batch
+    if not events:
+        return
+    try:
+        pipe = r.pipeline(transaction=False)
+        for s3_key, ticker, date in events:
+            pipe.xadd(INSIGHT_STREAM, {"key": s3_key, "ticker": ticker, "date": date},
+                      maxlen=INSIGHT_STREAM_MAXLEN, approximate=True)
+        pipe.execute()
+    except Exception as e:
+        logging.error(f"[ML AGENT][ERROR] Failed to publish insight events: {e}")
+
+MODEL_NAMES = ["RandomForest", "LogisticRegression", "GradientBoosting"]
+MODEL_REFRESH_SEC = int(os.getenv("ML_MODEL_REFRESH_SEC", "60"))
+
+registry = ModelRegistry(MODEL_NAMES, refresh_interval=MODEL_REFRESH_SEC)
+
+def bootstrap_models():
+    # Fit and store the baseline models once, only for names with no stored version yet
+    factories = {
+        "RandomForest": RandomForestClassifier,
+        "LogisticRegression": LogisticRegression,
+        "GradientBoosting": GradientBoostingClassifier,
+    }
+    missing = [name for name in MODEL_NAMES if latest_model_version(name) is None]
+    if not missing:
+        return
     X, y = make_classification(n_samples=100, n_features=4, n_classes=2, random_state=42)
-    results = {}
-
-    # Random Forest
-    rf = RandomForestClassifier()
-    rf.fit(X, y)
-    rf_pred = int(rf.predict([features])[0])
-    rf_proba = rf.predict_proba([features])[0].tolist()
-    results['RandomForest'] = {'prediction': rf_pred, 'probabilities': rf_proba, 'version': '1.0'}
-
-    # Logistic Regression
-    lr = LogisticRegression()
-    lr.fit(X, y)
-    lr_pred = int(lr.predict([features])[0])
-    lr_proba = lr.predict_proba([features])[0].tolist()
-    results['LogisticRegression'] = {'prediction': lr_pred, 'probabilities': lr_proba, 'version': '1.0'}
-
-    # Gradient Boosting
-    gb = GradientBoostingClassifier()
-    gb.fit(X, y)
-    gb_pred = int(gb.predict([features])[0])
-    gb_proba = gb.predict_proba([features])[0].tolist()
-    results['GradientBoosting'] = {'prediction': gb_pred, 'probabilities': gb_proba, 'version': '1.0'}
+    for name in missing:
+        model = factories[name]()
+        model.fit(X, y)
+        store_model_version(model, meta={"version": "1.0"}, name=name)
+        logging.info(f"[ML AGENT] Bootstrapped baseline {name} model.")
 
+def load_models():
+    bootstrap_models()
+    registry.load()
+
+def multi_model_predict_batch(feature_rows):
+    """
+    Run every model once over a feature matrix and fan the rows back out,
+    returning one {model_name: result} dict per input row.
+    """
+    if not registry.models:
+        load_models()
+    X = np.asarray(feature_rows, dtype=float)
+    results = [{} for _ in range(len(X))]
+    for name, output in registry.predict_all(X).items():
+        for i, row_results in enumerate(results):
+            row_results[name] = {
+                'prediction': int(output['predictions'][i]),
+                'probabilities': output['probabilities'][i].tolist(),
+                'version': output['version']
+            }
     return results
 
+def multi_model_predict(features):
+    return multi_model_predict_batch([features])[0]
+
+FEATURE_COLUMNS = ["open", "high", "low", "close"]
+
+def features_from_bars(bars):
+    """
+    Features from a typed bar array (columnar store) or a list of bar dicts (legacy JSON).
+    """
+    if bars is None or len(bars) < 4:
+        return None
+    first_bar = bars[0]
+    if isinstance(bars, np.ndarray):
+        features = [float(first_bar[name]) for name in FEATURE_COLUMNS]
+    else:
+        features = [first_bar.get(name, 0) for name in FEATURE_COLUMNS]
+    # Missing (None) or non-finite prices would turn into NaN in the model matrix
+    try:
+        if all(math.isfinite(float(value)) for value in features):
+            return features
+    except (TypeError, ValueError):
+        pass
+    return None
+
+def predict_rows(feature_rows):
+    """
+    One batched prediction; if that fails, each row on its own so one bad row
+    does not lose the whole batch. Rows that still fail come back as None.
+    """
+    try:
+        return multi_model_predict_batch(feature_rows)
+    except Exception as e:
+        logging.error(f"[ML AGENT][ERROR] Batched prediction failed, retrying row by row: {e}")
+    results = []
+    for features in feature_rows:
+        try:
+            results.append(multi_model_predict(features))
+        except Exception as e:
+            logging.error(f"[ML AGENT][ERROR] Prediction failed for features {features}: {e}")
+            results.append(None)
+    return results
+
+def decode_job(raw_job):
+    try:
+        job_data = json.loads(raw_job)
+    except Exception as e:
+        logging.error(f"[ML AGENT][ERROR] Failed to decode job {raw_job!r}: {e}")
+        return None
+    if job_data.get("ticker") is None or job_data.get("date") is None:
+        logging.error(f"[ML AGENT][ERROR] Missing ticker or date in job_data: {job_data}")
+        return None
+    return job_data
+
+def drain_jobs(r, max_jobs, wait_ms):
+    """
+    Block for the first job, then keep popping until max_jobs are collected
+    or wait_ms has elapsed since the first one arrived.
+    """
+    job = r.brpop(REDIS_JOBS_KEY, timeout=5)
+    if not job:
+        return []
+    raw_jobs = [job[1]]
+    deadline = time.time() + wait_ms / 1000.0
+    while len(raw_jobs) < max_jobs:
+        more = r.rpop(REDIS_JOBS_KEY, max_jobs - len(raw_jobs))
+        if more:
+            raw_jobs.extend(more)
+            continue
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            break
+        job = r.brpop(REDIS_JOBS_KEY, timeout=remaining)
+        if not job:
+            break
+        raw_jobs.append(job[1])
+    return raw_jobs
+
+def load_job_bars(job_data):
+    # Columnar days come back as a typed array with only the feature columns,
+    # never rebuilt into per-bar dicts; days not migrated yet fall back to JSON
+    if bar_store.BAR_FORMAT != "json":
+        arr = load_bar_array(job_data["ticker"], job_data["date"], columns=FEATURE_COLUMNS)
+        if arr is not None:
+            return arr
+    return load_bars(job_data["ticker"], job_data["date"])
+
+def process_batch(raw_jobs, r=None):
+    jobs = [job_data for job_data in map(decode_job, raw_jobs) if job_data]
+    if not jobs:
+        return 0
+
+    # Bars for every job are fetched concurrently, then featurized in one pass
+    ready_jobs, feature_rows = [], []
+    for job_data, bars in zip(jobs, io_pool.map(load_job_bars, jobs)):
+        logging.info(f"[ML AGENT] Loaded {len(bars)} bars for {job_data['ticker']} {job_data['date']}")
+        features = features_from_bars(bars)
+        if features is None:
+            logging.warning(f"[ML AGENT] Not enough usable data for features: {job_data.get('id')}")
+            continue
+        ready_jobs.append(job_data)
+        feature_rows.append(features)
+    if not ready_jobs:
+        return 0
+
+    predicted = [(job_data, features, model_results)
+                 for job_data, features, model_results in zip(ready_jobs, feature_rows, predict_rows(feature_rows))
+                 if model_results is not None]
+    ready_jobs = [job_data for job_data, _, _ in predicted]
+    now = time.time()
+    uploads = []
+    for job_data, features, model_results in predicted:
+        result_dict = {
+            "id": job_data.get("id"),
+            "timestamp": now,
+            "raw_job": job_data,
+            "features": features,
+            "models": model_results
+        }
+        uploads.append(io_pool.submit(upload_insight_to_s3, result_dict, job_data["ticker"], job_data["date"]))
+    events = []
+    for future, job_data in zip(uploads, ready_jobs):
+        s3_key = future.result()
+        if s3_key:
+            events.append((s3_key, job_data["ticker"], job_data["date"]))
+        logging.info(f"[ML AGENT] Processed job: {job_data.get('id')}")
+    if r is not None:
+        publish_insight_events(r, events)
+    return len(ready_jobs)
+
 def main():
-    r = redis.from_url(REDIS_URL)
-    logging.info("[ML AGENT] Worker is running and connected to Redis...")
+    r = get_redis(REDIS_URL)
+    load_models()
+    logging.info(f"[ML AGENT] Worker is running and connected to Redis (batch size {ML_BATCH_SIZE})...")
+    last_stats = time.time()
     while True:
         send_heartbeat("ml_agent_worker")
-        job = r.brpop("quanta_jobs", timeout=5)
-        if job:
-            try:
-                logging.info(f"[ML AGENT][DEBUG] Raw job from Redis: {job}")
-                job_data = json.loads(job[1])
-                logging.info(f"[ML AGENT][DEBUG] Decoded job_data: {job_data}")
-
-                ticker = job_data.get("ticker")
-                date = job_data.get("date")
-                if ticker is None or date is None:
-                    logging.error(f"[ML AGENT][ERROR] Missing ticker or date in job_data: {job_data}")
-                    continue
-
-                bars = load_bars(ticker, date)
-                logging.info(f"[ML AGENT] Loaded bars: {bars[:3]} (total: {len(bars)})")
-                if not bars or len(bars) < 4:
-                    logging.warning("[ML AGENT] Not enough data for features.")
-                    continue
-
-                first_bar = bars[0]
-                features = [
-                    first_bar.get("open", 0),
-                    first_bar.get("high", 0),
-                    first_bar.get("low", 0),
-                    first_bar.get("close", 0)
-                ]
-
-                model_results = multi_model_predict(features)
-                result_dict = {
-                    "id": job_data.get("id"),
-                    "timestamp": time.time(),
-                    "raw_job": job_data,
-                    "features": features,
-                    "models": model_results
-                }
-
-                upload_insight_to_s3(result_dict, ticker, date)
-                logging.info(f"[ML AGENT] Processed job: {job_data.get('id')}")
-
-            except Exception as e:
-                logging.error(f"[ML AGENT][ERROR] Failed to process job: {e}")
+        if time.time() - last_stats >= CACHE_STATS_SEC:
+            log_cache_stats("[ML AGENT][BAR CACHE]")
+            last_stats = time.time()
+        swapped = registry.refresh()
+        if swapped:
+            logging.info(f"[ML AGENT] Hot-swapped model versions: {swapped}")
+        try:
+            raw_jobs = drain_jobs(r, ML_BATCH_SIZE, ML_BATCH_WAIT_MS)
+            if not raw_jobs:
+                continue
+            started = time.time()
+            processed = process_batch(raw_jobs, r)
+            if len(raw_jobs) > 1:
+                logging.info(f"[ML AGENT] Batch of {len(raw_jobs)} jobs ({processed} processed) in {time.time() - started:.2f}s")
+        except Exception as e:
+            logging.error(f"[ML AGENT][ERROR] Failed to process job batch: {e}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,86 @@
+"""
+Model Registry: Keeps pre-fitted model versions in memory and hot-swaps newer ones.
+"""
+import time
+import logging
+import threading
+from quanta.brain.model_store import latest_model_version, load_model_version
+
+class ModelRegistry:
+    def __init__(self, names, refresh_interval=60):
+        self.names = list(names)
+        self.refresh_interval = refresh_interval
+        self.models = {}  # name -> (model, meta, version)
+        self.lock = threading.Lock()
+        self.last_refresh = 0.0
+
+    def load(self):
+        """
+        Load the latest stored version of every registered model.
+        """
+        for name in self.names:
+            self._load(name)
+        self.last_refresh = time.time()
+        missing = [name for name in self.names if name not in self.models]
+        if missing:
+            logging.warning(f"[MODEL REGISTRY] No stored version for: {missing}")
+
+    def refresh(self, force=False):
+        """
+        Swap in any model whose newest stored version differs from the one in memory.
+        Cheap enough to call every loop; only checks the store every refresh_interval.
+        """
+        if not force and time.time() - self.last_refresh < self.refresh_interval:
+            return []
+        self.last_refresh = time.time()
+        swapped = []
+        for name in self.names:
+            latest = latest_model_version(name)
+            current = self.models.get(name)
+            if latest and (current is None or current[2] != latest):
+                if self._load(name, latest):
+                    swapped.append(name)
+        return swapped
+
+    def _load(self, name, version=None):
+        try:
+            record = load_model_version(name, version)
+        except Exception as e:
+            logging.error(f"[MODEL REGISTRY] Failed to load {name} version {version}: {e}")
+            return False
+        if record is None:
+            return False
+        with self.lock:
+            self.models[name] = record
+        logging.info(f"[MODEL REGISTRY] Loaded {name} version {record[2]}")
+        return True
+
+    def get(self, name):
+        with self.lock:
+            return self.models.get(name)
+
+    def predict_proba(self, name, X):
+        entry = self.get(name)
+        if entry is None:
+            raise KeyError(f"Model '{name}' is not loaded")
+        return entry[0].predict_proba(X)
+
+    def predict_all(self, X):
+        """
+        Run every loaded model on feature matrix X.
+        Returns {name: {"predictions", "probabilities", "version"}} with one row per
+        sample; version is the registry version id that was loaded.
+        """
+        results = {}
+        for name in self.names:
+            entry = self.get(name)
+            if entry is None:
+                continue
+            model, _, version = entry
+            proba = model.predict_proba(X)
+            results[name] = {
+                "predictions": model.classes_[proba.argmax(axis=1)],
+                "probabilities": proba,
+                "version": version,
+            }
+        return results
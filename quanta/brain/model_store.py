@@ -3,16 +3,71 @@ Model Store: Handles saving, loading, and versioning of ML models.
 """
 import os
 import pickle
+import threading
 from datetime import datetime
 
-def store_model_version(model, meta=None):
+MODEL_DIR = os.getenv("QUANTA_MODEL_DIR", "model_versions")
+
+def store_model_version(model, meta=None, name="model"):
     """
     Store model and associated metadata with versioning.
+    Returns the path of the stored version.
     """
-    dir_path = "model_versions"
+    dir_path = MODEL_DIR
     os.makedirs(dir_path, exist_ok=True)
-    timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
-    path = os.path.join(dir_path, f"model_{timestamp}.pkl")
-    with open(path, "wb") as f:
+    # Write to a temp file and link it into place so readers never see a
+    # half-written pickle
+    tmp_path = os.path.join(dir_path, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, "wb") as f:
         pickle.dump({"model": model, "meta": meta}, f)
+    try:
+        while True:
+            # Microseconds keep ids unique (and sortable) within a second;
+            # link() fails rather than overwrite a version stored at the same instant
+            timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%fZ")
+            path = os.path.join(dir_path, f"{name}_{timestamp}.pkl")
+            try:
+                os.link(tmp_path, path)
+                break
+            except FileExistsError:
+                continue
+    finally:
+        os.remove(tmp_path)
     print(f"[MODEL STORE] Stored model version at {path}")
+    return path
+
+def list_model_versions(name="model"):
+    """
+    List stored version ids for a model name, oldest first.
+    """
+    if not os.path.isdir(MODEL_DIR):
+        return []
+    prefix = f"{name}_"
+    versions = []
+    for filename in os.listdir(MODEL_DIR):
+        if filename.startswith(prefix) and filename.endswith(".pkl"):
+            version = filename[len(prefix):-len(".pkl")]
+            if "_" not in version:  # skip other models sharing the prefix
+                versions.append(version)
+    return sorted(versions)
+
+def latest_model_version(name="model"):
+    """
+    Return the newest version id for a model name, or None if none stored.
+    """
+    versions = list_model_versions(name)
+    return versions[-1] if versions else None
+
+def load_model_version(name="model", version=None):
+    """
+    Load a stored model version (latest if version is None).
+    Returns (model, meta, version) or None if nothing is stored.
+    """
+    if version is None:
+        version = latest_model_version(name)
+        if version is None:
+            return None
+    path = os.path.join(MODEL_DIR, f"{name}_{version}.pkl")
+    with open(path, "rb") as f:
+        record = pickle.load(f)
+    return record["model"], record.get("meta"), version
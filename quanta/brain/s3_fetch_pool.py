@@ -0,0 +1,76 @@
+"""
+S3 Fetch Pool: Bounded-concurrency fetch, decode and processing of S3 keys,
+shared by the brain workers (brain_logic, insight_loader).
+"""
+import os
+import json
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.config import Config
+
+S3_FETCH_WORKERS = int(os.getenv("S3_FETCH_WORKERS", "16"))
+# Keys are handled in windows so at most this many decoded objects are held at once
+S3_FETCH_WINDOW = int(os.getenv("S3_FETCH_WINDOW", "1000"))
+
+def make_s3_client(max_workers=S3_FETCH_WORKERS):
+    """
+    S3 client whose connection pool is sized for max_workers concurrent requests.
+    """
+    return boto3.client(
+        "s3",
+        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+        region_name=os.getenv("AWS_DEFAULT_REGION", "us-east-2"),
+        config=Config(
+            max_pool_connections=max_workers,
+            retries={"max_attempts": 5, "mode": "adaptive"},
+        ),
+    )
+
+def fetch_json(s3, bucket, key):
+    obj = s3.get_object(Bucket=bucket, Key=key)
+    return json.loads(obj["Body"].read().decode())
+
+def process_keys(s3, bucket, keys, process, group_by=None, fetch=None, max_workers=S3_FETCH_WORKERS):
+    """
+    Fetch and decode keys concurrently, calling process(key, data) for each.
+
+    Keys that map to the same group_by(key) value are processed one at a time
+    in their original order (their fetches still overlap); different groups
+    are processed in parallel. fetch(key) overrides the default JSON fetch.
+
+    Returns (processed keys, {failed key: exception}).
+    """
+    fetch = fetch or (lambda key: fetch_json(s3, bucket, key))
+    done, failed = [], {}
+    with ThreadPoolExecutor(max_workers=max_workers) as fetch_pool, \
+            ThreadPoolExecutor(max_workers=max_workers) as process_pool:
+        for start in range(0, len(keys), S3_FETCH_WINDOW):
+            window = keys[start:start + S3_FETCH_WINDOW]
+            fetches = {key: fetch_pool.submit(fetch, key) for key in window}
+            groups = OrderedDict()
+            for key in window:
+                groups.setdefault(group_by(key) if group_by else key, []).append(key)
+
+            def run_group(group_keys):
+                results = []
+                for key in group_keys:
+                    try:
+                        process(key, fetches[key].result())
+                        results.append((key, None))
+                    except Exception as e:
+                        results.append((key, e))
+                return results
+
+            for results in process_pool.map(run_group, groups.values()):
+                for key, error in results:
+                    if error is None:
+                        done.append(key)
+                    else:
+                        failed[key] = error
+    if failed:
+        logging.warning(f"[S3 FETCH POOL] {len(failed)} of {len(keys)} keys failed")
+    return done, failed
@@ -3,17 +3,10 @@ import boto3
 import json
 import pandas as pd
 from datetime import datetime
-import redis
 import time
-
-REDIS_URL = os.getenv("REDIS_URL")
-
-def send_heartbeat(worker_name):
-    try:
-        r = redis.from_url(REDIS_URL)
-        r.set(f"health_{worker_name}", time.time())
-    except Exception as e:
-        print(f"Heartbeat error for {worker_name}: {e}")
+from quanta.ingest import bar_store
+from quanta.ingest.bar_cache import get_bar_cache, log_cache_stats
+from quanta.utils.heartbeat import send_heartbeat
 
 # --- ENV ---
 S3_BUCKET = "quanta-historical-marketdata"
@@ -43,22 +36,46 @@ def get_s3_keys(bucket, prefix):
     return keys
 
 def load_json_from_s3(bucket, key):
-    obj = s3.get_object(Bucket=bucket, Key=key)
-    return json.loads(obj['Body'].read())
+    data = get_bar_cache().get(bucket, key, decode=json.loads)
+    if data is None:
+        raise FileNotFoundError(f"s3://{bucket}/{key}")
+    return data
 
 def analyze_and_train(ticker, data):
     # Dummy ML analysis: just calculate mean close price
-    closes = [bar.get('close') for bar in data if bar.get('close') is not None]
+    if hasattr(data, 'dtype'):
+        # Columnar bars: typed close column, NaN where missing
+        closes = data['close'][~pd.isna(data['close'])].tolist()
+    else:
+        closes = [bar.get('close') for bar in data if bar.get('close') is not None]
     if closes:
         print(f"[{ticker}] ML: Mean Close = {sum(closes)/len(closes):.2f} for {len(closes)} bars")
     else:
         print(f"[{ticker}] ML: No data")
     # TODO: Replace with real ML model call (sklearn, keras, pytorch, etc)
 
+def process_columnar(ticker):
+    prefix = f"{bar_store.COLUMNAR_PREFIX}/{ticker}/"
+    keys = get_s3_keys(bar_store.S3_BUCKET, prefix)
+    print(f"Found {len(keys)} columnar months in S3 for {ticker}.")
+    for key in sorted(keys):
+        try:
+            decoded = get_bar_cache().get(bar_store.S3_BUCKET, key, decode=bar_store.decode_month)
+            if decoded is None:
+                continue
+            for date_str, day_bars in bar_store.split_days(*decoded).items():
+                analyze_and_train(ticker, day_bars)
+        except Exception as e:
+            print(f"Error loading/analyzing {key}: {e}")
+
 def main():
     while True:
         send_heartbeat("s3_loader_ml_agent")
         for ticker in TICKERS:
+            if bar_store.BAR_FORMAT == "columnar":
+                print(f"\n=== Processing {ticker} (columnar) ===")
+                process_columnar(ticker)
+                continue
             prefix = f"polygon/{ticker}/"
             print(f"\n=== Processing {ticker} ===")
             keys = get_s3_keys(S3_BUCKET, prefix)
@@ -70,6 +87,7 @@ def main():
                     analyze_and_train(ticker, bars)
                 except Exception as e:
                     print(f"Error loading/analyzing {key}: {e}")
+        log_cache_stats()
         time.sleep(300)
 
 if __name__ == "__main__":
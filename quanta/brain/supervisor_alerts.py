@@ -0,0 +1,126 @@
+# quanta/brain/supervisor_alerts.py
+#
+# Heartbeat alert state for health_supervisor.
+#
+# Each worker is ok -> firing -> resolved (-> ok). Only transitions produce an
+# alert record, so a worker that stays down for a day yields one "firing" and
+# one "resolved" record instead of one per check. Firing alerts are kept in a
+# Redis hash (worker -> JSON) so they survive supervisor restarts and can be
+# listed by the API without touching S3.
+#
+# Alert records are buffered by AlertBatchWriter and written as one JSONL
+# object per flush interval: alerts/YYYY/MM/DD/HHMMSS-{count}.jsonl
+
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+
+from quanta.utils.heartbeat import get_redis
+
+FIRING_ALERTS_KEY = os.getenv("QUANTA_FIRING_ALERTS_KEY", "quanta:alerts:firing")
+ALERT_FLUSH_SEC = int(os.getenv("SUPERVISOR_ALERT_FLUSH_SEC", "300"))
+ALERT_PREFIX = os.getenv("SUPERVISOR_ALERT_PREFIX", "alerts")
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+def firing_alerts(r=None):
+    """
+    {worker: alert} for every currently firing alert (one HGETALL).
+    """
+    r = r or get_redis()
+    return {_decode(worker): json.loads(alert) for worker, alert in r.hgetall(FIRING_ALERTS_KEY).items()}
+
+class AlertStateMachine:
+    def __init__(self, r=None, alert_type="heartbeat_missed"):
+        self.r = r or get_redis()
+        self.alert_type = alert_type
+
+    def evaluate(self, unhealthy, now_ts):
+        """
+        unhealthy: {worker: last heartbeat or None} from this check; any firing
+        worker not in it has recovered. Returns this check's transition records.
+        """
+        firing = firing_alerts(self.r)
+        transitions, fire, resolve = [], {}, []
+        for worker, last_heartbeat in unhealthy.items():
+            if worker in firing:
+                continue
+            alert = {
+                "worker": worker,
+                "alert_type": self.alert_type,
+                "state": "firing",
+                "last_heartbeat": last_heartbeat,
+                "firing_since": now_ts,
+                "detected_at": now_ts,
+                "message": f"Worker '{worker}' missed heartbeat. Last was at {last_heartbeat}, now {now_ts}.",
+            }
+            fire[worker] = json.dumps(alert)
+            transitions.append(alert)
+        for worker, alert in firing.items():
+            if worker in unhealthy:
+                continue
+            resolve.append(worker)
+            transitions.append({
+                "worker": worker,
+                "alert_type": alert.get("alert_type", self.alert_type),
+                "state": "resolved",
+                "firing_since": alert.get("firing_since"),
+                "detected_at": now_ts,
+                "duration_sec": now_ts - alert.get("firing_since", now_ts),
+                "message": f"Worker '{worker}' heartbeat recovered after {now_ts - alert.get('firing_since', now_ts)} sec.",
+            })
+        if fire or resolve:
+            pipe = self.r.pipeline(transaction=True)
+            if fire:
+                pipe.hset(FIRING_ALERTS_KEY, mapping=fire)
+            if resolve:
+                pipe.hdel(FIRING_ALERTS_KEY, *resolve)
+            pipe.execute()
+        return transitions
+
+class AlertBatchWriter:
+    def __init__(self, s3, bucket, prefix=ALERT_PREFIX, flush_interval=ALERT_FLUSH_SEC):
+        self.s3 = s3
+        self.bucket = bucket
+        self.prefix = prefix.rstrip("/")
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.last_flush = time.time()
+        self.lock = threading.Lock()
+
+    def add(self, alerts):
+        with self.lock:
+            self.buffer.extend(alerts)
+
+    def maybe_flush(self, now=None):
+        now = now or time.time()
+        if now - self.last_flush >= self.flush_interval:
+            return self.flush(now)
+        return None
+
+    def flush(self, now=None):
+        """
+        Write buffered alerts as one JSONL object. Returns its key, or None.
+        """
+        now = now or time.time()
+        with self.lock:
+            alerts, self.buffer = self.buffer, []
+            self.last_flush = now
+        if not alerts:
+            return None
+        stamp = datetime.fromtimestamp(now, tz=timezone.utc)
+        key = f"{self.prefix}/{stamp:%Y/%m/%d/%H%M%S}-{len(alerts)}.jsonl"
+        body = "".join(json.dumps(alert) + "\n" for alert in alerts)
+        try:
+            self.s3.put_object(Bucket=self.bucket, Key=key, Body=body.encode("utf-8"),
+                               ContentType="application/x-ndjson")
+        except Exception as e:
+            logging.error(f"[SUPERVISOR] Alert batch write failed, keeping {len(alerts)} alerts: {e}")
+            with self.lock:
+                self.buffer = alerts + self.buffer
+            return None
+        return key
@@ -0,0 +1,123 @@
+# quanta/clock/trading_calendar.py
+#
+# NYSE trading calendar: weekends, full-day holidays, early (13:00 ET) closes
+# and one-off closures, computed from the exchange's rules so no network
+# lookup or third-party calendar package is needed.
+#
+# Ingest and backfill scripts use trading_days() to enumerate sessions instead
+# of every calendar day, so weekends and holidays never turn into requests.
+
+import datetime
+from functools import lru_cache
+
+REGULAR_CLOSE = datetime.time(16, 0)
+EARLY_CLOSE = datetime.time(13, 0)
+
+# Closures outside the regular holiday rules
+SPECIAL_CLOSURES = {
+    datetime.date(2001, 9, 11): "September 11",
+    datetime.date(2001, 9, 12): "September 11",
+    datetime.date(2001, 9, 13): "September 11",
+    datetime.date(2001, 9, 14): "September 11",
+    datetime.date(2004, 6, 11): "Reagan National Day of Mourning",
+    datetime.date(2007, 1, 2): "Ford National Day of Mourning",
+    datetime.date(2012, 10, 29): "Hurricane Sandy",
+    datetime.date(2012, 10, 30): "Hurricane Sandy",
+    datetime.date(2018, 12, 5): "Bush National Day of Mourning",
+    datetime.date(2025, 1, 9): "Carter National Day of Mourning",
+}
+
+def easter(year):
+    """
+    Gregorian Easter Sunday (anonymous algorithm).
+    """
+    a, b, c = year % 19, year // 100, year % 100
+    d = (19 * a + b - b // 4 - (b - (b + 8) // 25 + 1) // 3 + 15) % 30
+    e = (32 + 2 * (b % 4) + 2 * (c // 4) - d - c % 4) % 7
+    f = d + e - 7 * ((a + 11 * d + 22 * e) // 451) + 114
+    return datetime.date(year, f // 31, f % 31 + 1)
+
+def _nth_weekday(year, month, weekday, n):
+    first = datetime.date(year, month, 1)
+    return first + datetime.timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+def _last_weekday(year, month, weekday):
+    last = datetime.date(year + month // 12, month % 12 + 1, 1) - datetime.timedelta(days=1)
+    return last - datetime.timedelta(days=(last.weekday() - weekday) % 7)
+
+def _observed(day):
+    # Saturday holidays move to Friday, Sunday holidays to Monday
+    if day.weekday() == 5:
+        return day - datetime.timedelta(days=1)
+    if day.weekday() == 6:
+        return day + datetime.timedelta(days=1)
+    return day
+
+@lru_cache(maxsize=None)
+def holidays(year):
+    """
+    {date: name} of every full-day closure in year, including special closures.
+    """
+    days = {}
+    new_year = datetime.date(year, 1, 1)
+    # NYSE does not close on Friday Dec 31 for a Saturday New Year's Day
+    if new_year.weekday() != 5:
+        days[_observed(new_year)] = "New Year's Day"
+    if year >= 1998:
+        days[_nth_weekday(year, 1, 0, 3)] = "Martin Luther King Jr. Day"
+    days[_nth_weekday(year, 2, 0, 3)] = "Washington's Birthday"
+    days[easter(year) - datetime.timedelta(days=2)] = "Good Friday"
+    days[_last_weekday(year, 5, 0)] = "Memorial Day"
+    if year >= 2022:
+        days[_observed(datetime.date(year, 6, 19))] = "Juneteenth"
+    days[_observed(datetime.date(year, 7, 4))] = "Independence Day"
+    days[_nth_weekday(year, 9, 0, 1)] = "Labor Day"
+    days[_nth_weekday(year, 11, 3, 4)] = "Thanksgiving Day"
+    days[_observed(datetime.date(year, 12, 25))] = "Christmas Day"
+    days.update({day: name for day, name in SPECIAL_CLOSURES.items() if day.year == year})
+    return days
+
+@lru_cache(maxsize=None)
+def early_closes(year):
+    """
+    Sessions that close at EARLY_CLOSE: July 3, the day after Thanksgiving
+    and Christmas Eve, when they fall on an open weekday.
+    """
+    candidates = [
+        datetime.date(year, 7, 3),
+        _nth_weekday(year, 11, 3, 4) + datetime.timedelta(days=1),
+        datetime.date(year, 12, 24),
+    ]
+    closed = holidays(year)
+    return frozenset(day for day in candidates if day.weekday() < 5 and day not in closed)
+
+def _as_date(day):
+    if isinstance(day, str):
+        return datetime.date.fromisoformat(day)
+    if isinstance(day, datetime.datetime):
+        return day.date()
+    return day
+
+def is_trading_day(day):
+    day = _as_date(day)
+    return day.weekday() < 5 and day not in holidays(day.year)
+
+def session_close(day):
+    """
+    Closing time (ET) of the session on day, or None if the market is closed.
+    """
+    day = _as_date(day)
+    if not is_trading_day(day):
+        return None
+    return EARLY_CLOSE if day in early_closes(day.year) else REGULAR_CLOSE
+
+def trading_days(start, end):
+    """
+    Yields every trading session from start to end inclusive, as dates.
+    Accepts dates, datetimes or YYYY-MM-DD strings.
+    """
+    day, end = _as_date(start), _as_date(end)
+    while day <= end:
+        if is_trading_day(day):
+            yield day
+        day += datetime.timedelta(days=1)
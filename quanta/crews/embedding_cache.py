@@ -0,0 +1,89 @@
+# quanta/crews/embedding_cache.py
+#
+# Persistent embedding cache keyed by content hash.
+#
+# CachedEmbeddings wraps any embeddings object (OpenAIEmbeddings in
+# production, a local stand-in in tests) and stores every vector it computes
+# in SQLite under sha256(model + text). Re-ingesting the same bars or
+# transcripts then costs a lookup instead of an API call. Texts repeated
+# within one batch are embedded once.
+
+import os
+import array
+import sqlite3
+import hashlib
+import threading
+from langchain_core.embeddings import Embeddings
+from quanta.utils.logger import setup_logger
+
+logger = setup_logger("embedding_cache")
+
+EMBEDDING_CACHE_PATH = os.getenv("QUANTA_EMBEDDING_CACHE", "/tmp/quanta_embeddings.sqlite")
+# SQLite's default limit on bound parameters is 999
+LOOKUP_CHUNK = 500
+
+class CachedEmbeddings(Embeddings):
+    def __init__(self, inner, path=EMBEDDING_CACHE_PATH, namespace=None):
+        self.inner = inner
+        # Vectors from different models must never be mixed up
+        self.namespace = namespace or getattr(inner, "model", None) or type(inner).__name__
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+        self.db.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, text):
+        return hashlib.sha256(f"{self.namespace}\0{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, keys):
+        found = {}
+        with self.lock:
+            for i in range(0, len(keys), LOOKUP_CHUNK):
+                chunk = keys[i:i + LOOKUP_CHUNK]
+                rows = self.db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+                for key, blob in rows:
+                    found[key] = array.array("f", blob).tolist()
+        return found
+
+    def _store(self, items):
+        with self.lock:
+            self.db.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?)",
+                                [(key, array.array("f", vector).tobytes()) for key, vector in items])
+            self.db.commit()
+
+    def embed_documents(self, texts):
+        keys = [self.key(text) for text in texts]
+        vectors = self._lookup(list(set(keys)))
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        if missing:
+            computed = self.inner.embed_documents(list(missing.values()))
+            new = list(zip(missing.keys(), computed))
+            self._store(new)
+            vectors.update((key, array.array("f", vector).tolist()) for key, vector in new)
+        with self.lock:
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / total if total else 0.0}
+
+    def close(self):
+        stats = self.stats()
+        logger.info(f"Embedding cache: {stats['hits']} hits, {stats['misses']} misses "
+                    f"({stats['hit_rate']:.1%} hit rate)")
+        with self.lock:
+            self.db.close()
@@ -1,26 +1,180 @@
 import os
+import time
+import atexit
+import fcntl
+import shutil
+import threading
+from contextlib import contextmanager
 from langchain_openai import OpenAI, OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
-from langchain_core.documents import Document
 from quanta.utils.logger import setup_logger
+from quanta.crews.embedding_cache import CachedEmbeddings, EMBEDDING_CACHE_PATH
 
 logger = setup_logger("langchain_boot")
 
+MEMORY_DIR = os.getenv("QUANTA_MEMORY_DIR", "/tmp/quanta_memory")
+MEMORY_SAVE_SEC = int(os.getenv("QUANTA_MEMORY_SAVE_SEC", "300"))
+
+class MemoryStore:
+    """
+    Process-wide FAISS memory shared by every caller of boot_langchain_memory().
+
+    Embedding runs outside the lock, so concurrent add_texts calls overlap
+    their API requests; only the index update is serialized. The index is
+    written to `path` with save_local at most every save_interval seconds
+    (and at exit) and loaded back on boot, so restarts never re-embed what is
+    already indexed. The index is created on the first add: nothing on disk
+    and nothing added means no index, rather than one seeded with a dummy doc.
+
+    Several processes may share `path`: loads and saves hold an flock on
+    `path`.lock, and a save that finds the directory rewritten by another
+    process since this one last read it reloads that copy and re-adds its own
+    unsaved vectors, so neither process's additions are lost.
+    """
+    def __init__(self, embeddings, path=MEMORY_DIR, save_interval=MEMORY_SAVE_SEC):
+        self.embeddings = embeddings
+        self.path = path
+        self.save_interval = save_interval
+        self.lock = threading.RLock()
+        self.unsaved = []  # (text_embeddings, metadatas) added since the last save
+        self.last_save = time.time()
+        self.disk_version = None
+        with self._file_lock(fcntl.LOCK_SH):
+            self.index = self._load()
+
+    @contextmanager
+    def _file_lock(self, mode):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path + ".lock", "a") as f:
+            fcntl.flock(f, mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _version(self):
+        try:
+            return os.stat(os.path.join(self.path, "index.faiss")).st_mtime_ns
+        except OSError:
+            return None
+
+    def _load(self):
+        self.disk_version = self._version()
+        path = self.path
+        if not os.path.exists(os.path.join(path, "index.faiss")):
+            # Interrupted between the two renames in save()
+            path = self.path + ".old"
+            if not os.path.exists(os.path.join(path, "index.faiss")):
+                return None
+        try:
+            index = FAISS.load_local(path, self.embeddings, allow_dangerous_deserialization=True)
+            logger.info(f"Loaded memory store from {path} ({index.index.ntotal} vectors).")
+            return index
+        except Exception as e:
+            logger.error(f"Could not load memory store from {path}, starting empty: {e}")
+            return None
+
+    def __len__(self):
+        with self.lock:
+            return self.index.index.ntotal if self.index is not None else 0
+
+    def add_texts(self, texts, metadatas=None):
+        texts = list(texts)
+        if not texts:
+            return
+        self.add_embeddings(list(zip(texts, self.embeddings.embed_documents(texts))), metadatas)
+
+    def add_embeddings(self, text_embeddings, metadatas=None):
+        text_embeddings = list(text_embeddings)
+        if not text_embeddings:
+            return
+        with self.lock:
+            self._add(text_embeddings, metadatas)
+            self.unsaved.append((text_embeddings, metadatas))
+        self.maybe_save()
+
+    def _add(self, text_embeddings, metadatas):
+        if self.index is None:
+            self.index = FAISS.from_embeddings(text_embeddings, self.embeddings, metadatas=metadatas)
+        else:
+            self.index.add_embeddings(text_embeddings, metadatas=metadatas)
+
+    def similarity_search(self, query, k=4, **kwargs):
+        with self.lock:
+            if self.index is None:
+                return []
+            return self.index.similarity_search(query, k=k, **kwargs)
+
+    def as_retriever(self, **kwargs):
+        with self.lock:
+            if self.index is None:
+                raise RuntimeError("Memory store is empty.")
+            return self.index.as_retriever(**kwargs)
+
+    def maybe_save(self, now=None):
+        now = now or time.time()
+        if self.unsaved and now - self.last_save >= self.save_interval:
+            self.save()
+
+    def save(self):
+        """
+        Write the index next to the current copy, then swap it in, so a crash
+        mid-save leaves the previous copy loadable.
+        """
+        with self.lock, self._file_lock(fcntl.LOCK_EX):
+            if not self.unsaved:
+                return
+            if self._version() != self.disk_version:
+                # Another process saved since we last read: start from its copy
+                self.index = self._load()
+                for text_embeddings, metadatas in self.unsaved:
+                    self._add(text_embeddings, metadatas)
+            tmp, old = f"{self.path}.tmp{os.getpid()}", self.path + ".old"
+            shutil.rmtree(tmp, ignore_errors=True)
+            self.index.save_local(tmp)
+            shutil.rmtree(old, ignore_errors=True)
+            if os.path.exists(self.path):
+                os.replace(self.path, old)
+            os.replace(tmp, self.path)
+            shutil.rmtree(old, ignore_errors=True)
+            self.disk_version = self._version()
+            saved = sum(len(text_embeddings) for text_embeddings, _ in self.unsaved)
+            self.unsaved, self.last_save = [], time.time()
+        logger.info(f"Saved memory store to {self.path} ({saved} new vectors).")
+
+    def close(self):
+        try:
+            self.save()
+        except Exception as e:
+            logger.error(f"Saving memory store failed: {e}")
+
+_boot_lock = threading.Lock()
+_booted = None
+
 def boot_langchain_memory():
-    openai_key = os.getenv("OPENAI_API_KEY")
-    if not openai_key:
-        logger.error("No OPENAI_API_KEY found.")
-        raise Exception("Missing OpenAI API key.")
-
-    llm = OpenAI(openai_api_key=openai_key, model="gpt-4-1106-preview")
-    embeddings = OpenAIEmbeddings(openai_api_key=openai_key)
-    vectorstore = FAISS.from_documents(
-        [Document(page_content="init")],
-        embedding=embeddings
-    )
-
-    logger.info("LangChain memory store (FAISS) booted.")
-    return llm, embeddings, vectorstore
+    """
+    (llm, embeddings, memory store), created once per process.
+    """
+    global _booted
+    with _boot_lock:
+        if _booted is not None:
+            return _booted
+        openai_key = os.getenv("OPENAI_API_KEY")
+        if not openai_key:
+            logger.error("No OPENAI_API_KEY found.")
+            raise Exception("Missing OpenAI API key.")
+
+        llm = OpenAI(openai_api_key=openai_key, model="gpt-4-1106-preview")
+        embeddings = OpenAIEmbeddings(openai_api_key=openai_key)
+        if EMBEDDING_CACHE_PATH:
+            embeddings = CachedEmbeddings(embeddings)
+            atexit.register(embeddings.close)
+        vectorstore = MemoryStore(embeddings)
+        atexit.register(vectorstore.close)
+
+        logger.info("LangChain memory store (FAISS) booted.")
+        _booted = (llm, embeddings, vectorstore)
+        return _booted
 
 if __name__ == "__main__":
     boot_langchain_memory()
@@ -0,0 +1,244 @@
+# quanta/ingest/bar_cache.py
+#
+# Read-through cache for historical bar objects in S3.
+#
+# Tier 1: in-process LRU of decoded objects, keyed by S3 key (one key per
+#         ticker/day JSON object or ticker/month columnar object). Entries
+#         older than the TTL fall through to tier 2 for revalidation, since
+#         the current month's columnar object is rewritten daily.
+# Tier 2: on-disk cache of raw object bytes with a total size budget. Disk
+#         hits are revalidated with a conditional GET on the stored ETag, so
+#         unchanged objects cost a 304 instead of a full download.
+#
+# Keys that do not exist (e.g. a month with no columnar object yet) are cached
+# as misses in tier 1 for BAR_CACHE_MISS_TTL_SEC, so repeated lookups do not
+# each cost a GET.
+#
+# Decoded values are shared between callers and must not be mutated. Pass a
+# module-level decode function: it is part of the memory-tier key.
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import boto3
+from botocore.exceptions import ClientError
+
+BAR_CACHE_DIR = os.getenv("QUANTA_BAR_CACHE_DIR", "/tmp/quanta_bar_cache")
+BAR_CACHE_MAX_ENTRIES = int(os.getenv("QUANTA_BAR_CACHE_MAX_ENTRIES", "512"))
+BAR_CACHE_MAX_DISK_MB = int(os.getenv("QUANTA_BAR_CACHE_MAX_DISK_MB", "1024"))
+BAR_CACHE_TTL_SEC = int(os.getenv("QUANTA_BAR_CACHE_TTL_SEC", "300"))
+BAR_CACHE_MISS_TTL_SEC = int(os.getenv("QUANTA_BAR_CACHE_MISS_TTL_SEC", "60"))
+
+# Memory-tier value for an object that did not exist
+_MISSING = object()
+
+logger = logging.getLogger("bar_cache")
+
+class BarCache:
+    def __init__(self, s3=None, cache_dir=BAR_CACHE_DIR, max_entries=BAR_CACHE_MAX_ENTRIES,
+                 max_disk_bytes=BAR_CACHE_MAX_DISK_MB * 1024 * 1024, ttl=BAR_CACHE_TTL_SEC,
+                 miss_ttl=BAR_CACHE_MISS_TTL_SEC):
+        self.s3 = s3 or boto3.client("s3")
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self.miss_ttl = miss_ttl
+        self.memory = OrderedDict()  # (bucket, key, decode) -> (decoded value, stored_at)
+        self.lock = threading.Lock()
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+            "revalidated": 0,
+            "not_found": 0,
+            "not_found_hits": 0,
+        }
+        self.disk_bytes = 0
+        if self.max_disk_bytes > 0:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    def get(self, bucket, key, decode=json.loads):
+        """
+        Return decode(object bytes) for s3://bucket/key, or None if the object does not exist.
+        """
+        cache_key = (bucket, key, decode)
+        with self.lock:
+            entry = self.memory.get(cache_key)
+            if entry is not None:
+                missing = entry[0] is _MISSING
+                if time.time() - entry[1] < (self.miss_ttl if missing else self.ttl):
+                    self.memory.move_to_end(cache_key)
+                    self.counters["not_found_hits" if missing else "memory_hits"] += 1
+                    return None if missing else entry[0]
+
+        data = self._fetch(bucket, key)
+        try:
+            value = _MISSING if data is None else decode(data)
+        except Exception:
+            # A corrupt disk copy would otherwise be revalidated (304) and re-served forever
+            self.invalidate(bucket, key)
+            raise
+        with self.lock:
+            self.memory[cache_key] = (value, time.time())
+            self.memory.move_to_end(cache_key)
+            while len(self.memory) > self.max_entries:
+                self.memory.popitem(last=False)
+                self.counters["memory_evictions"] += 1
+        return None if value is _MISSING else value
+
+    def invalidate(self, bucket, key):
+        with self.lock:
+            for cache_key in [k for k in self.memory if k[:2] == (bucket, key)]:
+                del self.memory[cache_key]
+        path = self._disk_path(bucket, key)
+        for p in (path, f"{path}.etag"):
+            if os.path.exists(p):
+                os.remove(p)
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+            stats["memory_entries"] = len(self.memory)
+            stats["disk_bytes"] = self.disk_bytes
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def _fetch(self, bucket, key):
+        path = self._disk_path(bucket, key)
+        etag = self._read_etag(path)
+        kwargs = {"Bucket": bucket, "Key": key}
+        if etag:
+            kwargs["IfNoneMatch"] = etag
+        try:
+            obj = self.s3.get_object(**kwargs)
+        except ClientError as e:
+            code = e.response.get("Error", {}).get("Code")
+            if code in ("304", "NotModified"):
+                data = self._read_disk(path)
+                if data is not None:
+                    self._count("disk_hits")
+                    self._count("revalidated")
+                    return data
+                return self._fetch_uncached(bucket, key)
+            if code in ("NoSuchKey", "404"):
+                self._count("not_found")
+                return None
+            raise
+        data = obj["Body"].read()
+        self._count("misses")
+        self._write_disk(path, data, obj.get("ETag"))
+        return data
+
+    def _fetch_uncached(self, bucket, key):
+        # Disk copy vanished between the ETag read and the 304; fetch the body outright
+        obj = self.s3.get_object(Bucket=bucket, Key=key)
+        data = obj["Body"].read()
+        self._count("misses")
+        self._write_disk(self._disk_path(bucket, key), data, obj.get("ETag"))
+        return data
+
+    # --- disk tier ---
+
+    def _disk_path(self, bucket, key):
+        digest = hashlib.sha1(f"{bucket}/{key}".encode()).hexdigest()
+        return os.path.join(self.cache_dir, digest)
+
+    def _read_etag(self, path):
+        if self.max_disk_bytes <= 0:
+            return None
+        try:
+            with open(f"{path}.etag") as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def _read_disk(self, path):
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # mtime doubles as last-access time for eviction
+            return data
+        except OSError:
+            return None
+
+    def _write_disk(self, path, data, etag):
+        if self.max_disk_bytes <= 0 or not etag or len(data) > self.max_disk_bytes:
+            return
+        try:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            # Several worker processes may share cache_dir
+            tmp_path = f"{path}.tmp{os.getpid()}-{threading.get_ident()}"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            with open(f"{path}.etag", "w") as f:
+                f.write(etag)
+            with self.lock:
+                self.disk_bytes += len(data) - old_size
+            self._evict_disk()
+        except OSError as e:
+            logger.warning(f"Bar cache disk write failed for {path}: {e}")
+
+    def _disk_entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if "." in name:
+                continue  # etag sidecars and temp files
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, st.st_size, st.st_mtime))
+        return entries
+
+    def _evict_disk(self):
+        with self.lock:
+            if self.disk_bytes <= self.max_disk_bytes:
+                return
+        entries = sorted(self._disk_entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_disk_bytes:
+                break
+            for p in (path, f"{path}.etag"):
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+            total -= size
+            self._count("disk_evictions")
+        with self.lock:
+            self.disk_bytes = total
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_bar_cache():
+    """
+    Process-wide cache shared by every bar consumer.
+    """
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = BarCache()
+        return _default_cache
+
+def log_cache_stats(prefix="[BAR CACHE]"):
+    stats = get_bar_cache().stats()
+    logger.info(f"{prefix} {stats}")
+    return stats
@@ -0,0 +1,195 @@
+# quanta/ingest/bar_store.py
+#
+# Columnar minute-bar storage. Bars are partitioned by ticker and month:
+#
+#   polygon_columnar/TICKER/YYYY-MM.npz
+#
+# Each object is an .npz archive holding one typed array per column plus a
+# day index ("_days" and "_offsets") so a single trading day can be sliced out
+# without touching the other columns or days.
+#
+# Missing values round-trip as None: floats are stored as NaN and integer
+# columns as MISSING_INT. otc is stored as int8 (1/0, MISSING_INT when the
+# bar has no flag). Objects written before the otc column existed read back
+# with otc None.
+
+import io
+import os
+import logging
+from collections import defaultdict
+
+import boto3
+import numpy as np
+
+from quanta.ingest.bar_cache import get_bar_cache
+
+S3_BUCKET = os.getenv("QUANTA_HIST_S3_BUCKET", "quanta-historical-marketdata")
+COLUMNAR_PREFIX = os.getenv("QUANTA_COLUMNAR_PREFIX", "polygon_columnar")
+# "json" (legacy per-day objects only), "columnar", or "both" while migrating
+BAR_FORMAT = os.getenv("QUANTA_BAR_FORMAT", "json")
+
+BAR_DTYPE = np.dtype([
+    ("timestamp", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+    ("vwap", "<f8"),
+    ("transactions", "<i8"),
+    ("otc", "i1"),
+])
+BAR_COLUMNS = BAR_DTYPE.names
+MISSING_INT = -1
+
+# Polygon REST responses use single-letter keys; the client library uses full names
+SHORT_KEYS = {"t": "timestamp", "o": "open", "h": "high", "l": "low",
+              "c": "close", "v": "volume", "vw": "vwap", "n": "transactions", "otc": "otc"}
+
+def _missing(name):
+    return MISSING_INT if BAR_DTYPE[name].kind == "i" else np.nan
+
+logger = logging.getLogger("bar_store")
+
+s3 = boto3.client("s3")
+
+def writes_json():
+    return BAR_FORMAT in ("json", "both")
+
+def writes_columnar():
+    return BAR_FORMAT in ("columnar", "both")
+
+def month_key(ticker, year, month):
+    return f"{COLUMNAR_PREFIX}/{ticker}/{int(year):04d}-{int(month):02d}.npz"
+
+def bars_to_array(bars):
+    """
+    Convert a list of bar dicts (long or short Polygon keys) to a BAR_DTYPE array.
+    Missing floats become NaN, missing integers MISSING_INT.
+    """
+    arr = np.zeros(len(bars), dtype=BAR_DTYPE)
+    for short, name in SHORT_KEYS.items():
+        fill = _missing(name)
+        values = (bar.get(name, bar.get(short)) for bar in bars)
+        arr[name] = [fill if value is None else value for value in values]
+    return arr
+
+def array_to_bars(arr):
+    """
+    Convert a BAR_DTYPE array back to the list-of-dicts shape used by the JSON
+    tree: missing values become None and otc a bool.
+    """
+    columns = [name for name in BAR_COLUMNS if name in arr.dtype.names]
+    bars = []
+    for row in arr[columns].tolist():
+        bar = {}
+        for name, value in zip(columns, row):
+            if value != value or (value == MISSING_INT and BAR_DTYPE[name].kind == "i"):
+                value = None  # NaN or the integer sentinel
+            elif name == "otc":
+                value = bool(value)
+            bar[name] = value
+        bars.append(bar)
+    return bars
+
+def encode_month(day_arrays):
+    """
+    Serialize {date_str: BAR_DTYPE array} into one columnar month object.
+    """
+    days = sorted(day_arrays)
+    parts = [day_arrays[day] for day in days]
+    offsets = np.zeros(len(days) + 1, dtype="<i8")
+    offsets[1:] = np.cumsum([len(part) for part in parts])
+    merged = np.concatenate(parts) if parts else np.zeros(0, dtype=BAR_DTYPE)
+    columns = {name: np.ascontiguousarray(merged[name]) for name in BAR_COLUMNS}
+    buf = io.BytesIO()
+    np.savez_compressed(buf, _days=np.array(days, dtype="U10"), _offsets=offsets, **columns)
+    return buf.getvalue()
+
+def decode_month(data, columns=None):
+    """
+    Decode a columnar month object.
+    Returns (days, offsets, arr) where rows offsets[i]:offsets[i+1] belong to days[i].
+    Only the requested columns are decompressed.
+    """
+    columns = list(columns or BAR_COLUMNS)
+    with np.load(io.BytesIO(data)) as npz:
+        days = npz["_days"].tolist()
+        offsets = npz["_offsets"]
+        arr = np.empty(int(offsets[-1]), dtype=[(name, BAR_DTYPE[name]) for name in columns])
+        for name in columns:
+            # Columns added after the object was written read as missing
+            arr[name] = npz[name] if name in npz.files else _missing(name)
+    return days, offsets, arr
+
+def split_days(days, offsets, arr):
+    return {day: arr[offsets[i]:offsets[i + 1]] for i, day in enumerate(days)}
+
+def read_month(ticker, year, month, columns=None):
+    """
+    Return {date_str: typed array} for one ticker-month, or {} if not stored.
+    Reads go through the shared bar cache.
+    """
+    decoded = get_bar_cache().get(S3_BUCKET, month_key(ticker, year, month), decode=decode_month)
+    if decoded is None:
+        return {}
+    days, offsets, arr = decoded
+    if columns:
+        arr = arr[list(columns)]
+    return split_days(days, offsets, arr)
+
+def read_day(ticker, date, columns=None):
+    """
+    Return the typed bar array for one ticker-day (YYYY-MM-DD), or None if not stored.
+    """
+    year, month = date[:4], date[5:7]
+    return read_month(ticker, year, month, columns).get(date)
+
+def write_month(ticker, year, month, day_arrays, merge=True):
+    """
+    Write day arrays into a month object, merging with days already stored.
+    """
+    if merge:
+        existing = read_month(ticker, year, month)
+        existing.update(day_arrays)
+        day_arrays = existing
+    key = month_key(ticker, year, month)
+    s3.put_object(Bucket=S3_BUCKET, Key=key, Body=encode_month(day_arrays))
+    get_bar_cache().invalidate(S3_BUCKET, key)
+    logger.info(f"Wrote {len(day_arrays)} days to s3://{S3_BUCKET}/{key}")
+    return key
+
+def write_days(ticker, day_bars):
+    """
+    Write {date_str: list of bar dicts} for one ticker, one object per touched month.
+    """
+    by_month = defaultdict(dict)
+    for date, bars in day_bars.items():
+        by_month[(date[:4], date[5:7])][date] = bars_to_array(bars)
+    return [write_month(ticker, year, month, arrays) for (year, month), arrays in sorted(by_month.items())]
+
+class MonthlyBarWriter:
+    """
+    Buffers one ticker's days and writes each month object once, when the
+    ingest loop moves past that month (or on close).
+    """
+    def __init__(self, ticker):
+        self.ticker = ticker
+        self.month = None
+        self.days = {}
+
+    def add_day(self, date, bars):
+        month = (date[:4], date[5:7])
+        if self.month is not None and month != self.month:
+            self.flush()
+        self.month = month
+        self.days[date] = bars_to_array(bars)
+
+    def flush(self):
+        if self.days:
+            write_month(self.ticker, self.month[0], self.month[1], self.days)
+        self.days = {}
+
+    def close(self):
+        self.flush()
+        self.month = None
@@ -0,0 +1,75 @@
+# quanta/ingest/convert_bars_columnar.py
+#
+# One-off converter from the per-day JSON tree (polygon/TICKER/DATE.json)
+# to the columnar month objects written by quanta.ingest.bar_store.
+#
+#   python -m quanta.ingest.convert_bars_columnar [TICKER ...]
+
+import sys
+import json
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from quanta.ingest import bar_store
+
+JSON_PREFIX = "polygon"
+MAX_WORKERS = 8
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("convert_bars_columnar")
+
+s3 = bar_store.s3
+
+def list_tickers():
+    tickers = []
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bar_store.S3_BUCKET, Prefix=f"{JSON_PREFIX}/", Delimiter="/"):
+        for prefix in page.get("CommonPrefixes", []):
+            tickers.append(prefix["Prefix"].split("/")[1])
+    return tickers
+
+def list_json_days(ticker):
+    days = []
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bar_store.S3_BUCKET, Prefix=f"{JSON_PREFIX}/{ticker}/"):
+        for obj in page.get("Contents", []):
+            if obj["Key"].endswith(".json"):
+                days.append(obj["Key"].split("/")[-1][:-len(".json")])
+    return days
+
+def convert_month(ticker, year, month, days):
+    day_arrays = {}
+    for date in days:
+        obj = s3.get_object(Bucket=bar_store.S3_BUCKET, Key=f"{JSON_PREFIX}/{ticker}/{date}.json")
+        bars = json.loads(obj["Body"].read())
+        if bars:
+            day_arrays[date] = bar_store.bars_to_array(bars)
+    if day_arrays:
+        bar_store.write_month(ticker, year, month, day_arrays, merge=False)
+    return len(day_arrays)
+
+def convert_ticker(ticker):
+    by_month = defaultdict(list)
+    for date in list_json_days(ticker):
+        by_month[(date[:4], date[5:7])].append(date)
+    logger.info(f"Converting {ticker}: {len(by_month)} months")
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = {
+            pool.submit(convert_month, ticker, year, month, days): (year, month)
+            for (year, month), days in sorted(by_month.items())
+        }
+        converted = 0
+        for future, (year, month) in futures.items():
+            try:
+                converted += future.result()
+            except Exception as e:
+                logger.error(f"Failed to convert {ticker} {year}-{month}: {e}")
+    logger.info(f"Converted {converted} days for {ticker}")
+
+def main(tickers=None):
+    for ticker in tickers or list_tickers():
+        convert_ticker(ticker)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -2,10 +2,12 @@
 
 import os
 from polygon import RESTClient
-from datetime import datetime, timedelta
+from datetime import datetime
 import json
 import boto3
 import logging
+from quanta.ingest.bar_store import MonthlyBarWriter, writes_json, writes_columnar
+from quanta.clock.trading_calendar import trading_days
 
 API_KEY = os.getenv("POLYGON_API_KEY")
 TICKERS = ["SPY", "AAPL", "MSFT", "TSLA"]
@@ -23,10 +25,6 @@ s3 = boto3.client(
     region_name=os.getenv("AWS_DEFAULT_REGION", "us-east-2"),
 )
 
-def daterange(start_date, end_date):
-    for n in range(int((end_date - start_date).days) + 1):
-        yield start_date + timedelta(n)
-
 def fetch_minute_bars(client, ticker, date):
     try:
         resp = client.get_aggs(
@@ -43,17 +41,27 @@ def main():
     start_date = datetime.strptime(START_DATE, "%Y-%m-%d")
     end_date = datetime.strptime(END_DATE, "%Y-%m-%d")
     for ticker in TICKERS:
-        for single_date in daterange(start_date, end_date):
+        writer = MonthlyBarWriter(ticker) if writes_columnar() else None
+        for single_date in trading_days(start_date, end_date):
             date_str = single_date.strftime("%Y-%m-%d")
             logger.info(f"Downloading minute bars for {ticker} {date_str}")
-            bars = fetch_minute_bars(client, ticker, date_str)
-            data = json.dumps([bar.__dict__ for bar in bars])
+            bars = [bar.__dict__ for bar in fetch_minute_bars(client, ticker, date_str)]
+            if writer and bars:
+                try:
+                    writer.add_day(date_str, bars)
+                except Exception as e:
+                    logger.error(f"Error writing columnar bars for {ticker} {date_str}: {e}")
+            if not writes_json():
+                continue
+            data = json.dumps(bars)
             s3_key = f"polygon/{ticker}/{date_str}.json"
             try:
                 s3.put_object(Bucket=S3_BUCKET, Key=s3_key, Body=data)
                 logger.info(f"Uploaded {s3_key} to s3://{S3_BUCKET}/{s3_key}")
             except Exception as e:
                 logger.error(f"Error uploading {s3_key} to S3: {e}")
+        if writer:
+            writer.close()
 
 if __name__ == "__main__":
     main()
@@ -3,10 +3,12 @@
 import os
 import requests
 import json
-from datetime import date, timedelta
+from datetime import date
 from multiprocessing import Pool
 import boto3
 import logging
+from quanta.clock.trading_calendar import trading_days
+from quanta.ingest.bar_store import MonthlyBarWriter, writes_json, writes_columnar
 
 POLYGON_API_KEY = os.getenv("POLYGON_API_KEY")
 TICKERS = ["NVDA", "TSLA", "AAPL", "SPY"]
@@ -26,10 +28,15 @@ s3 = boto3.client(
 )
 
 def daterange(start_date, end_date):
-    for n in range((end_date - start_date).days + 1):
-        yield (start_date + timedelta(n)).strftime("%Y-%m-%d")
+    # Trading sessions only: weekends and exchange holidays have no bars
+    for day in trading_days(start_date, end_date):
+        yield day.strftime("%Y-%m-%d")
 
 def fetch_and_save(args):
+    """
+    Fetch one ticker-day; writes the raw JSON object if enabled and returns
+    (ticker, day, bars) so the parent can feed the columnar writer.
+    """
     ticker, day = args
     url = (
         f"https://api.polygon.io/v2/aggs/ticker/{ticker}/range/1/minute/{day}/{day}"
@@ -40,10 +47,13 @@ def fetch_and_save(args):
         logger.info(f"Fetching {ticker} for {day} ...")
         r = requests.get(url)
         r.raise_for_status()
-        s3.put_object(Bucket=S3_BUCKET, Key=s3_key, Body=r.text)
-        logger.info(f"Saved {ticker} for {day} to S3: {s3_key}")
+        if writes_json():
+            s3.put_object(Bucket=S3_BUCKET, Key=s3_key, Body=r.text)
+            logger.info(f"Saved {ticker} for {day} to S3: {s3_key}")
+        return ticker, day, (r.json().get("results") or []) if writes_columnar() else []
     except Exception as e:
         logger.error(f"ERROR fetching {ticker} {day}: {e}")
+        return ticker, day, []
 
 if __name__ == "__main__":
     jobs = []
@@ -52,5 +62,17 @@ if __name__ == "__main__":
             jobs.append((ticker, day))
     logger.info(f"Total jobs: {len(jobs)}")
     # Number of agents = processes. Use 20 as per your paid Render plan.
+    # imap keeps job order (ticker, then day), so each ticker's months are
+    # completed in sequence and the columnar writer flushes each month once
+    writers = {}
     with Pool(processes=20) as pool:
-        pool.map(fetch_and_save, jobs)
+        for ticker, day, bars in pool.imap(fetch_and_save, jobs, chunksize=8):
+            if not bars:
+                continue
+            writer = writers.setdefault(ticker, MonthlyBarWriter(ticker))
+            try:
+                writer.add_day(day, bars)
+            except Exception as e:
+                logger.error(f"Error writing columnar bars for {ticker} {day}: {e}")
+    for writer in writers.values():
+        writer.close()
@@ -7,6 +7,8 @@ from datetime import date
 from multiprocessing import Pool
 import boto3
 import logging
+from quanta.clock.trading_calendar import is_trading_day
+from quanta.ingest.bar_store import write_days, writes_json, writes_columnar
 
 POLYGON_API_KEY = os.getenv("POLYGON_API_KEY")
 TICKERS = ["NVDA", "TSLA", "AAPL", "SPY"]
@@ -29,11 +31,20 @@ def fetch_and_save(ticker):
         logger.info(f"Fetching {ticker} for {today} ...")
         r = requests.get(url)
         r.raise_for_status()
-        s3.put_object(Bucket=S3_BUCKET, Key=s3_key, Body=r.text)
-        logger.info(f"Saved {ticker} for {today} to S3: {s3_key}")
+        if writes_json():
+            s3.put_object(Bucket=S3_BUCKET, Key=s3_key, Body=r.text)
+            logger.info(f"Saved {ticker} for {today} to S3: {s3_key}")
+        if writes_columnar():
+            bars = r.json().get("results") or []
+            if bars:
+                # Merged into the ticker's month object; one process per ticker
+                write_days(ticker, {today: bars})
     except Exception as e:
         logger.error(f"ERROR fetching {ticker} {today}: {e}")
 
 if __name__ == "__main__":
+    if not is_trading_day(date.today()):
+        logger.info(f"{date.today()} is not a trading day, nothing to fetch")
+        raise SystemExit(0)
     with Pool(processes=4) as pool:
         pool.map(fetch_and_save, TICKERS)
@@ -2,8 +2,9 @@
 
 import os
 import json
-import boto3
 import logging
+from quanta.ingest import bar_store
+from quanta.ingest.bar_cache import get_bar_cache
 
 S3_BUCKET = os.getenv("QUANTA_HIST_S3_BUCKET", "quanta-historical-marketdata")
 S3_PREFIX = "polygon"
@@ -11,15 +12,30 @@ S3_PREFIX = "polygon"
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("polygon_data_loader")
 
-s3 = boto3.client("s3")
+def load_bar_array(ticker, date, columns=None):
+    # Typed columnar bars for one ticker-day, or None if not stored in the columnar tree
+    try:
+        return bar_store.read_day(ticker, date, columns)
+    except Exception as e:
+        logger.warning(f"Columnar read failed for {ticker} {date}: {e}")
+        return None
 
 def load_bars(ticker, date):
+    # Bars as a list of dicts. Kept for callers that expect dicts; hot paths
+    # should read load_bar_array(..., columns=[...]) and stay columnar
+    if bar_store.BAR_FORMAT != "json":
+        arr = load_bar_array(ticker, date)
+        if arr is not None:
+            logger.info(f"Loaded {len(arr)} columnar bars for {ticker} on {date}")
+            return bar_store.array_to_bars(arr)
     # Fixed: Build key using / not _
     key = f"{S3_PREFIX}/{ticker}/{date}.json"
     logger.info(f"Looking for file: s3://{S3_BUCKET}/{key}")
     try:
-        obj = s3.get_object(Bucket=S3_BUCKET, Key=key)
-        bars = json.loads(obj['Body'].read().decode())
+        bars = get_bar_cache().get(S3_BUCKET, key, decode=json.loads)
+        if bars is None:
+            logger.warning(f"File not found: s3://{S3_BUCKET}/{key}")
+            return []
         logger.info(f"Loaded {len(bars)} bars for {ticker} on {date}")
         return bars
     except Exception as e:
@@ -1,5 +1,22 @@
+# quanta/ingest/polygon_s3_ingest.py
+#
+# Polygon flat-file ingest, one pass per day file.
+#
+# Each minute_aggs day file is streamed from S3 once, decompressed
+# incrementally and parsed in CSV_CHUNK_ROWS chunks; every chunk is split by
+# ticker in a single groupby and the rows are fanned out to per-ticker sinks.
+# Download and parse cost is per day, not per (day, ticker), so adding tickers
+# only adds the embedding work for their rows. Day files are discovered with
+# one listing per month instead of probing 31 keys.
+#
+# Rows become text column-wise (format_records) and are embedded by an
+# EmbeddingPipeline running alongside the day workers, so embedding calls
+# overlap with download and parsing instead of stalling them.
+
 import os
 import gzip
+import queue
+import threading
 import pandas as pd
 import concurrent.futures
 import logging
@@ -12,6 +29,10 @@ S3_BUCKET = "flatfiles"
 S3_PREFIX = "us_stocks_sip/minute_aggs_v1"
 YEARS = range(2004, 2025)  # Or narrower for initial test
 MONTHS = range(1, 13)
+DAY_WORKERS = int(os.getenv("POLYGON_S3_DAY_WORKERS", "4"))
+CSV_CHUNK_ROWS = int(os.getenv("POLYGON_S3_CHUNK_ROWS", "200000"))
+EMBED_BATCH_SIZE = 1000
+EMBED_WORKERS = int(os.getenv("POLYGON_S3_EMBED_WORKERS", "4"))
 
 # Polygon S3 endpoint (from docs)
 ENDPOINT_URL = "https://files.polygon.io"
@@ -22,33 +43,157 @@ def s3_session():
         aws_secret_access_key=os.getenv("POLYGON_S3_SECRET"),
     )
 
-def ingest_ticker(ticker):
+def s3_client():
+    return s3_session().client('s3', endpoint_url=ENDPOINT_URL, config=Config(signature_version='s3v4'))
+
+def list_day_files(s3, years=YEARS, months=MONTHS):
+    """
+    Yields the key of every day file that exists, in date order.
+    """
+    paginator = s3.get_paginator("list_objects_v2")
+    for year in years:
+        for month in months:
+            keys = []
+            for page in paginator.paginate(Bucket=S3_BUCKET, Prefix=f"{S3_PREFIX}/{year}/{month:02d}/"):
+                keys.extend(obj["Key"] for obj in page.get("Contents", []) if obj["Key"].endswith(".csv.gz"))
+            yield from sorted(keys)
+
+def day_of(key):
+    return os.path.basename(key)[:-len(".csv.gz")]
+
+def format_records(df):
+    """
+    One "v1,v2,..." line per row, built column-wise: each column is converted
+    to strings once and the columns are concatenated as whole Series, instead
+    of a Python-level join per row.
+    """
+    if df.empty:
+        return []
+    # fillna: newer pandas keeps missing values as NaN after astype(str)
+    columns = [df[c].astype(str).fillna("nan") for c in df.columns]
+    text = columns[0]
+    for column in columns[1:]:
+        text = text + "," + column
+    return text.tolist()
+
+class EmbeddingPipeline:
+    """
+    Embeds batches of texts on EMBED_WORKERS background threads while the day
+    files are still being downloaded and parsed. Embedding calls run
+    concurrently; adding the vectors to the store is serialized. put() blocks
+    once max_pending batches are waiting, so parsing cannot run ahead unbounded.
+    """
+    def __init__(self, embeddings, vectorstore, workers=None, max_pending=None):
+        self.embeddings = embeddings
+        self.vectorstore = vectorstore
+        workers = workers or EMBED_WORKERS
+        self.queue = queue.Queue(maxsize=max_pending or 2 * workers)
+        self.lock = threading.Lock()
+        self.counters = {"batches": 0, "texts": 0, "failed_batches": 0}
+        self.threads = [threading.Thread(target=self._run, daemon=True) for _ in range(workers)]
+        for t in self.threads:
+            t.start()
+
+    def put(self, texts):
+        if texts:
+            self.queue.put(texts)
+
+    def _run(self):
+        while True:
+            texts = self.queue.get()
+            if texts is None:
+                return
+            try:
+                vectors = self.embeddings.embed_documents(texts)
+                with self.lock:
+                    self.vectorstore.add_embeddings(list(zip(texts, vectors)))
+                    self.counters["batches"] += 1
+                    self.counters["texts"] += len(texts)
+            except Exception as e:
+                logging.error(f"Embedding batch of {len(texts)} failed: {e}")
+                with self.lock:
+                    self.counters["failed_batches"] += 1
+
+    def close(self):
+        for _ in self.threads:
+            self.queue.put(None)
+        for t in self.threads:
+            t.join()
+        return dict(self.counters)
+
+class VectorStoreSink:
+    """
+    Receives one ticker's rows (from any day worker) and hands full batches of
+    EMBED_BATCH_SIZE texts to the embedding pipeline.
+    """
+    def __init__(self, ticker, pipeline, batch_size=EMBED_BATCH_SIZE):
+        self.ticker = ticker
+        self.pipeline = pipeline
+        self.batch_size = batch_size
+        self.pending = []
+        self.rows = 0
+        self.lock = threading.Lock()
+
+    def write(self, day, df):
+        records = format_records(df)
+        with self.lock:
+            self.pending.extend(records)
+            self.rows += len(records)
+            batches = []
+            while len(self.pending) >= self.batch_size:
+                batches.append(self.pending[:self.batch_size])
+                del self.pending[:self.batch_size]
+        for batch in batches:
+            self.pipeline.put(batch)
+
+    def flush(self):
+        with self.lock:
+            batch, self.pending = self.pending, []
+        self.pipeline.put(batch)
+
+def split_day_file(stream, sinks, day, chunk_rows=CSV_CHUNK_ROWS):
+    """
+    Parse one gzipped day file from a readable binary stream and hand each
+    ticker's rows to its sink. Returns {ticker: rows}.
+    """
+    counts = dict.fromkeys(sinks, 0)
+    with gzip.GzipFile(fileobj=stream) as f:
+        for chunk in pd.read_csv(f, chunksize=chunk_rows):
+            wanted = chunk[chunk['ticker'].isin(sinks.keys())]
+            for ticker, rows in wanted.groupby('ticker', sort=False):
+                sinks[ticker].write(day, rows)
+                counts[ticker] += len(rows)
+    return counts
+
+def ingest_day(s3, key, sinks):
+    day = day_of(key)
+    try:
+        body = s3.get_object(Bucket=S3_BUCKET, Key=key)["Body"]
+        try:
+            counts = split_day_file(body, sinks, day)
+        finally:
+            body.close()
+        logging.info(f"Ingested {day}: " + ", ".join(f"{t} {n} bars" for t, n in counts.items()))
+        return counts
+    except Exception as e:
+        logging.warning(f"File {key} failed: {e}")
+        return None
+
+def main(tickers=TICKERS):
     llm, embeddings, vectorstore = boot_langchain_memory()
-    s3 = s3_session().client('s3', endpoint_url=ENDPOINT_URL, config=Config(signature_version='s3v4'))
-    for year in YEARS:
-        for month in MONTHS:
-            for day in range(1, 32):  # Safe for calendar, will skip non-existent days
-                key = f"{S3_PREFIX}/{year}/{month:02d}/{year}-{month:02d}-{day:02d}.csv.gz"
-                try:
-                    local_path = f"/tmp/{ticker}_{year}_{month:02d}_{day:02d}.csv.gz"
-                    s3.download_file(S3_BUCKET, key, local_path)
-                    with gzip.open(local_path, 'rt') as f:
-                        df = pd.read_csv(f)
-                    df = df[df['ticker'] == ticker]
-                    records = df.astype(str).apply(lambda row: ','.join(row), axis=1).tolist()
-                    batch_size = 1000
-                    for i in range(0, len(records), batch_size):
-                        batch = records[i:i + batch_size]
-                        vectorstore.add_texts(batch)
-                    logging.info(f"Ingested {len(df)} bars for {ticker} {year}-{month:02d}-{day:02d}")
-                    os.remove(local_path)
-                except Exception as e:
-                    logging.warning(f"File {key} not found or error: {e}")
-                    continue
-
-def main():
-    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-        executor.map(ingest_ticker, TICKERS)
+    pipeline = EmbeddingPipeline(embeddings, vectorstore)
+    sinks = {ticker: VectorStoreSink(ticker, pipeline) for ticker in tickers}
+    s3 = s3_client()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=DAY_WORKERS) as executor:
+        list(executor.map(lambda key: ingest_day(s3, key, sinks), list_day_files(s3)))
+    for sink in sinks.values():
+        sink.flush()
+    stats = pipeline.close()
+    vectorstore.save()
+    for ticker, sink in sinks.items():
+        logging.info(f"{ticker}: {sink.rows} bars parsed")
+    logging.info(f"Embedded {stats['texts']} bars in {stats['batches']} batches, "
+                 f"{stats['failed_batches']} batches failed")
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
@@ -6,6 +6,8 @@ from quanta.ingest.ingestor_agent import ingest_event
 from quanta.ingest.alerts import send_insight_alert
 from pydantic import BaseModel
 import os
+import time
+import uuid
 import logging
 import json
 
@@ -36,6 +38,49 @@ async def ingest_insight(insight: Insight):
         logging.error(f"[ORCHESTRATOR][ERROR] Failed to store insight: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def parse_insight_batch(body, content_type=""):
+    """
+    Decode a batch body: a JSON list, or NDJSON (one insight per line).
+    """
+    text = body.decode() if isinstance(body, bytes) else body
+    if "ndjson" in content_type or not text.lstrip().startswith("["):
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    items = json.loads(text)
+    if not isinstance(items, list):
+        raise ValueError("batch body must be a JSON list or NDJSON")
+    return items
+
+@app.post("/insight/batch")
+async def ingest_insight_batch(request: Request):
+    """
+    Store a batch of insights as a single NDJSON file. Returns one result per
+    item, in request order, so callers can retry only the rejected ones.
+    """
+    try:
+        items = parse_insight_batch(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch body: {e}")
+    results, lines = [], []
+    for item in items:
+        try:
+            insight = Insight(**item)
+        except Exception as e:
+            results.append({"id": item.get("id") if isinstance(item, dict) else None,
+                            "status": "error", "error": str(e)})
+            continue
+        lines.append(insight.json())
+        results.append({"id": insight.id, "status": "success"})
+    if lines:
+        file_path = os.path.join(INSIGHTS_DIR, f"batch_{int(time.time() * 1000)}_{uuid.uuid4().hex[:8]}.ndjson")
+        try:
+            with open(file_path, "w") as f:
+                f.write("\n".join(lines) + "\n")
+        except Exception as e:
+            logging.error(f"[ORCHESTRATOR][ERROR] Failed to store insight batch: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+        logging.info(f"[ORCHESTRATOR] Stored {len(lines)} insights to {file_path}")
+    return {"status": "success", "stored": len(lines), "results": results}
+
 # --- Existing webhook endpoint remains unchanged ---
 @app.post("/webhook")
 async def webhook_endpoint(request: Request):
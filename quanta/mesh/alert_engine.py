@@ -1,60 +1,190 @@
 # quanta/mesh/alert_engine.py
+#
+# Heartbeat timeout alerts for mesh agents.
+#
+# Beacons are consumed as they arrive (the loop blocks on the subscription
+# until either a message or the next deadline), and each agent's deadline is
+# tracked in a timer heap. The heap holds at most one entry per agent: a
+# beacon only moves the agent's deadline forward in a dict (O(1)), and a stale
+# heap entry is re-pushed with the current deadline when it surfaces. Checking
+# for timeouts therefore costs O(log n) per expiring entry, not a scan of
+# every agent per message.
 
+import os
 import time
+import heapq
 import redis
 import json
-from datetime import datetime
+from datetime import datetime, timezone
 from quanta.utils.logger import setup_logger
 from quanta.ingest.alerts import send_insight_alert
+from quanta.mesh.beacon_stream import (
+    BEACON_CHANNEL, BEACON_TRANSPORT, CONSUMER_NAME, BeaconStreamConsumer, prune_groups, recent_beacons,
+)
 
 logger = setup_logger("AlertEngine")
 
-# Redis connection
-redis_conn = redis.Redis.from_url("redis://localhost:6379")
+REDIS_URL = os.getenv("QUANTA_MESH_REDIS_URL", "redis://localhost:6379")
+# Every alert engine instance must see every beacon, so each reads through
+# its own group. Instances sharing a group would split the beacons and report
+# each other's agents as silent.
+ALERT_ENGINE_GROUP_PREFIX = "alert_engine-"
+ALERT_ENGINE_GROUP = os.getenv("ALERT_ENGINE_GROUP", f"{ALERT_ENGINE_GROUP_PREFIX}{CONSUMER_NAME}")
 
 # Threshold to trigger alert (in seconds)
 HEARTBEAT_TIMEOUT = 30
+# A new group starts at the stream tail; deadlines are seeded from this many
+# seconds of recent beacons instead of replaying the whole stream, which would
+# alert on every agent that ever went silent
+SEED_WINDOW_SEC = int(os.getenv("ALERT_ENGINE_SEED_SEC", str(HEARTBEAT_TIMEOUT * 4)))
+# Longest the loop blocks waiting for a beacon when no deadline is pending
+IDLE_WAIT_SEC = 1.0
+# Beacons drained without blocking before deadlines are checked again
+DRAIN_BATCH = 1000
 
-# Track the last time we saw each agent
-last_seen = {}
+def beacon_time(timestamp):
+    """
+    Unix time of a beacon's naive-UTC ISO timestamp, or None if unparseable.
+    """
+    try:
+        return datetime.fromisoformat(timestamp).replace(tzinfo=timezone.utc).timestamp()
+    except (TypeError, ValueError):
+        return None
 
-def check_alerts():
-    now = datetime.utcnow()
-    for agent, last_time_str in last_seen.items():
+class AlertEngine:
+    def __init__(self, timeout=HEARTBEAT_TIMEOUT, on_alert=None, on_recover=None, clock=time.time):
+        self.timeout = timeout
+        self.on_alert = on_alert or self._default_alert
+        self.on_recover = on_recover or self._default_recover
+        self.clock = clock
+        self.deadlines = {}  # agent -> current deadline
+        self.heap = []       # (deadline when pushed, agent); at most one per agent
+        self.scheduled = set()
+        self.alerting = set()
+        self.counters = {"beacons": 0, "alerts": 0, "recoveries": 0, "parse_errors": 0}
+
+    def observe(self, agent, timestamp=None):
+        """
+        Record a beacon. timestamp is the beacon's own (ISO) time; receipt time
+        is used when it is missing or unparseable.
+        """
+        self.counters["beacons"] += 1
+        seen = beacon_time(timestamp) if timestamp is not None else None
+        deadline = (seen if seen is not None else self.clock()) + self.timeout
+        if deadline <= self.deadlines.get(agent, 0):
+            return  # out-of-order or replayed beacon
+        self.deadlines[agent] = deadline
+        if agent in self.alerting:
+            self.alerting.discard(agent)
+            self.counters["recoveries"] += 1
+            self.on_recover(agent)
+        if agent not in self.scheduled:
+            heapq.heappush(self.heap, (deadline, agent))
+            self.scheduled.add(agent)
+
+    def observe_message(self, data):
         try:
-            last_time = datetime.fromisoformat(last_time_str)
-            if (now - last_time).total_seconds() > HEARTBEAT_TIMEOUT:
-                alert_msg = f"⛔ Agent '{agent}' missed heartbeat!"
-                logger.warning(alert_msg)
-                send_insight_alert(alert_msg)
+            beacon = json.loads(data)
+            self.observe(beacon["agent"], beacon.get("timestamp"))
         except Exception as e:
-            logger.error(f"Timestamp parse error for {agent}: {e}")
+            self.counters["parse_errors"] += 1
+            logger.error(f"Failed to parse beacon: {e}")
 
-def monitor():
-    pubsub = redis_conn.pubsub()
-    pubsub.subscribe("quanta:health_beacons")
-    logger.info("🔍 Listening for heartbeats...")
+    def next_timeout(self, now=None):
+        """
+        Seconds until the earliest pending deadline (None if nothing is pending).
+        """
+        if not self.heap:
+            return None
+        return max(0.0, self.heap[0][0] - (now if now is not None else self.clock()))
+
+    def expire(self, now=None):
+        """
+        Fire alerts for every agent whose deadline has passed. Returns them.
+        """
+        now = now if now is not None else self.clock()
+        expired = []
+        while self.heap and self.heap[0][0] <= now:
+            _, agent = heapq.heappop(self.heap)
+            deadline = self.deadlines[agent]
+            if deadline > now:
+                # A newer beacon moved the deadline; reschedule lazily
+                heapq.heappush(self.heap, (deadline, agent))
+                continue
+            self.scheduled.discard(agent)
+            self.alerting.add(agent)
+            self.counters["alerts"] += 1
+            expired.append(agent)
+            self.on_alert(agent, now - deadline + self.timeout)
+        return expired
+
+    def _default_alert(self, agent, silent_for):
+        alert_msg = f"⛔ Agent '{agent}' missed heartbeat! Silent for {silent_for:.1f}s"
+        logger.warning(alert_msg)
+        send_insight_alert(alert_msg)
+
+    def _default_recover(self, agent):
+        logger.info(f"✅ Agent '{agent}' heartbeat recovered")
+
+def run(engine, pubsub):
+    """
+    Drive the engine from a subscribed redis-py PubSub until interrupted.
+    """
+    while True:
+        wait = engine.next_timeout()
+        message = pubsub.get_message(ignore_subscribe_messages=True,
+                                     timeout=IDLE_WAIT_SEC if wait is None else min(wait, IDLE_WAIT_SEC))
+        drained = 0
+        while message is not None and drained < DRAIN_BATCH:
+            if message["type"] == "message":
+                engine.observe_message(message["data"])
+            drained += 1
+            message = pubsub.get_message(ignore_subscribe_messages=True, timeout=0)
+        if message is not None and message["type"] == "message":
+            engine.observe_message(message["data"])
+        engine.expire()
 
+def run_stream(engine, consumer):
+    """
+    Drive the engine from the durable beacon stream until interrupted.
+    """
+    while True:
+        wait = engine.next_timeout()
+        entries = consumer.read(block_ms=1000 * (IDLE_WAIT_SEC if wait is None else min(wait, IDLE_WAIT_SEC)))
+        for _, beacon in entries:
+            if beacon is not None:
+                engine.observe(beacon.get("agent"), beacon.get("timestamp"))
+        consumer.ack([entry_id for entry_id, _ in entries])
+        # A full batch means we are still catching up on a backlog; replayed
+        # beacons are old, so only check deadlines once at the tail
+        if len(entries) < consumer.count:
+            engine.expire()
+
+def monitor():
+    redis_conn = redis.Redis.from_url(REDIS_URL)
+    engine = AlertEngine()
     while True:
         try:
-            # Non-blocking get_message
-            message = pubsub.get_message(timeout=1.0)
-            if message and message['type'] == 'message':
-                try:
-                    beacon = json.loads(message['data'])
-                    last_seen[beacon["agent"]] = beacon["timestamp"]
-                except Exception as e:
-                    logger.error(f"Failed to parse beacon: {e}")
-            check_alerts()  # Always check timeouts
-            time.sleep(1)
+            if BEACON_TRANSPORT == "pubsub":
+                pubsub = redis_conn.pubsub()
+                pubsub.subscribe(BEACON_CHANNEL)
+                logger.info("🔍 Listening for heartbeats...")
+                run(engine, pubsub)
+            else:
+                last_id, beacons = recent_beacons(redis_conn, SEED_WINDOW_SEC)
+                for beacon in beacons:
+                    engine.observe(beacon.get("agent"), beacon.get("timestamp"))
+                logger.info(f"Seeded deadlines for {len(engine.deadlines)} agents from {len(beacons)} recent beacons")
+                # An existing group resumes where it was; a new one starts after the seeded beacons
+                consumer = BeaconStreamConsumer(redis_conn, ALERT_ENGINE_GROUP, start_id=last_id or "$")
+                # Default group names are per process, so clean up after past ones
+                for group in prune_groups(redis_conn, ALERT_ENGINE_GROUP_PREFIX, keep=ALERT_ENGINE_GROUP):
+                    logger.info(f"Destroyed abandoned beacon group {group}")
+                logger.info(f"🔍 Consuming heartbeat stream as {ALERT_ENGINE_GROUP}/{consumer.consumer}...")
+                run_stream(engine, consumer)
         except Exception as e:
             logger.error(f"Alert engine error: {e}")
             time.sleep(2)
 
 if __name__ == "__main__":
     monitor()
-
-
-if __name__ == "__main__":
-    monitor()
-
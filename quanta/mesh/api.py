@@ -1,9 +1,12 @@
 # quanta/mesh/api.py 
 
-from fastapi import FastAPI, Query
+from typing import Optional
+
+from fastapi import FastAPI, Query, HTTPException
 from quanta.mesh.orchestrator import AgentMeshOrchestrator
 from quanta.mesh.mesh_supervisor import MeshSupervisor
 from quanta.mesh.audit_log import MeshAuditLogger
+from quanta.mesh.audit_query import parse_time
 
 app = FastAPI()
 orchestrator = AgentMeshOrchestrator()
@@ -30,12 +33,27 @@ def get_mesh_health():
     }
 
 @app.get("/audit/logs")
-def get_audit_logs(n: int = Query(20, description="Number of log lines")):
-    logs = audit.query(last_n=n)
+def get_audit_logs(
+    n: int = Query(20, description="Number of log lines"),
+    since: Optional[str] = Query(None, description="ISO timestamp (UTC), inclusive"),
+    until: Optional[str] = Query(None, description="ISO timestamp (UTC), inclusive"),
+    event_type: Optional[str] = Query(None, description="e.g. HEARTBEAT, FAILURE"),
+    agent: Optional[str] = Query(None, description="Agent name"),
+):
+    try:
+        start = parse_time(since) if since else None
+        end = parse_time(until) if until else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid timestamp: {e}")
+    logs = audit.query(last_n=n, start=start, end=end, event_type=event_type, agent=agent)
     return {
         "lines": logs
     }
 
+@app.get("/audit/stats")
+def get_audit_stats():
+    return audit.stats()
+
 @app.post("/control/restart/{agent_name}")
 def restart_agent(agent_name: str):
     try:
@@ -0,0 +1,156 @@
+# quanta/mesh/audit_async.py
+#
+# Non-blocking front end for MeshAuditLogger: log_event puts the formatted
+# line on a bounded in-memory queue and returns; a background flusher thread
+# hands batches to the real sink (segment writer or local file).
+#
+# When the queue is full the overflow policy decides what happens:
+#   block       - the caller waits for space (no loss, may stall the caller)
+#   drop_oldest - the oldest queued event is discarded and counted (opt-in:
+#                 an audit trail with holes is only acceptable by choice)
+#   spill       - events go to a local spill file and are replayed, in order,
+#                 once the queue drains (the default: no loss, no stall)
+#
+# close() (also registered with atexit) stops the flusher after draining the
+# queue and any spill file into the sink.
+
+import os
+import atexit
+import tempfile
+import threading
+from collections import deque
+
+AUDIT_QUEUE_MAX_EVENTS = int(os.getenv("QUANTA_AUDIT_QUEUE_MAX_EVENTS", "10000"))
+AUDIT_QUEUE_OVERFLOW = os.getenv("QUANTA_AUDIT_QUEUE_OVERFLOW", "spill")
+AUDIT_FLUSH_BATCH = int(os.getenv("QUANTA_AUDIT_FLUSH_BATCH", "500"))
+AUDIT_CLOSE_TIMEOUT_SEC = float(os.getenv("QUANTA_AUDIT_CLOSE_TIMEOUT_SEC", "10"))
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "spill")
+
+class AsyncAuditQueue:
+    def __init__(self, sink, max_events=AUDIT_QUEUE_MAX_EVENTS, overflow=AUDIT_QUEUE_OVERFLOW,
+                 batch_size=AUDIT_FLUSH_BATCH, spill_path=None, on_close=None):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown audit queue overflow policy {overflow!r}; expected one of {OVERFLOW_POLICIES}")
+        self.sink = sink          # sink(list of lines)
+        self.on_close = on_close  # e.g. flush the sink's own buffer
+        self.max_events = max_events
+        self.overflow = overflow
+        self.batch_size = batch_size
+        self.spill_path = spill_path or os.path.join(
+            tempfile.gettempdir(), f"quanta_audit_spill_{os.getpid()}_{id(self):x}.log"
+        )
+        self.queue = deque()
+        self.cond = threading.Condition()
+        self.spilled_pending = 0  # lines in the spill file not yet replayed
+        self.in_flight = 0
+        self.counters = {"enqueued": 0, "written": 0, "dropped": 0, "spilled": 0, "blocked": 0, "sink_errors": 0}
+        self.keep_running = True
+        self.thread = threading.Thread(target=self._run, name="audit-flusher", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def put(self, line):
+        with self.cond:
+            if not self.keep_running:
+                return False
+            self.counters["enqueued"] += 1
+            if self.spilled_pending:
+                # Keep order: while older events sit in the spill file, newer ones follow them there
+                self._spill(line)
+            elif len(self.queue) < self.max_events:
+                self.queue.append(line)
+            elif self.overflow == "block":
+                self.counters["blocked"] += 1
+                while len(self.queue) >= self.max_events and self.keep_running:
+                    self.cond.wait()
+                self.queue.append(line)
+            elif self.overflow == "drop_oldest":
+                self.queue.popleft()
+                self.counters["dropped"] += 1
+                self.queue.append(line)
+            else:
+                self._spill(line)
+            self.cond.notify_all()
+        return True
+
+    def _spill(self, line):
+        try:
+            with open(self.spill_path, "a") as f:
+                f.write(line if line.endswith("\n") else line + "\n")
+            self.spilled_pending += 1
+            self.counters["spilled"] += 1
+        except OSError as e:
+            print(f"[ERROR] Audit spill write failed, dropping event: {e}")
+            self.counters["dropped"] += 1
+
+    def _take_batch(self):
+        # Caller holds self.cond
+        if self.queue:
+            n = min(self.batch_size, len(self.queue))
+            return [self.queue.popleft() for _ in range(n)]
+        if self.spilled_pending:
+            draining = f"{self.spill_path}.draining"
+            os.replace(self.spill_path, draining)
+            self.spilled_pending = 0
+            with open(draining) as f:
+                lines = f.readlines()
+            os.remove(draining)
+            return lines
+        return []
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while self.keep_running and not self.queue and not self.spilled_pending:
+                    self.cond.wait()
+                batch = self._take_batch()
+                if not batch and not self.keep_running:
+                    return
+                self.in_flight = len(batch)
+                self.cond.notify_all()  # wake producers blocked on a full queue
+            try:
+                self.sink(batch)
+                with self.cond:
+                    self.counters["written"] += len(batch)
+            except Exception as e:
+                print(f"[ERROR] Audit sink write failed for {len(batch)} events: {e}")
+                with self.cond:
+                    self.counters["sink_errors"] += 1
+            finally:
+                with self.cond:
+                    self.in_flight = 0
+                    self.cond.notify_all()
+
+    def pending(self):
+        with self.cond:
+            return list(self.queue)
+
+    def wait_idle(self, timeout=None):
+        """
+        Block until everything queued so far has been handed to the sink.
+        """
+        with self.cond:
+            return self.cond.wait_for(
+                lambda: not self.queue and not self.spilled_pending and not self.in_flight, timeout
+            )
+
+    def stats(self):
+        with self.cond:
+            stats = dict(self.counters)
+            stats["queue_depth"] = len(self.queue)
+            stats["spill_depth"] = self.spilled_pending
+            stats["overflow_policy"] = self.overflow
+        return stats
+
+    def close(self, timeout=AUDIT_CLOSE_TIMEOUT_SEC):
+        with self.cond:
+            if not self.keep_running:
+                return
+        self.wait_idle(timeout)
+        with self.cond:
+            self.keep_running = False
+            self.cond.notify_all()
+        self.thread.join(timeout)
+        if self.on_close:
+            self.on_close()
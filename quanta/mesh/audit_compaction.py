@@ -0,0 +1,175 @@
+# quanta/mesh/audit_compaction.py
+#
+# Rolls a finished day of audit segments into one compressed archive:
+#   {prefix}/archive/YYYY/MM/DD.log.gz          concatenated gzip members
+#   {prefix}/archive/YYYY/MM/DD.index.json      one entry per member
+#
+# Each gzip member holds AUDIT_ARCHIVE_BLOCK_LINES lines and is independently
+# decompressible, so the index (byte offset/length, first line number, time
+# range and the same event type/agent index segments carry) lets
+# audit_query fetch only the blocks a query can match with a ranged GET.
+#
+# Runs of HEARTBEAT events from one agent are collapsed into a single
+#   first_ts | HEARTBEAT_SUMMARY | agent | count=N until=last_ts
+# line. A run ends at a gap longer than AUDIT_HEARTBEAT_GAP_SEC or at any
+# other event from that agent. Every other event is kept verbatim.
+#
+# Once the archive and index are written, the day's segments and manifests
+# are deleted.
+#
+#   python -m quanta.mesh.audit_compaction [YYYY-MM-DD ...]
+
+import os
+import sys
+import gzip
+import json
+import logging
+import datetime
+
+import boto3
+
+from quanta.mesh.audit_segments import day_prefix, list_day_manifests, read_segment, segment_index
+from quanta.mesh.audit_query import parse_line
+
+AUDIT_COMPACT_AFTER_DAYS = int(os.getenv("QUANTA_AUDIT_COMPACT_AFTER_DAYS", "2"))
+AUDIT_HEARTBEAT_GAP_SEC = float(os.getenv("QUANTA_AUDIT_HEARTBEAT_GAP_SEC", "120"))
+AUDIT_ARCHIVE_BLOCK_LINES = int(os.getenv("QUANTA_AUDIT_ARCHIVE_BLOCK_LINES", "10000"))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("audit_compaction")
+
+def archive_keys(prefix, day):
+    base = f"{prefix}/archive/{day:%Y/%m/%d}"
+    return f"{base}.log.gz", f"{base}.index.json"
+
+def collapse_heartbeats(lines, gap_sec=AUDIT_HEARTBEAT_GAP_SEC):
+    """
+    Chronological lines -> chronological lines with per-agent HEARTBEAT runs
+    replaced by HEARTBEAT_SUMMARY lines.
+    """
+    out = []    # (ts string, order, line)
+    runs = {}   # agent -> [first ts string, last datetime, last ts string, count, first line]
+
+    def close(agent):
+        first_ts, _, last_ts, count, first_line = runs.pop(agent)
+        line = first_line if count == 1 else f"{first_ts} | HEARTBEAT_SUMMARY | {agent} | count={count} until={last_ts}"
+        out.append((first_ts, len(out), line))
+
+    for line in lines:
+        ts, event_type, agent, _ = parse_line(line)
+        ts_str = line.split(" | ", 1)[0]
+        if event_type == "HEARTBEAT" and ts is not None:
+            run = runs.get(agent)
+            if run and (ts - run[1]).total_seconds() <= gap_sec:
+                run[1], run[2], run[3] = ts, ts_str, run[3] + 1
+                continue
+            if run:
+                close(agent)
+            runs[agent] = [ts_str, ts, ts_str, 1, line]
+            continue
+        if agent in runs:
+            close(agent)
+        out.append((ts_str, len(out), line))
+    for agent in list(runs):
+        close(agent)
+    out.sort()
+    return [line for _, _, line in out]
+
+def build_archive(lines, block_lines=AUDIT_ARCHIVE_BLOCK_LINES):
+    """
+    Returns (archive bytes, block index entries).
+    """
+    body, blocks = bytearray(), []
+    for start in range(0, len(lines), block_lines):
+        block = lines[start:start + block_lines]
+        data = gzip.compress(("\n".join(block) + "\n").encode("utf-8"))
+        first, last = parse_line(block[0])[0], parse_line(block[-1])[0]
+        blocks.append({
+            "offset": len(body),
+            "length": len(data),
+            "first_line": start,
+            "lines": len(block),
+            "first_ts": first.isoformat() if first else "",
+            "last_ts": last.isoformat() if last else "",
+            "index": segment_index(block),
+        })
+        body.extend(data)
+    return bytes(body), blocks
+
+def compact_day(s3, bucket, prefix, day):
+    """
+    Archive one day's segments. Returns a summary dict, or None if the day has
+    no segments.
+    """
+    entries = list_day_manifests(s3, bucket, prefix, day)
+    if not entries:
+        return None
+    lines, source_bytes = [], 0
+    for entry in entries:
+        lines.extend(line for line in read_segment(s3, bucket, entry["key"]) if line)
+        source_bytes += entry.get("bytes", 0)
+    source_lines = len(lines)
+    lines.sort(key=lambda line: line.split(" | ", 1)[0])
+    lines = collapse_heartbeats(lines)
+    body, blocks = build_archive(lines)
+
+    archive_key, index_key = archive_keys(prefix, day)
+    s3.put_object(Bucket=bucket, Key=archive_key, Body=body, ContentType="application/gzip")
+    index = {
+        "day": f"{day:%Y-%m-%d}",
+        "archive": archive_key,
+        "lines": len(lines),
+        "source_lines": source_lines,
+        "source_bytes": source_bytes,
+        "bytes": len(body),
+        "blocks": blocks,
+    }
+    # The index is written last: a day with an index is fully archived
+    s3.put_object(Bucket=bucket, Key=index_key, Body=json.dumps(index).encode("utf-8"))
+
+    stale = [entry["key"] for entry in entries]
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=f"{day_prefix(prefix, day)}/manifest-"):
+        stale.extend(obj["Key"] for obj in page.get("Contents", []))
+    for key in stale:
+        s3.delete_object(Bucket=bucket, Key=key)
+
+    summary = {k: index[k] for k in ("day", "lines", "source_lines", "source_bytes", "bytes")}
+    summary["ratio"] = round(source_bytes / len(body), 1) if body else 0.0
+    return summary
+
+def days_to_compact(s3, bucket, prefix, after_days=AUDIT_COMPACT_AFTER_DAYS):
+    """
+    Days with live segments that are at least after_days old.
+    """
+    cutoff = datetime.datetime.utcnow().date() - datetime.timedelta(days=after_days)
+    days = set()
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=f"{prefix}/"):
+        for obj in page.get("Contents", []):
+            parts = obj["Key"][len(prefix) + 1:].split("/")
+            if len(parts) != 4 or not parts[3].startswith("manifest-"):
+                continue  # archive objects and segments
+            try:
+                day = datetime.date(int(parts[0]), int(parts[1]), int(parts[2]))
+            except ValueError:
+                continue
+            if day <= cutoff:
+                days.add(day)
+    return sorted(days)
+
+def main(days=None):
+    bucket = os.environ["QUANTA_AUDIT_S3_BUCKET"]
+    prefix = os.path.splitext(os.getenv("QUANTA_AUDIT_S3_KEY", "mesh_audit.log"))[0]
+    s3 = boto3.client("s3", region_name=os.environ.get("AWS_DEFAULT_REGION"))
+    if days:
+        days = [datetime.date.fromisoformat(day) for day in days]
+    else:
+        days = days_to_compact(s3, bucket, prefix)
+    for day in days:
+        summary = compact_day(s3, bucket, prefix, day)
+        if summary:
+            logger.info(f"[AUDIT COMPACTION] {summary}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -7,8 +7,18 @@ import datetime
 import boto3
 from botocore.exceptions import NoCredentialsError, ClientError
 
+from quanta.mesh.audit_segments import SegmentedAuditLog
+from quanta.mesh.audit_query import AuditFilter, SegmentReader, tail_file
+from quanta.mesh.audit_async import AsyncAuditQueue
+
+# "async": log_event only enqueues and a background thread writes;
+# "sync": log_event writes (or buffers into a segment) on the caller's thread.
+# A full async queue spills to local disk unless QUANTA_AUDIT_QUEUE_OVERFLOW
+# (or overflow=) says otherwise; nothing is dropped by default.
+AUDIT_MODE = os.getenv("QUANTA_AUDIT_MODE", "async")
+
 class MeshAuditLogger:
-    def __init__(self, s3_key="mesh_audit.log"):
+    def __init__(self, s3_key="mesh_audit.log", mode=None, overflow=None):
         self.use_s3 = False
         self.s3_key = s3_key
         self.lock = threading.Lock()
@@ -22,6 +32,10 @@ class MeshAuditLogger:
                 self.s3.head_bucket(Bucket=bucket)
                 self.bucket = bucket
                 self.use_s3 = True
+                # s3_key "mesh_audit.log" -> segments under mesh_audit/YYYY/MM/DD/
+                self.prefix = os.path.splitext(s3_key)[0]
+                self.segments = SegmentedAuditLog(self.s3, bucket, prefix=self.prefix)
+                self.reader = SegmentReader(self.s3, bucket, self.prefix)
             except (NoCredentialsError, ClientError) as e:
                 print(f"[WARN] S3 logging disabled: {e}. Falling back to local logging.")
                 self.use_s3 = False
@@ -32,39 +46,70 @@ class MeshAuditLogger:
             os.makedirs(logdir, exist_ok=True)
             self.filename = os.path.join(logdir, "mesh_audit.log")
 
+        self.queue = None
+        if (mode or AUDIT_MODE) == "async":
+            kwargs = {"overflow": overflow} if overflow else {}
+            self.queue = AsyncAuditQueue(self._write_lines, on_close=self._flush_sink, **kwargs)
+
     def log_event(self, event_type, agent, detail=""):
         entry = f"{datetime.datetime.utcnow().isoformat()} | {event_type.upper()} | {agent} | {detail}\n"
+        if self.queue is not None:
+            self.queue.put(entry)
+        else:
+            self._write_lines([entry])
+
+    def _write_lines(self, lines):
+        if self.use_s3:
+            # Buffered; flushed as an immutable segment by size or age
+            for line in lines:
+                self.segments.append(line)
+            return
         with self.lock:
-            if self.use_s3:
-                try:
-                    # Download, append, upload (simple approach)
-                    try:
-                        obj = self.s3.get_object(Bucket=self.bucket, Key=self.s3_key)
-                        old_logs = obj["Body"].read().decode("utf-8")
-                    except self.s3.exceptions.NoSuchKey:
-                        old_logs = ""
-                    new_logs = old_logs + entry
-                    self.s3.put_object(Bucket=self.bucket, Key=self.s3_key, Body=new_logs.encode("utf-8"))
-                except Exception as e:
-                    print(f"[ERROR] Failed S3 log write: {e}")
-            else:
-                with open(self.filename, "a") as f:
-                    f.write(entry)
+            with open(self.filename, "a") as f:
+                f.writelines(lines)
+
+    def _flush_sink(self):
+        if self.use_s3:
+            self.segments.flush()
 
-    def query(self, last_n=100):
+    def flush(self, timeout=None):
+        """
+        Write out everything logged so far (queued events and any partial segment).
+        """
+        if self.queue is not None:
+            self.queue.wait_idle(timeout)
+        self._flush_sink()
+
+    def close(self):
+        if self.queue is not None:
+            self.queue.close()
+        else:
+            self._flush_sink()
+
+    def stats(self):
+        """
+        Queue depth and dropped/spilled counters (async mode only).
+        """
+        if self.queue is None:
+            return {"mode": "sync"}
+        return dict(self.queue.stats(), mode="async")
+
+    def query(self, last_n=100, start=None, end=None, event_type=None, agent=None):
+        """
+        Last last_n lines (oldest first), optionally limited to a time range
+        (naive UTC datetimes), an event type and/or an agent.
+        """
+        audit_filter = AuditFilter(start=start, end=end, event_type=event_type, agent=agent)
+        if self.use_s3:
+            try:
+                pending = self.segments.pending() + (self.queue.pending() if self.queue else [])
+                return self.reader.query(last_n, audit_filter, pending=pending)
+            except Exception as e:
+                print(f"[ERROR] Failed S3 log read: {e}")
+                return []
         with self.lock:
-            if self.use_s3:
-                try:
-                    obj = self.s3.get_object(Bucket=self.bucket, Key=self.s3_key)
-                    lines = obj["Body"].read().decode("utf-8").splitlines()
-                    return lines[-last_n:]
-                except self.s3.exceptions.NoSuchKey:
-                    return []
-                except Exception as e:
-                    print(f"[ERROR] Failed S3 log read: {e}")
-                    return []
-            else:
-                if not os.path.exists(self.filename):
-                    return []
-                with open(self.filename, "r") as f:
-                    return f.readlines()[-last_n:]
+            lines = tail_file(self.filename, last_n, audit_filter)
+        if self.queue is not None:
+            # Events still queued are newer than anything in the file
+            lines += [line.rstrip("\n") for line in self.queue.pending() if audit_filter.matches(line)]
+        return lines[-last_n:] if last_n > 0 else []
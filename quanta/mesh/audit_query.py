@@ -0,0 +1,241 @@
+# quanta/mesh/audit_query.py
+#
+# Tail and filtered queries over the mesh audit log without reading it whole.
+#
+# Local file: lines are read backwards from the end in fixed-size blocks, so
+#             the last N lines cost O(N) regardless of file size.
+# S3 segments: days and segments are walked newest first using the writers'
+#             manifests. Each manifest entry carries a small index (time range,
+#             per-event-type counts, agents), so segments that cannot match a
+#             filter are skipped without being fetched. Segments are immutable,
+#             so their lines are kept in an in-process LRU.
+# Archives:   days compacted by audit_compaction are read through their block
+#             index, fetching only matching gzip blocks with ranged GETs.
+
+import os
+import gzip
+import heapq
+import json
+import time
+import datetime
+import threading
+from collections import OrderedDict
+
+from quanta.mesh.audit_segments import list_day_manifests, read_segment
+
+AUDIT_QUERY_MAX_DAYS = int(os.getenv("QUANTA_AUDIT_QUERY_MAX_DAYS", "7"))
+AUDIT_SEGMENT_CACHE_ENTRIES = int(os.getenv("QUANTA_AUDIT_SEGMENT_CACHE_ENTRIES", "256"))
+# Today's manifests change as segments are flushed; older days' rarely do
+AUDIT_MANIFEST_TTL_SEC = float(os.getenv("QUANTA_AUDIT_MANIFEST_TTL_SEC", "5"))
+AUDIT_PAST_MANIFEST_TTL_SEC = float(os.getenv("QUANTA_AUDIT_PAST_MANIFEST_TTL_SEC", "3600"))
+
+BLOCK_SIZE = 64 * 1024
+
+def parse_line(line):
+    """
+    "ts | TYPE | agent | detail" -> (datetime or None, TYPE, agent, detail)
+    """
+    parts = line.rstrip("\n").split(" | ", 3)
+    parts += [""] * (4 - len(parts))
+    try:
+        ts = datetime.datetime.fromisoformat(parts[0])
+    except ValueError:
+        ts = None
+    return ts, parts[1], parts[2], parts[3]
+
+def naive_utc(value):
+    """
+    Audit timestamps are naive UTC; convert aware datetimes to match.
+    """
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value
+
+def parse_time(value):
+    """
+    ISO timestamp (naive = UTC; "Z" or an offset are converted) -> naive UTC
+    datetime. Raises ValueError if unparseable.
+    """
+    if value.endswith(("Z", "z")):
+        value = value[:-1] + "+00:00"
+    return naive_utc(datetime.datetime.fromisoformat(value))
+
+class AuditFilter:
+    def __init__(self, start=None, end=None, event_type=None, agent=None):
+        self.start = naive_utc(start)
+        self.end = naive_utc(end)
+        self.event_type = event_type.upper() if event_type else None
+        # Compacted history stores heartbeat runs as HEARTBEAT_SUMMARY lines
+        self.event_types = {self.event_type, f"{self.event_type}_SUMMARY"} if self.event_type == "HEARTBEAT" \
+            else {self.event_type}
+        self.agent = agent
+
+    def matches(self, line):
+        ts, event_type, agent, _ = parse_line(line)
+        if self.event_type and event_type not in self.event_types:
+            return False
+        if self.agent and agent != self.agent:
+            return False
+        if ts is not None:
+            if self.start and ts < self.start:
+                return False
+            if self.end and ts > self.end:
+                return False
+        return True
+
+    def before_start(self, line):
+        # Lines are chronological, so a backwards scan can stop here
+        ts = parse_line(line)[0]
+        return bool(self.start and ts and ts < self.start)
+
+    def may_match_segment(self, entry):
+        if self.start and entry["last_ts"] < self.start.isoformat():
+            return False
+        if self.end and entry["first_ts"] > self.end.isoformat():
+            return False
+        index = entry.get("index")
+        if not index:
+            return True  # segment written before indexing; read it
+        if self.event_type and not self.event_types.intersection(index.get("types", {})):
+            return False
+        agents = index.get("agents")
+        if self.agent and agents is not None and self.agent not in agents:
+            return False
+        return True
+
+def reverse_lines(path, block_size=BLOCK_SIZE):
+    """
+    Yield the lines of a text file last to first, without trailing newlines.
+    """
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b""
+        while position > 0:
+            read = min(block_size, position)
+            position -= read
+            f.seek(position)
+            chunk = f.read(read) + remainder
+            lines = chunk.split(b"\n")
+            remainder = lines.pop(0)  # may be the tail of an earlier line
+            for line in reversed(lines):
+                if line:
+                    yield line.decode("utf-8", errors="replace")
+        if remainder:
+            yield remainder.decode("utf-8", errors="replace")
+
+def tail_file(path, last_n, audit_filter=None):
+    if last_n <= 0 or not os.path.exists(path):
+        return []
+    audit_filter = audit_filter or AuditFilter()
+    lines = []
+    for line in reverse_lines(path):
+        if audit_filter.before_start(line):
+            break
+        if audit_filter.matches(line):
+            lines.append(line)
+            if len(lines) >= last_n:
+                break
+    lines.reverse()
+    return lines
+
+def keep_cutoff(lines, last_n):
+    """
+    Timestamp of the oldest line that would survive a last_n cut, or None
+    while fewer than last_n lines are collected.
+    """
+    if len(lines) < last_n:
+        return None
+    return heapq.nlargest(last_n, (line.split(" | ", 1)[0] for line in lines))[-1]
+
+class SegmentReader:
+    def __init__(self, s3, bucket, prefix, max_entries=AUDIT_SEGMENT_CACHE_ENTRIES):
+        self.s3 = s3
+        self.bucket = bucket
+        self.prefix = prefix
+        self.max_entries = max_entries
+        self.segments = OrderedDict()  # (key, archive block offset) -> lines
+        self.manifests = {}  # date -> (entries, fetched_at)
+        self.lock = threading.Lock()
+
+    def archive_entries(self, day):
+        """
+        Block entries of a compacted day (each with key/offset/length), or None.
+        """
+        base = f"{self.prefix}/archive/{day:%Y/%m/%d}"
+        try:
+            obj = self.s3.get_object(Bucket=self.bucket, Key=f"{base}.index.json")
+        except self.s3.exceptions.NoSuchKey:
+            return None
+        index = json.loads(obj["Body"].read())
+        return [dict(block, key=index["archive"]) for block in index["blocks"]]
+
+    def day_entries(self, day):
+        today = datetime.datetime.utcnow().date()
+        ttl = AUDIT_MANIFEST_TTL_SEC if day.date() >= today else AUDIT_PAST_MANIFEST_TTL_SEC
+        with self.lock:
+            cached = self.manifests.get(day.date())
+            if cached and time.time() - cached[1] < ttl:
+                return cached[0]
+        # Past days may have been compacted; an archive index means the day is complete
+        entries = self.archive_entries(day) if day.date() < today else None
+        if entries is None:
+            entries = list_day_manifests(self.s3, self.bucket, self.prefix, day)
+        with self.lock:
+            self.manifests[day.date()] = (entries, time.time())
+            if len(self.manifests) > AUDIT_QUERY_MAX_DAYS * 2:
+                del self.manifests[min(self.manifests)]
+        return entries
+
+    def segment_lines(self, entry):
+        cache_key = (entry["key"], entry.get("offset"))
+        with self.lock:
+            lines = self.segments.get(cache_key)
+            if lines is not None:
+                self.segments.move_to_end(cache_key)
+                return lines
+        if "offset" in entry:
+            end = entry["offset"] + entry["length"] - 1
+            obj = self.s3.get_object(Bucket=self.bucket, Key=entry["key"], Range=f"bytes={entry['offset']}-{end}")
+            lines = gzip.decompress(obj["Body"].read()).decode("utf-8").splitlines()
+        else:
+            lines = read_segment(self.s3, self.bucket, entry["key"])
+        with self.lock:
+            self.segments[cache_key] = lines
+            while len(self.segments) > self.max_entries:
+                self.segments.popitem(last=False)
+        return lines
+
+    def query(self, last_n, audit_filter=None, pending=(), max_days=AUDIT_QUERY_MAX_DAYS):
+        """
+        Last last_n matching lines, oldest first. pending holds lines not yet
+        flushed to a segment.
+        """
+        if last_n <= 0:
+            return []
+        audit_filter = audit_filter or AuditFilter()
+        lines = [line.rstrip("\n") for line in pending if audit_filter.matches(line)]
+        cutoff = keep_cutoff(lines, last_n)
+        day = audit_filter.end or datetime.datetime.utcnow()
+        if audit_filter.start:
+            # An explicit range may reach back past max_days into archived history
+            max_days = max(max_days, (day.date() - audit_filter.start.date()).days + 1)
+        for _ in range(max_days):
+            if cutoff is not None and cutoff >= f"{day.date() + datetime.timedelta(days=1)}":
+                break  # everything on this day and earlier is older than the lines kept
+            if audit_filter.start and day.date() < audit_filter.start.date():
+                break
+            for entry in reversed(self.day_entries(day)):
+                # Entries are ordered by first_ts, but another writer's segment that
+                # starts earlier can still end after lines already collected: keep
+                # reading any segment that could hold one of the last_n newest lines
+                if cutoff is not None and entry["last_ts"] < cutoff:
+                    continue
+                if not audit_filter.may_match_segment(entry):
+                    continue
+                lines.extend(line for line in self.segment_lines(entry) if audit_filter.matches(line))
+                cutoff = keep_cutoff(lines, last_n)
+            day -= datetime.timedelta(days=1)
+        # Segments from different writers interleave; ISO timestamps sort chronologically
+        lines.sort(key=lambda line: line.split(" | ", 1)[0])
+        return lines[-last_n:]
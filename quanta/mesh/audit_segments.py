@@ -0,0 +1,198 @@
+# quanta/mesh/audit_segments.py
+#
+# Append-only segmented audit log on S3.
+#
+# Events are buffered in memory and flushed as immutable segment objects,
+#   {prefix}/YYYY/MM/DD/HH-{seq:06d}-{writer}.log
+# bounded by size (QUANTA_AUDIT_SEGMENT_MAX_KB) and age
+# (QUANTA_AUDIT_SEGMENT_MAX_SEC). A segment never spans an hour boundary.
+#
+# Each writer (one per MeshAuditLogger instance) keeps its own per-day
+# manifest, {prefix}/YYYY/MM/DD/manifest-{writer}.json, listing its segments
+# in order with their time range, line count and a small index (event type
+# counts and agents) used by audit_query to skip segments. Writers never
+# touch each other's objects, so no cross-process locking is needed; readers
+# merge the day's manifests by timestamp.
+
+import os
+import json
+import time
+import uuid
+import atexit
+import socket
+import datetime
+import threading
+
+AUDIT_SEGMENT_MAX_KB = int(os.getenv("QUANTA_AUDIT_SEGMENT_MAX_KB", "256"))
+AUDIT_SEGMENT_MAX_SEC = float(os.getenv("QUANTA_AUDIT_SEGMENT_MAX_SEC", "60"))
+# Past this many distinct agents a segment's index stops listing them
+AUDIT_INDEX_MAX_AGENTS = 256
+# Days whose manifests stay in memory; lines can arrive late for a past day
+AUDIT_OPEN_DAYS = 3
+
+def day_prefix(prefix, ts):
+    return f"{prefix}/{ts:%Y/%m/%d}"
+
+def segment_index(lines):
+    types, agents = {}, set()
+    for line in lines:
+        parts = line.split(" | ", 3)
+        if len(parts) < 3:
+            continue
+        types[parts[1]] = types.get(parts[1], 0) + 1
+        agents.add(parts[2])
+    return {
+        "types": types,
+        "agents": sorted(agents) if len(agents) <= AUDIT_INDEX_MAX_AGENTS else None,
+    }
+
+def entry_timestamp(line):
+    # "2026-10-18T14:03:11.123456 | HEARTBEAT | agent | detail"
+    try:
+        return datetime.datetime.fromisoformat(line.split(" | ", 1)[0])
+    except ValueError:
+        return None
+
+class SegmentedAuditLog:
+    def __init__(self, s3, bucket, prefix="mesh_audit", max_bytes=AUDIT_SEGMENT_MAX_KB * 1024,
+                 max_age_sec=AUDIT_SEGMENT_MAX_SEC, writer_id=None, flush_thread=True):
+        self.s3 = s3
+        self.bucket = bucket
+        self.prefix = prefix.rstrip("/")
+        self.max_bytes = max_bytes
+        self.max_age_sec = max_age_sec
+        self.writer_id = writer_id or f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+        self.lock = threading.Lock()        # guards the buffer
+        self.flush_lock = threading.Lock()  # serializes segment/manifest writes
+        self.buffer = []
+        self.buffer_bytes = 0
+        self.buffer_hour = None
+        self.buffer_started = None
+        self.seq = 0
+        self.manifests = {}  # day prefix -> this writer's segment entries for that day
+        self.keep_running = True
+        self.thread = None
+        if flush_thread and max_age_sec > 0:
+            self.thread = threading.Thread(target=self._flush_loop, daemon=True)
+            self.thread.start()
+        atexit.register(self.close)
+
+    def append(self, line, ts=None):
+        """
+        Buffer one event line. Costs at most one bounded segment PUT, however
+        old the log is.
+        """
+        ts = ts or entry_timestamp(line) or datetime.datetime.utcnow()
+        hour = ts.replace(minute=0, second=0, microsecond=0)
+        if self.buffer_hour is not None and hour != self.buffer_hour:
+            self.flush()
+        with self.lock:
+            if not self.buffer:
+                self.buffer_hour = hour
+                self.buffer_started = time.time()
+            self.buffer.append(line if line.endswith("\n") else line + "\n")
+            self.buffer_bytes += len(line)
+            full = self.buffer_bytes >= self.max_bytes
+        if full:
+            self.flush()
+
+    def pending(self):
+        with self.lock:
+            return list(self.buffer)
+
+    def flush(self):
+        """
+        Write buffered lines as one new segment and record it in the manifest.
+        """
+        with self.flush_lock:
+            with self.lock:
+                lines, hour = self.buffer, self.buffer_hour
+                self.buffer, self.buffer_bytes = [], 0
+                self.buffer_hour = self.buffer_started = None
+            if not lines:
+                return None
+            try:
+                return self._write_segment(lines, hour)
+            except Exception as e:
+                print(f"[ERROR] Failed S3 audit segment write: {e}")
+                with self.lock:
+                    # Keep the lines for the next flush, ahead of anything newer
+                    self.buffer = lines + self.buffer
+                    self.buffer_bytes = sum(len(l) for l in self.buffer)
+                    self.buffer_hour = hour
+                    self.buffer_started = self.buffer_started or time.time()
+                return None
+
+    def _write_segment(self, lines, hour):
+        day = day_prefix(self.prefix, hour)
+        entries = self._manifest(day)
+        seq = self.seq + 1
+        key = f"{day}/{hour:%H}-{seq:06d}-{self.writer_id}.log"
+        body = "".join(lines).encode("utf-8")
+        self.s3.put_object(Bucket=self.bucket, Key=key, Body=body)
+        self.seq = seq
+        first, last = entry_timestamp(lines[0]), entry_timestamp(lines[-1])
+        entries.append({
+            "key": key,
+            "seq": seq,
+            "first_ts": (first or hour).isoformat(),
+            "last_ts": (last or hour).isoformat(),
+            "lines": len(lines),
+            "bytes": len(body),
+            "index": segment_index(lines),
+        })
+        self._save_manifest(day, entries)
+        return key
+
+    def _manifest_key(self, day):
+        return f"{day}/manifest-{self.writer_id}.json"
+
+    def _manifest(self, day):
+        if day not in self.manifests:
+            # A day we dropped from memory (or wrote before a restart with the
+            # same writer id) may already have segments: extend, never replace
+            self.manifests[day] = self._load_manifest(day)
+            for old in sorted(self.manifests)[:-AUDIT_OPEN_DAYS]:
+                if old != day:
+                    del self.manifests[old]
+        return self.manifests[day]
+
+    def _load_manifest(self, day):
+        try:
+            obj = self.s3.get_object(Bucket=self.bucket, Key=self._manifest_key(day))
+        except self.s3.exceptions.NoSuchKey:
+            return []
+        return json.loads(obj["Body"].read()).get("segments", [])
+
+    def _save_manifest(self, day, entries):
+        body = json.dumps({"writer": self.writer_id, "segments": entries})
+        self.s3.put_object(Bucket=self.bucket, Key=self._manifest_key(day), Body=body.encode("utf-8"))
+
+    def _flush_loop(self):
+        while self.keep_running:
+            time.sleep(min(1.0, self.max_age_sec))
+            with self.lock:
+                due = self.buffer and time.time() - self.buffer_started >= self.max_age_sec
+            if due:
+                self.flush()
+
+    def close(self):
+        self.keep_running = False
+        self.flush()
+
+def list_day_manifests(s3, bucket, prefix, day):
+    """
+    Segment entries from every writer's manifest for one day, oldest first.
+    """
+    day = day_prefix(prefix.rstrip("/"), day)
+    entries = []
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=f"{day}/manifest-"):
+        for obj in page.get("Contents", []):
+            data = json.loads(s3.get_object(Bucket=bucket, Key=obj["Key"])["Body"].read())
+            entries.extend(data.get("segments", []))
+    entries.sort(key=lambda e: (e["first_ts"], e["key"]))
+    return entries
+
+def read_segment(s3, bucket, key):
+    return s3.get_object(Bucket=bucket, Key=key)["Body"].read().decode("utf-8").splitlines()
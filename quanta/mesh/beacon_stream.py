@@ -0,0 +1,169 @@
+# quanta/mesh/beacon_stream.py
+#
+# Durable transport for mesh health beacons.
+#
+# Beacons are appended to a capped Redis Stream instead of being published to
+# a pub/sub channel, so consumers that restart pick up where they left off.
+# Each consumer type reads through its own consumer group:
+#   health_registry - may run several instances; each beacon goes to one of them
+#   alert_engine    - tracks every agent's deadline, so each instance needs the
+#                     full stream: every instance reads through its own group
+#                     (alert_engine-{consumer} by default). A new group starts at
+#                     the stream tail, after the engine seeds deadlines from
+#                     recent_beacons, rather than replaying the whole stream.
+#                     Groups left behind by instances that are gone are destroyed
+#                     by prune_groups once all their consumers have been idle for
+#                     BEACON_GROUP_GC_IDLE_MS.
+#
+# Entries are acked only after the handler returns; on restart a consumer
+# first replays its own unacked entries, and entries left pending by a
+# consumer that died are claimed after BEACON_CLAIM_IDLE_MS.
+#
+# BEACON_TRANSPORT=pubsub keeps the old channel; "both" writes to both while
+# consumers migrate.
+
+import os
+import json
+import time
+import socket
+import logging
+
+import redis
+
+BEACON_STREAM = os.getenv("BEACON_STREAM_KEY", "quanta:health_beacons:stream")
+BEACON_CHANNEL = "quanta:health_beacons"
+BEACON_STREAM_MAXLEN = int(os.getenv("BEACON_STREAM_MAXLEN", "100000"))
+BEACON_TRANSPORT = os.getenv("BEACON_TRANSPORT", "stream")
+BEACON_CLAIM_IDLE_MS = int(os.getenv("BEACON_CLAIM_IDLE_MS", "60000"))
+BEACON_GROUP_GC_IDLE_MS = int(os.getenv("BEACON_GROUP_GC_IDLE_MS", str(24 * 3600 * 1000)))
+CONSUMER_NAME = os.getenv("BEACON_CONSUMER", f"{socket.gethostname()}-{os.getpid()}")
+
+def publish_beacon(r, beacon, pipe=None):
+    data = json.dumps(beacon)
+    target = pipe or r.pipeline(transaction=False)
+    if BEACON_TRANSPORT in ("stream", "both"):
+        # Approximate trimming lets Redis drop whole nodes, keeping XADD O(1)
+        target.xadd(BEACON_STREAM, {"data": data}, maxlen=BEACON_STREAM_MAXLEN, approximate=True)
+    if BEACON_TRANSPORT in ("pubsub", "both"):
+        target.publish(BEACON_CHANNEL, data)
+    if pipe is None:
+        target.execute()
+
+def ensure_group(r, group, start_id="0"):
+    try:
+        r.xgroup_create(BEACON_STREAM, group, id=start_id, mkstream=True)
+    except redis.exceptions.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+def recent_beacons(r, since_sec, count=1000):
+    """
+    (last entry id, [beacon]) for stream entries from the last since_sec
+    seconds, oldest first; the id is None when there are none.
+    """
+    last_id, beacons = None, []
+    start = f"{int((time.time() - since_sec) * 1000)}-0"
+    while True:
+        entries = r.xrange(BEACON_STREAM, min=start, max="+", count=count)
+        if not entries:
+            break
+        last_id = _decode(entries[-1][0])
+        beacons.extend(beacon for _, beacon in decode_entries(entries) if beacon is not None)
+        if len(entries) < count:
+            break
+        ms, seq = last_id.split("-")
+        start = f"{ms}-{int(seq) + 1}"
+    return last_id, beacons
+
+def prune_groups(r, prefix, keep, max_idle_ms=BEACON_GROUP_GC_IDLE_MS):
+    """
+    Destroy groups named prefix* (other than keep) whose consumers have all
+    been idle for max_idle_ms. Returns the destroyed group names.
+
+    A group with no consumers yet is left alone: a peer that has just created
+    it has not read through it so far.
+    """
+    destroyed = []
+    try:
+        groups = r.xinfo_groups(BEACON_STREAM)
+    except redis.exceptions.ResponseError:
+        return destroyed  # no stream yet
+    for group in groups:
+        name = _decode(group["name"])
+        if name == keep or not name.startswith(prefix):
+            continue
+        consumers = r.xinfo_consumers(BEACON_STREAM, name)
+        if consumers and all(consumer["idle"] >= max_idle_ms for consumer in consumers):
+            r.xgroup_destroy(BEACON_STREAM, name)
+            destroyed.append(name)
+    return destroyed
+
+def decode_entries(entries):
+    beacons = []
+    for entry_id, fields in entries:
+        try:
+            beacons.append((entry_id, json.loads(fields[b"data"])))
+        except Exception as e:
+            logging.error(f"[BEACON STREAM] Bad beacon entry {entry_id}: {e}")
+            beacons.append((entry_id, None))
+    return beacons
+
+class BeaconStreamConsumer:
+    """
+    Reads batches for one consumer in a group: own pending entries first,
+    then (every claim_idle_ms) entries claimed from dead consumers, then new ones.
+    """
+    def __init__(self, r, group, consumer=CONSUMER_NAME, count=500, claim_idle_ms=BEACON_CLAIM_IDLE_MS,
+                 start_id="0"):
+        self.r = r
+        self.group = group
+        self.consumer = consumer
+        self.count = count
+        self.claim_idle_ms = claim_idle_ms
+        self.replaying = True  # replay our own unacked entries first
+        self.pending_cursor = "0"
+        self.claim_cursor = "0-0"
+        self.last_claim = 0.0
+        # start_id only applies when the group does not exist yet
+        ensure_group(r, group, start_id)
+
+    def read(self, block_ms):
+        """
+        Returns [(entry id, beacon or None)], possibly empty after block_ms.
+        """
+        if self.replaying:
+            resp = self.r.xreadgroup(self.group, self.consumer, {BEACON_STREAM: self.pending_cursor}, count=self.count)
+            entries = resp[0][1] if resp else []
+            if entries:
+                self.pending_cursor = entries[-1][0]
+                return decode_entries(entries)
+            self.replaying = False
+        if time.time() - self.last_claim >= self.claim_idle_ms / 1000:
+            self.last_claim = time.time()
+            claimed = self.claim()
+            if claimed:
+                return claimed
+        resp = self.r.xreadgroup(self.group, self.consumer, {BEACON_STREAM: ">"},
+                                 count=self.count, block=max(1, int(block_ms)))
+        return decode_entries(resp[0][1] if resp else [])
+
+    def claim(self):
+        try:
+            resp = self.r.xautoclaim(BEACON_STREAM, self.group, self.consumer, self.claim_idle_ms,
+                                     start_id=self.claim_cursor, count=self.count)
+        except redis.exceptions.ResponseError:
+            return []  # XAUTOCLAIM needs Redis 6.2+
+        self.claim_cursor, entries = resp[0], resp[1]
+        return decode_entries([entry for entry in entries if entry and entry[1]])
+
+    def ack(self, entry_ids):
+        if entry_ids:
+            self.r.xack(BEACON_STREAM, self.group, *entry_ids)
+
+    def retry_pending(self):
+        # Re-read our own unacked entries on the next read
+        self.replaying = True
+        self.pending_cursor = "0"
@@ -1,11 +1,11 @@
 # quanta/mesh/health_beacon.py
 
 import time
-import json
 import redis
 import psutil
 from datetime import datetime
 from quanta.utils.logger import setup_logger
+from quanta.mesh.beacon_stream import publish_beacon
 
 logger = setup_logger("HealthBeaconAgent")
 
@@ -22,7 +22,7 @@ def emit_heartbeat(agent_name):
         "error_rate": 0.0,  # Placeholder (replace with actual tracking if needed)
         "queue_length": 0   # Placeholder (replace if your agent uses queues)
     }
-    redis_conn.publish("quanta:health_beacons", json.dumps(beacon))
+    publish_beacon(redis_conn, beacon)
     logger.info(f"✅ Heartbeat sent: {beacon}")
 
 if __name__ == "__main__":
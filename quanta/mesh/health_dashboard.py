@@ -1,26 +1,132 @@
 # quanta/mesh/health_dashboard.py
+#
+# Agent health dashboard served from a shared in-process snapshot.
+#
+# One background thread rebuilds the snapshot (a single HGETALL, decoded and
+# serialized once) whenever health_registry announces a flush on
+# HEALTH_UPDATES_CHANNEL, and at least every DASHBOARD_MAX_STALE_SEC in case
+# an announcement is missed. Requests never touch Redis:
+#   GET /dashboard         - the snapshot, with an ETag; If-None-Match -> 304
+#   GET /dashboard/stream  - server-sent events, one per snapshot change
 
-from fastapi import FastAPI
+import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
 from datetime import datetime
+
 import redis
-import json
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+
+from quanta.mesh.health_registry import HEALTH_KEY, HEALTH_UPDATES_CHANNEL
+from quanta.utils.logger import setup_logger
+
+logger = setup_logger("HealthDashboard")
+
+DASHBOARD_MAX_STALE_SEC = float(os.getenv("DASHBOARD_MAX_STALE_SEC", "5"))
+SSE_POLL_SEC = 0.25
+SSE_KEEPALIVE_SEC = 15
 
 app = FastAPI()
 redis_conn = redis.Redis.from_url("redis://localhost:6379")
 
+class DashboardSnapshot:
+    def __init__(self, r, max_stale_sec=DASHBOARD_MAX_STALE_SEC):
+        self.r = r
+        self.max_stale_sec = max_stale_sec
+        self.body = b""
+        self.etag = ""
+        self.version = 0
+        self.lock = threading.Lock()
+        self.started = False
+
+    def refresh(self):
+        raw_data = self.r.hgetall(HEALTH_KEY)
+        parsed = {
+            agent.decode(): json.loads(payload.decode())
+            for agent, payload in sorted(raw_data.items())
+        }
+        agents_json = json.dumps(parsed, sort_keys=True)
+        etag = '"%s"' % hashlib.sha1(agents_json.encode()).hexdigest()
+        with self.lock:
+            if etag == self.etag:
+                return False
+            body = json.dumps({"timestamp": datetime.utcnow().isoformat(), "agents": parsed})
+            self.body, self.etag = body.encode(), etag
+            self.version += 1
+        return True
+
+    def get(self):
+        self.ensure_started()
+        with self.lock:
+            return self.body, self.etag, self.version
+
+    def ensure_started(self):
+        with self.lock:
+            if self.started:
+                return
+            self.started = True
+        # The watcher keeps retrying even if this first refresh fails
+        threading.Thread(target=self._watch, daemon=True).start()
+        # Build the first snapshot synchronously so the first request has data
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.error(f"Initial snapshot failed, watcher will retry: {e}")
+
+    def _watch(self):
+        while True:
+            try:
+                pubsub = self.r.pubsub()
+                pubsub.subscribe(HEALTH_UPDATES_CHANNEL)
+                # Catch up on anything missed while (re)subscribing
+                self.refresh()
+                while True:
+                    # Wakes on an announcement, or after max_stale_sec regardless
+                    message = pubsub.get_message(ignore_subscribe_messages=True, timeout=self.max_stale_sec)
+                    # Coalesce a burst of announcements into one rebuild
+                    while message is not None:
+                        message = pubsub.get_message(ignore_subscribe_messages=True, timeout=0)
+                    self.refresh()
+            except Exception as e:
+                logger.error(f"Snapshot refresh error: {e}")
+                time.sleep(2)
+
+snapshot = DashboardSnapshot(redis_conn)
+
 @app.get("/dashboard")
-def get_dashboard():
-    raw_data = redis_conn.hgetall("quanta:agent_health")
-    parsed = {
-        agent.decode(): json.loads(payload.decode())
-        for agent, payload in raw_data.items()
-    }
-    return {
-        "timestamp": datetime.utcnow().isoformat(),
-        "agents": parsed
-    }
+def get_dashboard(request: Request):
+    body, etag, _ = snapshot.get()
+    if not etag:
+        return Response(status_code=503, headers={"Retry-After": "2"})
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/dashboard/stream")
+async def stream_dashboard(request: Request):
+    # The first snapshot is a blocking HGETALL; keep it off the event loop
+    await run_in_threadpool(snapshot.ensure_started)
+
+    async def events():
+        version, last_sent = None, time.time()
+        while not await request.is_disconnected():
+            body, etag, current = snapshot.get()
+            if etag and current != version:
+                version, last_sent = current, time.time()
+                yield f"id: {etag}\nevent: snapshot\ndata: {body.decode()}\n\n"
+            elif time.time() - last_sent >= SSE_KEEPALIVE_SEC:
+                last_sent = time.time()
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(SSE_POLL_SEC)
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("quanta.mesh.health_dashboard:app", host="0.0.0.0", port=8080)
-
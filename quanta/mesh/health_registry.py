@@ -1,21 +1,37 @@
 # quanta/mesh/health_registry.py
 
+import os
 import redis
 import json
+import time
 import threading
-from datetime import datetime
+from datetime import datetime, timezone
 from quanta.utils.logger import setup_logger
+from quanta.mesh.beacon_stream import BEACON_CHANNEL, BEACON_TRANSPORT, BeaconStreamConsumer
 
 logger = setup_logger("HealthRegistry")
 
 redis_conn = redis.Redis.from_url("redis://localhost:6379")
 
+# Registry instances share one group, so beacons are split between them
+REGISTRY_GROUP = "health_registry"
+
+HEALTH_KEY = "quanta:agent_health"
+# Announced after every flush so dashboards rebuild their snapshot
+HEALTH_UPDATES_CHANNEL = "quanta:agent_health:updated"
+# Beacons are coalesced per agent for this long, then written in one pipeline;
+# 0 writes every beacon as it arrives
+COALESCE_MS = int(os.getenv("HEALTH_REGISTRY_COALESCE_MS", "250"))
+# Per-agent memory/queue time series (a sorted set per agent), trimmed to the
+# retention window on every flush; 0 disables it
+METRICS_RETENTION_SEC = int(os.getenv("HEALTH_REGISTRY_METRICS_RETENTION_SEC", "0"))
+METRICS_KEY_PREFIX = "quanta:agent_metrics:"
+
 # In-memory cache of last known agent states
 agent_health_cache = {}
 
-def store_beacon(beacon):
-    agent = beacon["agent"]
-    data = {
+def health_record(beacon):
+    return {
         "timestamp": beacon["timestamp"],
         "uptime": beacon["uptime"],
         "memory_usage": beacon["memory_usage"],
@@ -23,14 +39,131 @@ def store_beacon(beacon):
         "queue_length": beacon["queue_length"],
         "last_updated": datetime.utcnow().isoformat()
     }
-    redis_conn.hset("quanta:agent_health", agent, json.dumps(data))
-    logger.info(f"✅ Stored health status for {agent}")
+
+class BeaconCoalescer:
+    """
+    Keeps only the latest beacon per agent and flushes them with one
+    pipelined HSET mapping (plus optional metric ZADDs) per window.
+    """
+    def __init__(self, r, window_ms=COALESCE_MS, retention_sec=METRICS_RETENTION_SEC,
+                 on_flushed=None, flush_thread=True):
+        self.r = r
+        self.window = window_ms / 1000
+        self.retention_sec = retention_sec
+        self.on_flushed = on_flushed  # on_flushed(entry ids) once their beacons are stored
+        self.latest = {}              # agent -> health record of its newest beacon
+        self.entry_ids = []
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.counters = {"received": 0, "superseded": 0, "flushes": 0, "written": 0}
+        if flush_thread and self.window > 0:
+            threading.Thread(target=self._flush_loop, daemon=True).start()
+
+    def add(self, beacon, entry_id=None):
+        """
+        Queue a beacon for the next flush. Raises ValueError, before touching
+        any pending state, if the beacon lacks a field the stored record needs.
+        """
+        try:
+            agent = beacon["agent"]
+            record = health_record(beacon)
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Invalid beacon, missing {e}") from e
+        if not isinstance(agent, str) or not agent or not isinstance(record["timestamp"], str):
+            raise ValueError(f"Invalid beacon agent/timestamp: {agent!r}, {record['timestamp']!r}")
+        with self.lock:
+            self.counters["received"] += 1
+            current = self.latest.get(agent)
+            if current is not None:
+                self.counters["superseded"] += 1
+            # ISO timestamps compare chronologically; keep the newest beacon
+            if current is None or record["timestamp"] >= current["timestamp"]:
+                self.latest[agent] = record
+            if entry_id is not None:
+                self.entry_ids.append(entry_id)
+        if self.window <= 0:
+            self.flush()
+
+    def flush(self):
+        with self.flush_lock:
+            with self.lock:
+                latest, entry_ids = self.latest, self.entry_ids
+                self.latest, self.entry_ids = {}, []
+            if latest:
+                pipe = self.r.pipeline(transaction=False)
+                pipe.hset(HEALTH_KEY, mapping={agent: json.dumps(data) for agent, data in latest.items()})
+                if self.retention_sec > 0:
+                    self._add_metrics(pipe, latest)
+                pipe.publish(HEALTH_UPDATES_CHANNEL, len(latest))
+                try:
+                    pipe.execute()
+                except Exception:
+                    with self.lock:
+                        # Put them back unless newer beacons arrived meanwhile
+                        for agent, record in latest.items():
+                            self.latest.setdefault(agent, record)
+                        self.entry_ids = entry_ids + self.entry_ids
+                    raise
+                agent_health_cache.update(latest)
+                with self.lock:
+                    self.counters["flushes"] += 1
+                    self.counters["written"] += len(latest)
+                logger.debug(f"Stored health status for {len(latest)} agents")
+            if entry_ids and self.on_flushed:
+                self.on_flushed(entry_ids)
+
+    def _add_metrics(self, pipe, latest):
+        cutoff = time.time() - self.retention_sec
+        for agent, record in latest.items():
+            try:
+                ts = datetime.fromisoformat(record["timestamp"]).replace(tzinfo=timezone.utc).timestamp()
+            except (TypeError, ValueError):
+                ts = time.time()
+            point = json.dumps({"timestamp": record["timestamp"], "memory_usage": record["memory_usage"],
+                                "queue_length": record["queue_length"]})
+            key = f"{METRICS_KEY_PREFIX}{agent}"
+            pipe.zadd(key, {point: ts})
+            pipe.zremrangebyscore(key, "-inf", cutoff)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.window)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"❌ Failed to flush health statuses: {e}")
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, pending=len(self.latest))
+
+_coalescer = None
+_coalescer_lock = threading.Lock()
+
+def get_coalescer():
+    global _coalescer
+    with _coalescer_lock:
+        if _coalescer is None:
+            _coalescer = BeaconCoalescer(redis_conn)
+        return _coalescer
+
+def store_beacon(beacon):
+    get_coalescer().add(beacon)
+
+def agent_metrics(agent, since=None):
+    """
+    [{timestamp, memory_usage, queue_length}] for one agent, oldest first.
+    """
+    low = since if since is not None else "-inf"
+    return [json.loads(point) for point in redis_conn.zrangebyscore(f"{METRICS_KEY_PREFIX}{agent}", low, "+inf")]
 
 
 def listen():
+    if BEACON_TRANSPORT != "pubsub":
+        return listen_stream()
     pubsub = redis_conn.pubsub()
-    pubsub.subscribe("quanta:health_beacons")
-    logger.info("📡 Listening to Redis channel: quanta:health_beacons")
+    pubsub.subscribe(BEACON_CHANNEL)
+    logger.info(f"📡 Listening to Redis channel: {BEACON_CHANNEL}")
 
     for message in pubsub.listen():
         if message['type'] == 'message':
@@ -40,6 +173,30 @@ def listen():
             except Exception as e:
                 logger.error(f"❌ Failed to parse/store beacon: {e}")
 
+def listen_stream():
+    consumer = BeaconStreamConsumer(redis_conn, REGISTRY_GROUP)
+    # Entries are acked only once the coalesced write containing them lands
+    coalescer = BeaconCoalescer(redis_conn, on_flushed=consumer.ack)
+    logger.info(f"📡 Consuming beacon stream as {REGISTRY_GROUP}/{consumer.consumer}")
+    while True:
+        try:
+            entries = consumer.read(block_ms=5000)
+            for entry_id, beacon in entries:
+                if beacon is None:
+                    consumer.ack([entry_id])
+                    continue
+                try:
+                    coalescer.add(beacon, entry_id)
+                except ValueError as e:
+                    # Redelivering it would fail the same way, so drop it
+                    logger.warning(f"⚠️ Dropping beacon {entry_id}: {e}")
+                    consumer.ack([entry_id])
+        except Exception as e:
+            # Unacked entries stay pending and are re-read
+            logger.error(f"❌ Failed to store beacons from stream: {e}")
+            consumer.retry_pending()
+            time.sleep(2)
+
 if __name__ == "__main__":
     threading.Thread(target=listen).start()
 
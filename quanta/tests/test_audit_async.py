@@ -0,0 +1,52 @@
+# quanta/tests/test_audit_async.py
+
+import threading
+from quanta.mesh.audit_async import AsyncAuditQueue
+
+class GatedSink:
+    """Sink that holds its first batch until released, so the queue fills up."""
+    def __init__(self):
+        self.lines = []
+        self.release = threading.Event()
+
+    def __call__(self, batch):
+        self.release.wait(5)
+        self.lines.extend(line.rstrip("\n") for line in batch)
+
+def fill(queue, n):
+    for i in range(n):
+        queue.put(f"event {i}\n")
+
+def test_drop_oldest_counts_drops(tmp_path):
+    sink = GatedSink()
+    queue = AsyncAuditQueue(sink, max_events=5, overflow="drop_oldest", batch_size=1,
+                            spill_path=str(tmp_path / "spill.log"))
+    fill(queue, 20)
+    stats = queue.stats()
+    assert stats["dropped"] > 0 and stats["queue_depth"] <= 5
+    sink.release.set()
+    queue.close()
+    assert len(sink.lines) + queue.stats()["dropped"] == 20
+    assert sink.lines[-1] == "event 19"
+
+def test_spill_replays_in_order(tmp_path):
+    sink = GatedSink()
+    queue = AsyncAuditQueue(sink, max_events=5, overflow="spill", batch_size=1,
+                            spill_path=str(tmp_path / "spill.log"))
+    fill(queue, 50)
+    assert queue.stats()["spilled"] > 0
+    sink.release.set()
+    queue.close()
+    assert sink.lines == [f"event {i}" for i in range(50)]
+    assert queue.stats()["dropped"] == 0
+
+def test_block_loses_nothing(tmp_path):
+    sink = GatedSink()
+    queue = AsyncAuditQueue(sink, max_events=5, overflow="block", batch_size=2,
+                            spill_path=str(tmp_path / "spill.log"))
+    producer = threading.Thread(target=fill, args=(queue, 30))
+    producer.start()
+    sink.release.set()
+    producer.join(5)
+    queue.close()
+    assert sink.lines == [f"event {i}" for i in range(30)]
@@ -0,0 +1,56 @@
+# quanta/tests/test_audit_compaction.py
+
+import datetime
+from quanta.mesh.audit_compaction import collapse_heartbeats, compact_day, days_to_compact
+from quanta.mesh.audit_query import AuditFilter, SegmentReader
+from quanta.mesh.audit_segments import SegmentedAuditLog
+from quanta.benchmarks.stand_ins import LocalS3
+
+DAY = datetime.datetime(2026, 10, 1)
+
+def day_of_events(agents=5, every_sec=10, hours=6):
+    lines = []
+    for i in range(hours * 3600 // every_sec):
+        ts = DAY + datetime.timedelta(seconds=i * every_sec)
+        for a in range(agents):
+            event_type = "FAILURE" if (i, a) == (100, 2) else "HEARTBEAT"
+            lines.append(f"{ts.isoformat()} | {event_type} | agent_{a} | ")
+    return lines
+
+def test_collapse_heartbeats_keeps_other_events():
+    t = lambda s: (DAY + datetime.timedelta(seconds=s)).isoformat()
+    lines = [
+        f"{t(0)} | HEARTBEAT | a | ",
+        f"{t(10)} | HEARTBEAT | a | ",
+        f"{t(20)} | FAILURE | a | down",
+        f"{t(30)} | HEARTBEAT | a | ",
+        f"{t(1000)} | HEARTBEAT | a | ",
+        f"{t(1010)} | HEARTBEAT | a | ",
+    ]
+    assert collapse_heartbeats(lines, gap_sec=60) == [
+        f"{t(0)} | HEARTBEAT_SUMMARY | a | count=2 until={t(10)}",
+        f"{t(20)} | FAILURE | a | down",
+        lines[3],
+        f"{t(1000)} | HEARTBEAT_SUMMARY | a | count=2 until={t(1010)}",
+    ]
+
+def test_compact_day_shrinks_and_stays_queryable():
+    s3 = LocalS3()
+    log = SegmentedAuditLog(s3, "audit", flush_thread=False)
+    lines = day_of_events()
+    for line in lines:
+        log.append(line + "\n")
+    log.flush()
+
+    assert days_to_compact(s3, "audit", "mesh_audit") == [DAY.date()]
+    summary = compact_day(s3, "audit", "mesh_audit", DAY)
+    assert summary["source_lines"] == len(lines)
+    assert summary["ratio"] >= 10
+    assert days_to_compact(s3, "audit", "mesh_audit") == []
+    assert all("/archive/" in key for key in s3.buckets["audit"][0])
+
+    reader = SegmentReader(s3, "audit", "mesh_audit")
+    failure = AuditFilter(start=DAY, end=DAY + datetime.timedelta(days=1), event_type="failure")
+    assert reader.query(10, failure) == [lines[100 * 5 + 2]]
+    heartbeats = AuditFilter(start=DAY, end=DAY + datetime.timedelta(days=1), event_type="heartbeat", agent="agent_2")
+    assert [line.split(" | ")[1] for line in reader.query(10, heartbeats)] == ["HEARTBEAT_SUMMARY"] * 2
@@ -0,0 +1,93 @@
+# quanta/tests/test_audit_query.py
+
+import datetime
+import pytest
+from quanta.mesh.audit_query import AuditFilter, SegmentReader, tail_file, parse_time
+from quanta.mesh.audit_segments import SegmentedAuditLog, list_day_manifests
+from quanta.benchmarks.stand_ins import LocalS3
+
+START = datetime.datetime(2026, 10, 18, 9, 0, 0)
+
+def make_lines(n):
+    lines = []
+    for i in range(n):
+        ts = START + datetime.timedelta(seconds=i)
+        event_type = "FAILURE" if i % 50 == 0 else "HEARTBEAT"
+        lines.append(f"{ts.isoformat()} | {event_type} | agent_{i % 5} | ")
+    return lines
+
+def test_tail_file_reads_backwards(tmp_path):
+    path = tmp_path / "mesh_audit.log"
+    lines = make_lines(5000)
+    path.write_text("\n".join(lines) + "\n")
+    assert tail_file(str(path), 3) == lines[-3:]
+    failures = tail_file(str(path), 2, AuditFilter(event_type="failure", agent="agent_0"))
+    assert failures == [l for l in lines if "FAILURE" in l][-2:]
+    window = AuditFilter(start=START + datetime.timedelta(seconds=10), end=START + datetime.timedelta(seconds=12))
+    assert tail_file(str(path), 100, window) == lines[10:13]
+
+def test_segment_queries_skip_unmatched_segments():
+    s3 = LocalS3()
+    log = SegmentedAuditLog(s3, "audit", max_bytes=2000, flush_thread=False)
+    lines = make_lines(600)
+    for line in lines:
+        log.append(line + "\n")
+    log.flush()
+
+    reader = SegmentReader(s3, "audit", "mesh_audit")
+    filt = AuditFilter(end=START + datetime.timedelta(hours=1))
+    assert reader.query(5, filt) == lines[-5:]
+
+    gets = s3.calls["get_object"]
+    window = AuditFilter(start=START + datetime.timedelta(seconds=100), end=START + datetime.timedelta(seconds=104))
+    assert reader.query(100, window) == lines[100:105]
+    # Only the segment(s) overlapping the window were fetched (manifests are cached)
+    assert s3.calls["get_object"] - gets <= 2
+
+def test_aware_since_is_compared_as_utc(tmp_path):
+    path = tmp_path / "mesh_audit.log"
+    lines = make_lines(100)
+    path.write_text("\n".join(lines) + "\n")
+    # "Z" and an explicit offset name the same instant as the naive UTC lines
+    since = parse_time((START + datetime.timedelta(seconds=97)).isoformat() + "Z")
+    assert tail_file(str(path), 10, AuditFilter(start=since)) == lines[97:]
+    until = parse_time((START + datetime.timedelta(hours=2, seconds=2)).isoformat() + "+02:00")
+    assert tail_file(str(path), 10, AuditFilter(end=until)) == lines[:3]
+    aware = datetime.datetime(2026, 10, 18, 9, 1, 38, tzinfo=datetime.timezone.utc)
+    assert tail_file(str(path), 10, AuditFilter(start=aware)) == lines[98:]
+    with pytest.raises(ValueError):
+        parse_time("yesterday")
+
+def test_late_line_for_previous_day_keeps_both_manifests():
+    s3 = LocalS3()
+    log = SegmentedAuditLog(s3, "audit", max_bytes=1, flush_thread=False)
+    midnight = datetime.datetime(2026, 10, 19)
+    offsets = [-2, -0.5, 0.1, -0.1, 1]  # one line arrives after the day rolled over
+    lines = [f"{(midnight + datetime.timedelta(seconds=o)).isoformat()} | HEARTBEAT | a | " for o in offsets]
+    for line in lines:
+        log.append(line + "\n")
+    log.flush()
+
+    reader = SegmentReader(s3, "audit", "mesh_audit")
+    previous = list_day_manifests(s3, "audit", "mesh_audit", midnight - datetime.timedelta(days=1))
+    current = list_day_manifests(s3, "audit", "mesh_audit", midnight)
+    assert sum(e["lines"] for e in previous) == 3
+    assert sum(e["lines"] for e in current) == 2
+    assert sorted(reader.query(10, AuditFilter(end=midnight + datetime.timedelta(hours=1)))) == sorted(lines)
+
+def test_query_reads_overlapping_segments_from_other_writers():
+    s3 = LocalS3()
+    slow = SegmentedAuditLog(s3, "audit", writer_id="slow", flush_thread=False)
+    busy = SegmentedAuditLog(s3, "audit", writer_id="busy", flush_thread=False)
+    slow_lines = [f"{(START + datetime.timedelta(seconds=s)).isoformat()} | HEARTBEAT | slow | "
+                  for s in range(0, 60, 10)]
+    busy_lines = make_lines(25)[12:20]  # starts after slow's segment, ends before it
+    for line in slow_lines:
+        slow.append(line + "\n")
+    for line in busy_lines:
+        busy.append(line + "\n")
+    slow.flush()
+    busy.flush()
+
+    reader = SegmentReader(s3, "audit", "mesh_audit")
+    assert reader.query(3, AuditFilter(end=START + datetime.timedelta(hours=1))) == slow_lines[-3:]
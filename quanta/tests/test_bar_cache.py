@@ -0,0 +1,75 @@
+# quanta/tests/test_bar_cache.py
+
+import io
+import json
+import pytest
+from botocore.exceptions import ClientError
+from quanta.ingest.bar_cache import BarCache
+
+class RecordingS3:
+    def __init__(self, objects):
+        self.objects = objects  # key -> (bytes, etag)
+        self.calls = []
+
+    def get_object(self, Bucket, Key, IfNoneMatch=None):
+        self.calls.append((Key, IfNoneMatch))
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        data, etag = self.objects[Key]
+        if IfNoneMatch == etag:
+            raise ClientError({"Error": {"Code": "304"}}, "GetObject")
+        return {"Body": io.BytesIO(data), "ETag": etag}
+
+def test_memory_then_disk_revalidation(tmp_path):
+    s3 = RecordingS3({"polygon/SPY/2024-05-20.json": (json.dumps([{"close": 1}]).encode(), '"e1"')})
+    cache = BarCache(s3=s3, cache_dir=str(tmp_path), max_entries=4, ttl=60)
+    assert cache.get("b", "polygon/SPY/2024-05-20.json") == [{"close": 1}]
+    assert cache.get("b", "polygon/SPY/2024-05-20.json") == [{"close": 1}]
+    assert len(s3.calls) == 1
+
+    # A fresh process reuses the disk copy after a 304
+    cache2 = BarCache(s3=s3, cache_dir=str(tmp_path), max_entries=4, ttl=60)
+    assert cache2.get("b", "polygon/SPY/2024-05-20.json") == [{"close": 1}]
+    assert s3.calls[-1] == ("polygon/SPY/2024-05-20.json", '"e1"')
+    stats = cache2.stats()
+    assert stats["disk_hits"] == 1 and stats["revalidated"] == 1
+
+def test_missing_object_returns_none(tmp_path):
+    s3 = RecordingS3({})
+    cache = BarCache(s3=s3, cache_dir=str(tmp_path), miss_ttl=60)
+    assert cache.get("b", "polygon/SPY/1999-01-01.json") is None
+    assert cache.stats()["not_found"] == 1
+    # The miss is cached: no second GET until it expires or is invalidated
+    assert cache.get("b", "polygon/SPY/1999-01-01.json") is None
+    assert len(s3.calls) == 1
+    assert cache.stats()["not_found_hits"] == 1
+    s3.objects["polygon/SPY/1999-01-01.json"] = (b"[]", '"e1"')
+    cache.invalidate("b", "polygon/SPY/1999-01-01.json")
+    assert cache.get("b", "polygon/SPY/1999-01-01.json") == []
+
+def test_corrupt_disk_copy_is_dropped(tmp_path):
+    key = "polygon/SPY/2024-05-20.json"
+    s3 = RecordingS3({key: (json.dumps([{"close": 1}]).encode(), '"e1"')})
+    BarCache(s3=s3, cache_dir=str(tmp_path)).get("b", key)
+    path = BarCache(s3=s3, cache_dir=str(tmp_path))._disk_path("b", key)
+    with open(path, "wb") as f:
+        f.write(b"[{\"clo")
+
+    cache = BarCache(s3=s3, cache_dir=str(tmp_path))
+    with pytest.raises(json.JSONDecodeError):
+        cache.get("b", key)
+    # The next read fetches the body again instead of revalidating the bad copy
+    assert cache.get("b", key) == [{"close": 1}]
+    assert s3.calls[-1] == (key, None)
+
+def test_lru_and_disk_budget_evictions(tmp_path):
+    objects = {f"k{i}": (b"x" * 100, f'"e{i}"') for i in range(5)}
+    cache = BarCache(s3=RecordingS3(objects), cache_dir=str(tmp_path), max_entries=2,
+                     max_disk_bytes=250, ttl=60)
+    for i in range(5):
+        cache.get("b", f"k{i}", decode=bytes)
+    stats = cache.stats()
+    assert stats["memory_entries"] == 2
+    assert stats["memory_evictions"] == 3
+    assert stats["disk_bytes"] <= 250
+    assert stats["disk_evictions"] >= 3
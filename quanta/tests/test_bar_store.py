@@ -0,0 +1,62 @@
+# quanta/tests/test_bar_store.py
+
+import numpy as np
+from quanta.ingest import bar_store
+
+def sample_bars(n, start=1716211800000):
+    return [
+        {"open": 1.0 + i, "high": 2.0 + i, "low": 0.5 + i, "close": 1.5 + i,
+         "volume": 100.0 * i, "vwap": None, "timestamp": start + i * 60000,
+         "transactions": i, "otc": None}
+        for i in range(n)
+    ]
+
+def test_bars_to_array_accepts_short_keys():
+    arr = bar_store.bars_to_array([{"o": 1.0, "h": 2.0, "l": 0.5, "c": 1.5, "v": 10, "t": 5, "n": 3}])
+    assert arr["close"][0] == 1.5
+    assert arr["timestamp"][0] == 5
+    assert np.isnan(arr["vwap"][0])
+
+def test_month_round_trip():
+    days = {
+        "2024-05-21": bar_store.bars_to_array(sample_bars(3)),
+        "2024-05-20": bar_store.bars_to_array(sample_bars(5)),
+    }
+    data = bar_store.encode_month(days)
+    decoded = bar_store.split_days(*bar_store.decode_month(data))
+    assert list(decoded) == ["2024-05-20", "2024-05-21"]
+    assert len(decoded["2024-05-20"]) == 5
+    assert decoded["2024-05-21"]["close"].tolist() == [1.5, 2.5, 3.5]
+
+def test_decode_selected_columns():
+    data = bar_store.encode_month({"2024-05-20": bar_store.bars_to_array(sample_bars(4))})
+    days, offsets, arr = bar_store.decode_month(data, columns=["close"])
+    assert arr.dtype.names == ("close",)
+    assert offsets.tolist() == [0, 4]
+
+def test_array_to_bars():
+    bars = bar_store.array_to_bars(bar_store.bars_to_array(sample_bars(2)))
+    assert bars[1]["open"] == 2.0
+    assert bars[1]["transactions"] == 1
+
+def test_missing_values_and_otc_round_trip():
+    bars = sample_bars(2)
+    bars[0]["otc"] = True
+    bars[1]["transactions"] = None
+    back = bar_store.array_to_bars(bar_store.bars_to_array(bars))
+    assert back[0]["vwap"] is None
+    assert back[0]["otc"] is True
+    assert back[1]["otc"] is None
+    assert back[1]["transactions"] is None
+    assert back[0]["transactions"] == 0
+
+def test_objects_without_otc_column_still_decode():
+    arr = bar_store.bars_to_array(sample_bars(2))
+    old = np.zeros(2, dtype=[(n, bar_store.BAR_DTYPE[n]) for n in bar_store.BAR_COLUMNS if n != "otc"])
+    for name in old.dtype.names:
+        old[name] = arr[name]
+    buf = bar_store.io.BytesIO()
+    np.savez_compressed(buf, _days=np.array(["2024-05-20"], dtype="U10"), _offsets=np.array([0, 2]),
+                        **{name: old[name] for name in old.dtype.names})
+    days, offsets, decoded = bar_store.decode_month(buf.getvalue())
+    assert bar_store.array_to_bars(decoded)[0]["otc"] is None
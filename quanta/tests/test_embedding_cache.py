@@ -0,0 +1,34 @@
+# quanta/tests/test_embedding_cache.py
+
+from quanta.crews.embedding_cache import CachedEmbeddings
+from quanta.benchmarks.stand_ins import LocalEmbeddings
+
+def test_cache_hits_across_runs(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    inner = LocalEmbeddings()
+    cache = CachedEmbeddings(inner, path=path)
+    first = cache.embed_documents(["NVDA,1,2", "AAPL,3,4", "NVDA,1,2"])
+    # The duplicate is embedded once
+    assert inner.texts == 2
+    assert first[0] == first[2]
+    assert cache.stats()["misses"] == 2
+    cache.close()
+
+    # A new process (new cache object) finds the vectors on disk
+    inner = LocalEmbeddings()
+    cache = CachedEmbeddings(inner, path=path)
+    again = cache.embed_documents(["AAPL,3,4", "TSLA,5,6"])
+    assert inner.texts == 1
+    assert again[0] == first[1]
+    assert cache.embed_query("NVDA,1,2") == first[0]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert abs(stats["hit_rate"] - 2 / 3) < 1e-9
+    cache.close()
+
+def test_namespaces_do_not_share_vectors(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    CachedEmbeddings(LocalEmbeddings(), path=path, namespace="model-a").embed_documents(["x"])
+    inner = LocalEmbeddings()
+    CachedEmbeddings(inner, path=path, namespace="model-b").embed_documents(["x"])
+    assert inner.texts == 1
@@ -0,0 +1,29 @@
+# quanta/tests/test_health_registry.py
+
+import json
+import pytest
+from quanta.mesh.health_registry import BeaconCoalescer, HEALTH_KEY
+from quanta.benchmarks.stand_ins import LocalRedis
+
+def beacon(agent, **fields):
+    data = {"agent": agent, "timestamp": "2026-10-18T12:00:00", "uptime": 60, "memory_usage": 0.5,
+            "error_rate": 0.0, "queue_length": 3}
+    data.update(fields)
+    return data
+
+def test_invalid_beacon_is_rejected_without_losing_others():
+    r = LocalRedis()
+    acked = []
+    coalescer = BeaconCoalescer(r, on_flushed=acked.extend, flush_thread=False)
+    coalescer.add(beacon("a"), "1-0")
+    with pytest.raises(ValueError):
+        coalescer.add({"timestamp": "2026-10-18T12:00:01"}, "2-0")
+    bad = beacon("b")
+    del bad["memory_usage"]
+    with pytest.raises(ValueError):
+        coalescer.add(bad, "3-0")
+    coalescer.flush()
+    stored = r.hgetall(HEALTH_KEY)
+    assert list(stored) == [b"a"]
+    assert json.loads(stored[b"a"])["uptime"] == 60
+    assert acked == ["1-0"]
@@ -0,0 +1,50 @@
+# quanta/tests/test_supervisor_alerts.py
+
+import json
+from quanta.brain.supervisor_alerts import AlertStateMachine, AlertBatchWriter, firing_alerts
+from quanta.utils.heartbeat import send_heartbeat, check_workers, worker_stats
+from quanta.benchmarks.stand_ins import LocalRedis, LocalS3
+
+def test_one_alert_per_transition():
+    r = LocalRedis()
+    alerts = AlertStateMachine(r=r)
+    transitions = []
+    # Down for 60 checks, then back
+    for minute in range(60):
+        transitions += alerts.evaluate({"job_producer": 1000.0}, 1060 + minute * 60)
+    assert [a["state"] for a in transitions] == ["firing"]
+    assert set(firing_alerts(r)) == {"job_producer"}
+
+    transitions = alerts.evaluate({}, 5000)
+    assert [(a["state"], a["duration_sec"]) for a in transitions] == [("resolved", 5000 - 1060)]
+    assert firing_alerts(r) == {}
+
+def test_batch_writer_flushes_one_jsonl_object():
+    s3 = LocalS3()
+    writer = AlertBatchWriter(s3, "audit", flush_interval=300)
+    writer.last_flush = 0
+    writer.add([{"worker": "a", "state": "firing"}, {"worker": "b", "state": "firing"}])
+    assert writer.maybe_flush(now=100) is None
+    key = writer.maybe_flush(now=400)
+    body = s3.get_object(Bucket="audit", Key=key)["Body"].read().decode()
+    assert [json.loads(line)["worker"] for line in body.splitlines()] == ["a", "b"]
+    assert s3.calls["put_object"] == 1
+
+def test_decommissioned_worker_alert_resolves():
+    r = LocalRedis()
+    alerts = AlertStateMachine(r=r)
+    send_heartbeat("old_worker", stats={"jobs": 1}, r=r)
+    send_heartbeat("job_producer", r=r)
+    now = r.data["quanta:heartbeats"][b"job_producer"] + 600
+    stale, missing = check_workers(["job_producer"], 120, now=now, r=r, retention_sec=3600)
+    assert set(stale) == {"old_worker", "job_producer"} and missing == []
+    assert {a["worker"] for a in alerts.evaluate(stale, now)} == {"old_worker", "job_producer"}
+
+    # Past retention the old worker leaves the set; the expected one is reported missing
+    now += 3600
+    stale, missing = check_workers(["job_producer"], 120, now=now, r=r, retention_sec=3600)
+    assert stale == {} and missing == ["job_producer"]
+    assert worker_stats(r) == {}
+    unhealthy = dict(stale, **{worker: None for worker in missing})
+    transitions = alerts.evaluate(unhealthy, now)
+    assert [(a["worker"], a["state"]) for a in transitions] == [("old_worker", "resolved")]
@@ -0,0 +1,33 @@
+# quanta/tests/test_trading_calendar.py
+
+import datetime
+from quanta.clock.trading_calendar import (
+    holidays, is_trading_day, session_close, trading_days, EARLY_CLOSE, REGULAR_CLOSE,
+)
+
+def test_2024_sessions():
+    # NYSE published 252 sessions for 2024
+    days = list(trading_days("2024-01-01", "2024-12-31"))
+    assert len(days) == 252
+    assert datetime.date(2024, 3, 29) not in days   # Good Friday
+    assert datetime.date(2024, 6, 19) not in days   # Juneteenth
+    assert datetime.date(2024, 1, 6) not in days    # Saturday
+
+def test_observed_holidays():
+    # July 4 2026 is a Saturday: closed Friday the 3rd
+    assert not is_trading_day("2026-07-03")
+    # New Year's Day 2022 was a Saturday: Dec 31 2021 was a normal session
+    assert is_trading_day("2021-12-31")
+    assert datetime.date(2021, 12, 31) not in holidays(2021)
+    # Christmas 2022 was a Sunday: closed Monday the 26th
+    assert not is_trading_day("2022-12-26")
+    # One-off closures
+    assert not is_trading_day("2012-10-29")
+    assert not is_trading_day("2018-12-05")
+
+def test_early_closes():
+    assert session_close("2024-11-29") == EARLY_CLOSE   # day after Thanksgiving
+    assert session_close("2024-12-24") == EARLY_CLOSE
+    assert session_close("2024-07-03") == EARLY_CLOSE
+    assert session_close("2024-07-05") == REGULAR_CLOSE
+    assert session_close("2024-07-04") is None
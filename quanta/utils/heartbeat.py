@@ -0,0 +1,89 @@
+# quanta/utils/heartbeat.py
+#
+# Shared worker heartbeats.
+#
+# Every worker beats into one sorted set (member = worker name, score = unix
+# time) over a pooled connection reused across beats. The supervisor then
+# finds stale workers with a single ZRANGEBYSCORE, O(log n + stale), however
+# many workers run. Optional per-worker stats live in one hash.
+#
+# Workers silent for longer than HEARTBEAT_RETENTION_SEC (decommissioned or
+# renamed) are dropped from the set by check_workers, so they stop being
+# reported stale; expected workers that are dropped are reported as missing.
+#
+# The legacy health_{worker} string key is still set in the same pipeline for
+# anything that reads it directly.
+
+import os
+import json
+import time
+import logging
+import threading
+
+import redis
+
+REDIS_URL = os.getenv("REDIS_URL")
+HEARTBEAT_ZSET = os.getenv("QUANTA_HEARTBEAT_ZSET", "quanta:heartbeats")
+HEARTBEAT_STATS_KEY = os.getenv("QUANTA_HEARTBEAT_STATS_KEY", "quanta:heartbeat_stats")
+HEARTBEAT_RETENTION_SEC = int(os.getenv("QUANTA_HEARTBEAT_RETENTION_SEC", str(7 * 24 * 3600)))
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_redis(url=None):
+    """
+    One client (and so one connection pool) per URL for the whole process.
+    """
+    url = url or REDIS_URL
+    with _clients_lock:
+        if url not in _clients:
+            _clients[url] = redis.from_url(url)
+        return _clients[url]
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+def send_heartbeat(worker_name, stats=None, r=None):
+    try:
+        r = r or get_redis()
+        now = time.time()
+        pipe = r.pipeline(transaction=False)
+        pipe.zadd(HEARTBEAT_ZSET, {worker_name: now})
+        pipe.set(f"health_{worker_name}", now)
+        if stats:
+            pipe.hset(HEARTBEAT_STATS_KEY, worker_name, json.dumps(stats))
+        pipe.execute()
+    except Exception as e:
+        logging.error(f"Heartbeat error for {worker_name}: {e}")
+
+def last_heartbeats(r=None):
+    """
+    {worker: last heartbeat unix time} for every worker that has ever beaten.
+    """
+    r = r or get_redis()
+    return {_decode(worker): score for worker, score in r.zrange(HEARTBEAT_ZSET, 0, -1, withscores=True)}
+
+def check_workers(expected, max_age_sec, now=None, r=None, retention_sec=HEARTBEAT_RETENTION_SEC):
+    """
+    One round trip: returns ({stale worker: last heartbeat}, [expected workers
+    not in the set]). Workers older than retention_sec are dropped first.
+    """
+    r = r or get_redis()
+    now = now or time.time()
+    cutoff = f"({now - retention_sec}"
+    pipe = r.pipeline(transaction=False)
+    pipe.zrangebyscore(HEARTBEAT_ZSET, "-inf", cutoff)
+    pipe.zremrangebyscore(HEARTBEAT_ZSET, "-inf", cutoff)
+    pipe.zrangebyscore(HEARTBEAT_ZSET, "-inf", f"({now - max_age_sec}", withscores=True)
+    if expected:
+        pipe.zmscore(HEARTBEAT_ZSET, list(expected))
+    results = pipe.execute()
+    if results[0]:
+        r.hdel(HEARTBEAT_STATS_KEY, *results[0])
+    stale = {_decode(worker): score for worker, score in results[2]}
+    missing = [worker for worker, score in zip(expected, results[3]) if score is None] if expected else []
+    return stale, missing
+
+def worker_stats(r=None):
+    r = r or get_redis()
+    return {_decode(worker): json.loads(value) for worker, value in r.hgetall(HEARTBEAT_STATS_KEY).items()}